@@ -8,6 +8,9 @@ __license__   = "MIT"
 
 import re
 import os
+import time
+import weakref
+import threading as mt
 
 from ...                   import exceptions as rse
 from ...                   import url        as rs_url
@@ -117,6 +120,12 @@ class Adaptor (a_base.Base):
 
     2) use `export LIBCLOUD_DEBUG=/dev/stderr` for debugging
 
+    3) libcloud drivers are shared by all managers and resources which use the
+    same credentials and endpoint.  Template and image lists are cached per
+    driver for `catalog_cache_ttl` seconds, and the states of all acquired
+    compute resources are refreshed by a single monitor thread, with one
+    `list_nodes()` call per driver every `monitor_interval` seconds.
+
     """
 
     # --------------------------------------------------------------------------
@@ -130,6 +139,21 @@ class Adaptor (a_base.Base):
 
         self._default_contexts = list()
 
+        # for region parsing, from 'ec2.<region>.amazonaws.com'
+        self.region_re = re.compile (r'^ec2\.(.+)\.amazonaws\.com$')
+
+        # libcloud drivers by backend, credentials and endpoint, and their
+        # template and image catalogs
+        self.drivers     = dict()
+        self.catalogs    = dict()
+        self.catalog_ttl = float (self._cfg.get ('catalog_cache_ttl', 300.0))
+
+        # compute resources to monitor, by driver
+        self.monitor_interval = float (self._cfg.get ('monitor_interval', 10.0))
+        self._monitored       = dict()
+        self._monitor_cond    = mt.Condition (self._lock)
+        self._monitor_thread  = None
+
 
     # --------------------------------------------------------------------------
     #
@@ -271,22 +295,43 @@ class Adaptor (a_base.Base):
 
 
                 if  backend  == 'aws' :
-                    self._logger.debug ("aws backend")
-                    conn = driver (ctx_id, ctx_key)
-                    # do we need URL details for different availability zones?
+                    # regional endpoints select the region, the generic one
+                    # falls back to the libcloud default
+                    match = self.region_re.match (ec2_url.host or '')
+                    if  match : key = (backend, ctx_id, ctx_key, match.group(1))
+                    else      : key = (backend, ctx_id, ctx_key, None)
 
                 elif backend == 'euca' :
-                    self._logger.debug ("eucalyptus backend")
-                    conn = driver (ctx_id, ctx_key,
-                                 # secure = True, # how do we know?
-                                   host   = ctx_url.host,
-                                   port   = ctx_url.port,
-                                   path   = ctx_url.path)
+                    key = (backend, ctx_id, ctx_key, ctx_url.host,
+                           ctx_url.port, ctx_url.path)
                 else :
                     error = "only EC2 supported (not %s)" % ec2_url
                     next
 
-                return conn, backend
+                # drivers are shared by all users of the same credentials and
+                # endpoint, and keep their connection alive
+                with self._lock :
+
+                    if  key not in self.drivers :
+
+                        if  backend  == 'aws' :
+                            self._logger.debug ("aws backend")
+                            if  key[3] :
+                                conn = driver (ctx_id, ctx_key, region=key[3])
+                            else :
+                                conn = driver (ctx_id, ctx_key)
+
+                        else :
+                            self._logger.debug ("eucalyptus backend")
+                            conn = driver (ctx_id, ctx_key,
+                                         # secure = True, # how do we know?
+                                           host   = ctx_url.host,
+                                           port   = ctx_url.port,
+                                           path   = ctx_url.path)
+
+                        self.drivers[key] = conn
+
+                    return self.drivers[key], backend
 
         # no luck, didn't get a valid connection...
         if  error :
@@ -297,6 +342,236 @@ class Adaptor (a_base.Base):
                               % ec2_url)
 
 
+    # --------------------------------------------------------------------------
+    #
+    def is_ec2 (self, conn) :
+
+        # EC2 based drivers support keypairs, security groups, and image
+        # selection by id
+        return conn.type in [self.lcct.Provider.EC2,
+                             self.lcct.Provider.EUCALYPTUS]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _get_catalog (self, conn, kind) :
+
+        # return the cached catalog of the given kind ('templates' or
+        # 'images') for the given driver, as `[timestamp, {name : item}]`.
+        # Drivers are pooled, so their ids are stable.
+
+        catalog = self.catalogs.setdefault (id(conn), dict())
+
+        if  kind not in catalog :
+            catalog[kind] = [0.0, dict()]
+
+        return catalog[kind]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def get_templates (self, conn) :
+        """
+        Return a dict of all templates (libcloud node sizes) of the given
+        driver, by name.  The list is cached for `catalog_cache_ttl` seconds.
+        """
+
+        with self._lock :
+            entry = self._get_catalog (conn, 'templates')
+            if  time.time () - entry[0] <= self.catalog_ttl :
+                return dict(entry[1])
+
+        templates = dict()
+        for template in conn.list_sizes () :
+            templates[template.name] = template
+
+        with self._lock :
+            entry[0] = time.time ()
+            entry[1] = templates
+
+        return dict(templates)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def get_images (self, conn, uid=None) :
+        """
+        Return a dict of the OS images of the given driver, by id.  If `uid` is
+        given, only that image is looked up (if it is not known yet), and
+        merged into the cached catalog.  The complete list is cached for
+        `catalog_cache_ttl` seconds.
+        """
+
+        with self._lock :
+            entry = self._get_catalog (conn, 'images')
+            if  time.time () - entry[0] <= self.catalog_ttl or \
+                uid in entry[1] :
+                return dict(entry[1])
+
+        # EC2 based backends can list specific images, and we only consider
+        # machine images there
+        ec2 = self.is_ec2 (conn)
+
+        if  ec2 :
+            prefix = 'ami-'
+            if  uid : images = conn.list_images (ex_image_ids=[uid])
+            else    : images = conn.list_images ()
+        else :
+            prefix = ''
+            images = conn.list_images ()
+
+        found = dict()
+        for image in images :
+            if  image.id.startswith (prefix) :
+                found[image.id] = image
+
+        with self._lock :
+            if  uid and ec2 :
+                entry[1].update (found)
+            else :
+                entry[0] = time.time ()
+                entry[1] = found
+
+            return dict(entry[1])
+
+
+    # --------------------------------------------------------------------------
+    #
+    def translate_state (self, node) :
+        """
+        Translate the state of a libcloud node into a resource state and state
+        detail.
+        """
+
+        detail = node.extra.get ('status')
+
+        s = node.state
+        if   s == self.lcct.NodeState.RUNNING    : state = c.ACTIVE
+        elif s == self.lcct.NodeState.REBOOTING  : state = c.PENDING
+        elif s == self.lcct.NodeState.TERMINATED : state = c.EXPIRED
+        elif s == self.lcct.NodeState.PENDING    : state = c.PENDING
+        elif s == self.lcct.NodeState.UNKNOWN    : state = c.UNKNOWN
+        else                                     : state = c.UNKNOWN
+
+        if  state == c.UNKNOWN and detail == 'shutting-down' :
+            state =  c.EXPIRED
+
+        return state, detail
+
+
+    # --------------------------------------------------------------------------
+    #
+    def monitor (self, compute) :
+        """
+        Register a compute resource for state monitoring.  All resources are
+        monitored by a single thread, which is started on demand, and which
+        terminates once no resources are left to monitor.
+        """
+
+        with self._lock :
+
+            entry = self._monitored.setdefault (id(compute.conn),
+                                                {'conn'     : compute.conn,
+                                                 'computes' : dict()})
+            entry['computes'][compute.rid] = weakref.ref (compute)
+
+            if  not self._monitor_thread :
+                self._monitor_thread = mt.Thread (target=self._monitor_loop,
+                                                  name='ec2_resource.monitor')
+                self._monitor_thread.daemon = True
+                self._monitor_thread.start ()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _monitor_loop (self) :
+
+        while True :
+
+            time.sleep (self.monitor_interval)
+
+            with self._lock :
+
+                if  not self._monitored :
+                    # nothing left to monitor - monitor() restarts us if needed
+                    self._monitor_thread = None
+                    return
+
+                conns = [entry['conn'] for entry in self._monitored.values ()]
+
+            for conn in conns :
+                try :
+                    self.monitor_refresh (conn)
+                except Exception as e :
+                    self._logger.exception ("resource monitoring failed: %s"
+                                           % e)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def monitor_refresh (self, conn) :
+        """
+        Refresh the states of all monitored compute resources of the given
+        driver with a single `list_nodes()` call, and notify all waiters.
+        Resources in final state are not monitored anymore, and drivers without
+        resources are dropped.
+        """
+
+        with self._lock :
+            entry = self._monitored.get (id(conn))
+            if  not entry :
+                return
+
+            computes = list(entry['computes'].items ())
+            if  not computes :
+                del self._monitored[id(conn)]
+                return
+
+        try :
+            nodes = dict([[node.id, node] for node in conn.list_nodes ()])
+            error = None
+
+        except Exception as e :
+            nodes = dict()
+            error = e
+
+        with self._lock :
+
+            for rid, ref in computes :
+
+                compute = ref ()
+
+                if  compute is not None :
+
+                    if  error :
+                        self._logger.error ("Could not obtain resource state "
+                                            "(%s): %s" % (compute.id, error))
+                        compute._set_resource (None)
+                    else :
+                        compute._set_resource (nodes.get (rid))
+
+                if  compute is None or compute.state == c.EXPIRED :
+                    entry['computes'].pop (rid, None)
+
+            if  not entry['computes'] and \
+                self._monitored.get (id(conn)) is entry :
+                del self._monitored[id(conn)]
+
+            self._monitor_cond.notify_all ()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def monitor_wait (self, timeout) :
+        """
+        Wait for the next state refresh of the monitored resources, for at most
+        `timeout` seconds.
+        """
+
+        with self._lock :
+            self._monitor_cond.wait (timeout)
+
+
 ###############################################################################
 #
 class EC2Keypair (cpi_context.Context) :
@@ -619,35 +894,20 @@ class EC2ResourceManager (cpi_resource.Manager) :
 
     # --------------------------------------------------------------------------
     #
-    def _refresh_templates (self, pattern=None) :
-
-        self.templates      = []
-        self.templates_dict = {}
+    def _refresh_templates (self) :
 
-        for template in self.conn.list_sizes (pattern) :
-
-            self.templates_dict   [template.name] = template
-            self.templates.append (template.name)
+        # template lists are cached by the adaptor
+        self.templates_dict = self._adaptor.get_templates (self.conn)
+        self.templates      = list(self.templates_dict.keys ())
 
 
     # --------------------------------------------------------------------------
     #
     def _refresh_images (self, uid=None) :
 
-        self.images      = []
-        self.images_dict = {}
-
-        if uid:
-            pattern = [uid]
-        else:
-            pattern = None
-
-        for image in self.conn.list_images (ex_image_ids=pattern) :
-
-            if  image.id.startswith ('ami-') :
-
-                self.images_dict   [image.id] = image
-                self.images.append (image.id)
+        # image lists are cached by the adaptor
+        self.images_dict = self._adaptor.get_images (self.conn, uid)
+        self.images      = list(self.images_dict.keys ())
 
 
     # --------------------------------------------------------------------------
@@ -704,7 +964,7 @@ class EC2ResourceManager (cpi_resource.Manager) :
 
             # make sure template and image are valid, and get handles
             if  rd.template not in self.templates_dict :
-                self._refresh_templates (rd.template)
+                self._refresh_templates ()
 
             if  rd.image not in self.images_dict :
                 self._refresh_images (uid=rd.image)
@@ -717,26 +977,33 @@ class EC2ResourceManager (cpi_resource.Manager) :
             cid = getpass.getuser()
             _c   = self.conn
 
-            # create/use the saga-sg security group which allows ssh access
-            try:
-                ret = _c.ex_create_security_group('saga-sg','SAGA', None)
-                ret = _c.ex_get_security_groups(group_names=['saga-sg'])
-                gid = ret[0].id
-                ret = _c.ex_authorize_security_group_ingress(gid, 22, 22,
+            # keypairs and security groups are EC2 specific
+            extra = dict()
+
+            if  self._adaptor.is_ec2 (_c) :
+
+                # create/use the saga-sg security group which allows ssh access
+                try:
+                    ret = _c.ex_create_security_group('saga-sg','SAGA', None)
+                    ret = _c.ex_get_security_groups(group_names=['saga-sg'])
+                    gid = ret[0].id
+                    ret = _c.ex_authorize_security_group_ingress(gid, 22, 22,
                                                          cidr_ips=['0.0.0.0/0'])
-                ret = _c.ex_authorize_security_group_egress (gid, 22, 22,
+                    ret = _c.ex_authorize_security_group_egress (gid, 22, 22,
                                                          cidr_ips=['0.0.0.0/0'])
 
-            except Exception as e:
-                # lets hope this was a race and the group now exists...
-                pass
+                except Exception as e:
+                    # lets hope this was a race and the group now exists...
+                    pass
+
+                extra['ex_keyname']         = token
+                extra['ex_security_groups'] = ['saga-sg']
 
             # it should be safe to create the VM instance now
             node = _c.create_node(name='radical.saga.resource.Compute.%s' % cid,
                                   size=self.templates_dict[rd.template],
                                   image=self.images_dict[rd.image],
-                                  ex_keyname=token,
-                                  ex_security_groups=['saga-sg'])
+                                  **extra)
 
             resource_info = {'backend'              : self.backend   ,
                              'resource'             : node           ,
@@ -847,8 +1114,8 @@ class EC2ResourceManager (cpi_resource.Manager) :
         if  rtype and not (rtype & c.COMPUTE) :
             return []
 
-        if not len (self.templates) :
-            self._refresh_templates ()
+        # cached by the adaptor
+        self._refresh_templates ()
 
         return self.templates
 
@@ -871,8 +1138,8 @@ class EC2ResourceManager (cpi_resource.Manager) :
         if  rtype and not (rtype & c.COMPUTE) :
             return []
 
-        if not len (self.images) :
-            self._refresh_images ()
+        # cached by the adaptor
+        self._refresh_images ()
 
         return self.images
 
@@ -982,10 +1249,10 @@ class EC2ResourceCompute (cpi_resource.Compute) :
             raise rse.BadParameter("Cannot acquire resource, no id/contact")
 
 
-        # FIXME: we don't actually need new state, it should be fresh at
-        # this point, right?!
-        self._refresh_state ()
-
+        # the node information is fresh at this point -- further state
+        # updates are obtained by the adaptor's resource monitor
+        self._set_resource (self.resource)
+        self._adaptor.monitor (self)
 
         return self.get_api ()
 
@@ -994,44 +1261,39 @@ class EC2ResourceCompute (cpi_resource.Compute) :
     #
     def _refresh_state (self) :
 
+        # one `list_nodes()` call refreshes all resources on our connection
         if  self.state == c.EXPIRED :
             # no need to update, state is final
             return
 
-        try :
-            # NOTE: ex_node_ids is only supported by ec2
-            nodes = self.conn.list_nodes (ex_node_ids=[self.rid])
+        self._adaptor.monitor_refresh (self.conn)
 
-            if  not len (nodes) :
-                raise rse.IncorrectState ("resource '%s' disappeared")
 
-            if  len (nodes) != 1 :
-                self._logger.warning ("Cannot identify instance %s" % self.rid)
+    # --------------------------------------------------------------------------
+    #
+    def _set_resource (self, node) :
 
-            self.resource = nodes[0]
+        # called by the adaptor's resource monitor with fresh node information,
+        # or with `None` if the node could not be found
 
-            if  'status' in self.resource.extra :
-                self.detail = self.resource.extra['status']
+        if  self.state == c.EXPIRED :
+            # no need to update, state is final
+            return
 
-            # FIXME: move state translation to adaptor
-            s = self.resource.state
-            if   s == self.lcct.NodeState.RUNNING    : self.state = c.ACTIVE
-            elif s == self.lcct.NodeState.REBOOTING  : self.state = c.PENDING
-            elif s == self.lcct.NodeState.TERMINATED : self.state = c.EXPIRED
-            elif s == self.lcct.NodeState.PENDING    : self.state = c.PENDING
-            elif s == self.lcct.NodeState.UNKNOWN    : self.state = c.UNKNOWN
-            else                                     : self.state = c.UNKNOWN
+        if  node is None :
+            self._logger.error ("Could not obtain resource state (%s): "
+                                "resource disappeared" % self.id)
+            self.state = c.UNKNOWN
 
-            if  self.state == c.UNKNOWN and self.detail == 'shutting-down' :
-                self.state =  c.EXPIRED
+        else :
+            self.resource = node
+            self.state, detail = self._adaptor.translate_state (node)
 
-        except Exception as e :
-            self._logger.error ("Could not obtain resource state (%s): %s"
-                             % (self.id, e))
-            self.state  =  c.UNKNOWN
+            if  detail :
+                self.detail = detail
 
         if  self.state  == c.EXPIRED :
-            self.access is None
+            self.access = None
         else :
             if  len (self.resource.public_ips) :
                 self.access = "ssh://%s/" % self.resource.public_ips[0]
@@ -1111,6 +1373,7 @@ class EC2ResourceCompute (cpi_resource.Compute) :
         self.conn.destroy_node (self.resource)
         self.state  = c.EXPIRED
         self.detail = 'destroyed by user'
+        self.access = None
 
 
     # --------------------------------------------------------------------------
@@ -1118,32 +1381,37 @@ class EC2ResourceCompute (cpi_resource.Compute) :
     @SYNC_CALL
     def wait (self, state, timeout) :
 
-        import time
+        # states are refreshed by the adaptor's resource monitor, and we wait
+        # for its notifications
+
         start = time.time ()
 
-        while not self.state :
-            self._refresh_state ()
+        while True :
 
-        if  self.state == c.EXPIRED and \
-            not  state  & c.EXPIRED :
-                raise rse.IncorrectState ("resource is in final state (%s): %s"
-                                        % (self.detail, self.id))
+            if  self.state == c.EXPIRED and \
+                not  state  & c.EXPIRED :
+                    raise rse.IncorrectState ("resource is in final state "
+                                              "(%s): %s" % (self.detail, self.id))
 
-        while not (self.state & state):
+            if  self.state and self.state & state :
+                break
 
             self._logger.info("wait   for resource state %s: %s"
                              % (state, self.state))
 
-            if timeout > 0 :
-                now = time.time ()
+            if  timeout == 0 :
+                break
 
-                if  (now - start > timeout) :
-                    break
+            wait = self._adaptor.monitor_interval
 
-            elif timeout == 0 :
-                break
+            # `None` and negative timeouts wait forever
+            if  timeout is not None and timeout > 0 :
+                left = timeout - (time.time () - start)
+                if  left <= 0 :
+                    break
+                wait = min (wait, left)
 
-            self._refresh_state ()
+            self._adaptor.monitor_wait (wait)
 
         self._logger.info("waited for resource state %s: %s"
                          % (state, self.state))
@@ -61,6 +61,12 @@ class Entry (cpi_ns.entry.Entry,
     @ASYNC
     def delete_object_async     (self, ttype)                        : pass
 
+    @SYNC
+    def set_attributes          (self, attrs, ttype)                 : pass
+    @ASYNC
+    def set_attributes_async    (self, attrs, ttype)                 : pass
 
-
-
+    @SYNC
+    def get_attributes          (self, keys, ttype)                  : pass
+    @ASYNC
+    def get_attributes_async    (self, keys, ttype)                  : pass
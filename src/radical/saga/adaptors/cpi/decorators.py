@@ -10,6 +10,7 @@ import re
 import inspect
 
 from ...task       import Task  as T_Task   # class
+from ...task       import _accepts_from_task
 from ...constants  import SYNC  as T_SYNC
 from ...constants  import ASYNC as T_ASYNC
 from ...constants  import TASK  as T_TASK   # flag
@@ -22,6 +23,10 @@ from ...           import exceptions as rse
 # _async version if ttype is set and !None
 def SYNC_CALL (sync_function) :
 
+    sync_function_name  = sync_function.__name__
+    async_function_name = "%s_async"  %  sync_function_name
+    from_task           = _accepts_from_task (sync_function)
+
     def wrap_function (self, *args, **kwargs) :
 
         if 'ttype' in kwargs and kwargs['ttype']:
@@ -30,18 +35,17 @@ def SYNC_CALL (sync_function) :
                 # cannot handle that ttype value, do not call async methods
                 ttype = kwargs['ttype']
                 msg   = " %s: async %s() called with invalid tasktype (%s)" \
-                      % (self.__class__.__name__, sync_function.__name__,
+                      % (self.__class__.__name__, sync_function_name,
                          str(ttype))
                 raise rse.BadParameter (msg)
 
             # call async method flavor
             try :
-                async_function_name = "%s_async"  %  sync_function.__name__
-                async_function      = getattr (self, async_function_name)
+                async_function = getattr (self, async_function_name)
 
             except AttributeError as e:
                 msg = " %s: async %s() not implemented" \
-                    % (self.__class__.__name__, sync_function.__name__)
+                    % (self.__class__.__name__, sync_function_name)
                 raise rse.NotImplemented (msg) from e
 
             else :
@@ -55,12 +59,14 @@ def SYNC_CALL (sync_function) :
 
         # only some functions will provide metrics, and thus need the _from_task
         # parameter -- strip that as well if its not needed
-        if '_from_task' in kwargs:
-            if '_from_task' not in inspect.getargspec (sync_function).args:
-                del(kwargs['_from_task'])
+        if not from_task and '_from_task' in kwargs:
+            del(kwargs['_from_task'])
 
         return sync_function (self, *args, **kwargs)
 
+    # signature facts are stored on the wrapper, for the task to find
+    wrap_function._from_task = from_task
+
     return wrap_function
 
 
@@ -91,6 +97,8 @@ def CPI_SYNC_CALL (cpi_sync_function) :
 # async cpi calls attempt to wrap sync adaptor calls into threaded tasks
 def CPI_ASYNC_CALL (cpi_async_function) :
 
+    cpi_sync_function_name = re.sub ("_async$", "", cpi_async_function.__name__)
+
     def wrap_function (self, *args, **kwargs) :
 
 
@@ -112,18 +120,13 @@ def CPI_ASYNC_CALL (cpi_async_function) :
             raise rse.BadParameter (msg)
 
 
-        cpi_sync_function_name = None
-        cpi_sync_function      = None
-
         # find sync method flavor
         try :
-            cpi_sync_function_name = re.sub ("_async$", "",
-                                             cpi_async_function.__name__)
-            cpi_sync_function      = getattr (self, cpi_sync_function_name)
+            cpi_sync_function = getattr (self, cpi_sync_function_name)
 
         except AttributeError as e:
             msg = " %s: sync %s() not implemented" \
-                % (self.__class__.__name__, cpi_sync_function.__name__)
+                % (self.__class__.__name__, cpi_sync_function_name)
             raise rse.NotImplemented (msg) from e
 
 
@@ -43,6 +43,21 @@ class Directory (cpi_ns.directory.Directory) :
     @ASYNC                                
     def get_size__self_async  (self,       flags, ttype)  : pass
 
+    @SYNC
+    def list_entries          (self, npat, flags, ttype)  : pass
+    @ASYNC
+    def list_entries_async    (self, npat, flags, ttype)  : pass
+
+    @SYNC
+    def walk                  (self, npat, flags, ttype)  : pass
+    @ASYNC
+    def walk_async            (self, npat, flags, ttype)  : pass
+
+    @SYNC
+    def copy_many             (self, pairs, flags, ttype) : pass
+    @ASYNC
+    def copy_many_async       (self, pairs, flags, ttype) : pass
+
     @SYNC
     def is_file               (self, name,        ttype)  : pass
     @ASYNC
@@ -19,6 +19,9 @@ class Async (object) :
     @SYNC
     def task_cancel (self, task)          : pass
 
+    @SYNC
+    def task_get_state (self, task)       : pass
+
 
 
 
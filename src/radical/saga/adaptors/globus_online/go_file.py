@@ -7,10 +7,13 @@ __license__   = "MIT"
 """ (GSI)SSH based Globus Online Adaptor """
 
 import os
+import re
+import time
 import threading
 
 
 from ...              import exceptions as rse
+from ...              import constants  as rsc
 from ...url           import Url
 from ...utils         import pty_shell  as rsups
 from ...utils         import misc       as rsumisc
@@ -30,6 +33,13 @@ ASYNC_CALL = cpi_decs.ASYNC_CALL
 # go+ssh:// vs go+gsissh:// comes to mind
 GO_DEFAULT_URL = "gsissh://cli.globusonline.org/"
 
+# GO task states
+GO_FINAL = ['SUCCEEDED', 'FAILED', 'INACTIVE']
+
+# endpoints are re-activated if their credentials expire within that many
+# seconds
+GO_ACTIVATION_MARGIN = 60
+
 
 # ------------------------------------------------------------------------------
 # the adaptor name
@@ -89,6 +99,65 @@ _ADAPTOR_INFO          = {
 }
 
 
+# ------------------------------------------------------------------------------
+#
+def go_time_left(val):
+    """
+    Convert a GO 'Credential Time Left' value (like '00:16:35', or
+    '3 days 12:00:00') into seconds.  Returns `None` for values which cannot
+    be parsed.
+    """
+
+    match = re.match(r'^(?:(\d+)\s+days?\s*)?(\d+):(\d+):(\d+)$', val)
+    if not match:
+        return None
+
+    days, hours, mins, secs = [int(x or 0) for x in match.groups()]
+
+    return ((days * 24 + hours) * 60 + mins) * 60 + secs
+
+
+# ------------------------------------------------------------------------------
+#
+def go_parse_ls(line):
+    """
+    Parse one line of a long GO listing, like
+
+        drwxr-xr-x  user  group  4096  2015-02-17 12:00:00  name/
+
+    into the entry name and its stat info.
+    """
+
+    elems = line.split(None, 6)
+    if len(elems) < 4:
+        raise rse.NoSuccess("cannot parse listing: '%s'" % line)
+
+    mode = elems[0][0]
+    if   mode == '-': mode = 'file'
+    elif mode == 'd': mode = 'dir'
+    elif mode == 'l': mode = 'link'
+    else: raise rse.NoSuccess("stat unknown mode: '%s' (%s)" % (mode, line))
+
+    name = elems[6] if len(elems) > 6 else ''
+    if mode == 'link':
+        name = name.split(' -> ', 1)[0]
+
+    return name.strip(), {'mode': mode,
+                          'size': int(elems[3])}
+
+
+# ------------------------------------------------------------------------------
+#
+def go_task_state(task):
+    """
+    Return the current state of a task, without triggering its state getter
+    (which would poll the GO task status of its batch again).
+    """
+
+    return task._attributes_i_get(task._attributes_t_underscore(rsc.STATE),
+                                  task._UP)
+
+
 ################################################################################
 # The adaptor class
 class Adaptor(a_base.Base):
@@ -108,8 +177,22 @@ class Adaptor(a_base.Base):
         self.f_mode       = self._cfg['failure_mode']
         self.prompt       = self._cfg['prompt_pattern']
         self.localhost_ep = self._cfg['localhost_endpoint']
+        self.batch_poll   = float(self._cfg.get('batch_poll', 5.0))
         self.shells       = dict()  # keep go shells for each session
 
+        # endpoint details and stat info are cached per session, see
+        # `get_go_endpoint_list()` and `stat_cache_*()`.  A TTL of `0`
+        # disables the respective cache.
+        self.ep_ttl       = float(self._cfg.get('endpoint_cache_ttl', 600.0))
+        self.stat_ttl     = float(self._cfg.get('stat_cache_ttl',      10.0))
+        self.cache_lock   = threading.RLock()
+
+        # batch transfers submitted by container_copy*, by GO task ID, and the
+        # GO task ID for each saga task in a batch
+        self.batches      = dict()
+        self.batch_tasks  = dict()
+        self.batch_lock   = threading.RLock()
+
         #
         # Lock to synchronize concurrent access to data structures
         #
@@ -170,6 +253,7 @@ class Adaptor(a_base.Base):
                 shell = rsups.PTYShell(new_url, session=session,
                                     logger=self._logger, opts=opts, posix=False)
                 self.shells[sid]['shell'] = shell
+                self.shells[sid]['stats'] = dict()
 
                 # For this fresh shell, we get the list of public endpoints.
                 # That list will contain the set of hosts we can potentially
@@ -317,6 +401,10 @@ class Adaptor(a_base.Base):
 
         ep = self.get_go_endpoint_list(session, shell, ep_name, fetch=False)
 
+        # don't trust cached endpoint details for too long
+        if ep and time.time() - ep['_fetched'] > self.ep_ttl:
+            ep = None
+
         if not ep:
 
             # if not, check if it was created meanwhile (fetch again)
@@ -340,16 +428,13 @@ class Adaptor(a_base.Base):
                     # something above must have failed ...
                     raise rse.NoSuccess("endpoint initialization failed")
 
-        # we have the endpoint now, for sure -- make sure its activated
-        if not ep['Credential Status'] == 'ACTIVE':
-
-            # TODO: I had an active endpoint, but still got an activation
-            #       prompt, probably because the remaining lifetime was not
-            #       very long anymore.
-            # or Credential Time Left    : 00:16:35 < ????
-            # Answer: below 30 min there is a activation prompt,
-            # but it does actually continue normally.
-            # Need to capture that behavior.
+        # we have the endpoint now, for sure -- make sure its activated, and
+        # that the activation does not expire right away.
+        #
+        # NOTE: below 30 min of 'Credential Time Left', GO shows an activation
+        #       prompt, but does actually continue normally.
+        if not ep['Credential Status'] == 'ACTIVE' or \
+           ep['_expires'] - time.time() < GO_ACTIVATION_MARGIN:
 
             # Only Globus Connect Service Endpoints don't need -g?
             # Had contact on this with Globus Support, they couldn't suggest
@@ -397,10 +482,14 @@ class Adaptor(a_base.Base):
                                      "legacy_name,"         # Legacy Name
                                      "credential_status,"   # Credential Status
                                      "credential_subject,"  # Credential Subject
+                                     "credential_time_left,"
+                                                        # Credential Time Left
                                      "myproxy_server"       # MyProxy Server
                                      % endpoint_selection
                                     )
 
+                now = time.time()
+
                 for line in out.split('\n'):
                     elems = line.split(':', 1)
 
@@ -420,6 +509,8 @@ class Adaptor(a_base.Base):
 
                         endpoints[name] = {}
                         endpoints[name]['Legacy Name']       = name
+                        endpoints[name]['_fetched']          = now
+                        endpoints[name]['_expires']          = float('inf')
 
                     else:
 
@@ -430,11 +521,24 @@ class Adaptor(a_base.Base):
                             raise rse.NoSuccess("No entry to operate on: %s[%s]"
                                     % (key,val)) from e
 
-                # replace the ep info dist with the new one, to clean out old
-                # entries.
-                # TODO: merge and not replace(?)
-                #
-                self.shells[session._id]['endpoints'] = endpoints
+                        # remember when the activation expires
+                        if key == 'Credential Time Left':
+                            left = go_time_left(val)
+                            if left is not None:
+                                endpoints[name]['_expires'] = now + left
+
+                if ep_name:
+                    # merge the single entry into the known ones (which are
+                    # otherwise still valid)
+                    known = self.shells[session._id].get('endpoints', {})
+                    known.pop(ep_name, None)
+                    known.update(endpoints)
+                    self.shells[session._id]['endpoints'] = known
+
+                else:
+                    # replace the ep info dict with the new one, to clean out
+                    # old entries.
+                    self.shells[session._id]['endpoints'] = endpoints
 
         if ep_name:
             # return the requested entry, or None
@@ -511,6 +615,8 @@ class Adaptor(a_base.Base):
 
         self._logger.info('mkparents %s' % path_ps)
 
+        self.stat_cache_invalidate(shell, tgt_ps)
+
         if path_ps.startswith('/'):
             cur_path = ''
         else:
@@ -582,6 +688,8 @@ class Adaptor(a_base.Base):
         cmd = "transfer %s -s %d -- '%s' '%s'" \
             % (cmd_flags, sync_level, source, target)
 
+        self.stat_cache_invalidate(shell, target)
+
         out, _ = self.run_go_cmd(shell, cmd)
         # 'Task ID: 8c6f989d-b6aa-11e4-adc6-22000a97197b'
         key, value = out.split(':')
@@ -593,36 +701,316 @@ class Adaptor(a_base.Base):
         cmd = "wait -q %s" % task_id
         self.run_go_cmd(shell, cmd)
 
-        # Retrieve task status
+        # Retrieve and validate task status
+        status = self.go_status(shell, task_id)
+        self.stat_cache_invalidate(shell, target)
+
+        if status == 'ACTIVE':
+            # The task is in progress.
+            raise Exception('Task active, this should not happen after wait')
+
+        if status != 'SUCCEEDED':
+            raise self.go_error(status)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def go_submit(self, shell, pairs):
+
+        # Submit a single GO task which transfers all given (source, target,
+        # flags) path specs.  `transfer` reads those pairs as batch input from
+        # stdin if none are given on the command line, so we send them over the
+        # shell, followed by EOF.  Returns the GO task ID.
+
+        self._logger.debug('Adaptor:go_submit(%d pairs)' % len(pairs))
+
+        # 0: Copy files that do not exist at the destination
+        sync_level = 0
+
+        batch   = ''
+        parents = set()
+        for source, target, flags in pairs:
+
+            if flags & api.CREATE_PARENTS:
+                parent = os.path.dirname(target)
+                if parent not in parents:
+                    self.mkparents(shell, parent)
+                    parents.add(parent)
+
+            cmd_flags = ""
+            if flags & api.RECURSIVE:
+                cmd_flags += " -r"
+
+            batch += "'%s' '%s'%s\n" % (source, target, cmd_flags)
+
+            self.stat_cache_invalidate(shell, target)
+
+        with shell.pty_shell.rlock:
+
+            shell.run_async("transfer -s %d" % sync_level)
+            shell.send(batch)
+            shell.send('\x04')
+            _, out = shell.find_prompt()
+
+        # 'Task ID: 8c6f989d-b6aa-11e4-adc6-22000a97197b'
+        match = re.search(r'^Task ID:\s*(\S+)', out, re.MULTILINE)
+        if not match:
+            raise rse.NoSuccess("Expected Task ID: <id>, got %s" % out)
+
+        return match.group(1)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def go_status(self, shell, task_id):
+
         cmd = "status -f status %s" % task_id
         out, _ = self.run_go_cmd(shell, cmd)
         # Status: SUCCEEDED
         key, value = out.split(':')
         if key != 'Status':
             raise Exception("Expected Status: <status>, got %s" % out)
-        status = value.strip()
 
-        # Validate task status
-        if status == 'SUCCEEDED':
-            # The task completed successfully.
-            return
+        return value.strip()
 
-        elif status == 'ACTIVE':
-            # The task is in progress.
-            raise Exception('Task active, this should not happen after wait')
 
-        elif status == 'INACTIVE':
+    # --------------------------------------------------------------------------
+    #
+    def go_error(self, status):
+
+        if status == 'INACTIVE':
             # The task has been suspended and will not continue without
             # intervention.  Currently, only credential expiration will cause
             # this state.
-            raise Exception('Task inactive, probably credentials have expired')
+            return rse.NoSuccess('Task inactive, probably credentials have '
+                                 'expired')
 
         elif status == 'FAILED':
             # The task or one of its subtasks failed, expired, or was canceled.
-            raise Exception('Task failed')
+            return rse.NoSuccess('Task failed')
 
         else:
-            raise Exception('Unknown status: %s' % status)
+            return rse.NoSuccess('Unknown status: %s' % status)
+
+
+    # --------------------------------------------------------------------------
+    #
+    # bulk operations: copy tasks run in a task container are submitted as
+    # a single GO task per session and endpoint pair.  GO runs those tasks
+    # asynchronously -- the saga task states are updated whenever the container
+    # waits for or inspects the tasks.
+    #
+    def container_copy_self(self, tasks):
+
+        self._container_copy(tasks, ['tgt_in', 'flags'])
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_copy(self, tasks):
+
+        self._container_copy(tasks, ['src_in', 'tgt_in', 'flags'])
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _container_copy(self, tasks, names):
+
+        batches = dict()
+        for task in tasks:
+
+            # the task is completed by the container, not by its own future
+            task._future = None
+
+            ctx    = task._method_context
+            kwargs = dict(zip(names, ctx.get('_args', list())))
+            kwargs.update(ctx.get('_kwargs', dict()))
+
+            try:
+                cpi    = task._adaptor
+                src_ps = cpi.get_path_spec(url=kwargs.get('src_in'))
+                tgt_ps = cpi.get_path_spec(url=kwargs.get('tgt_in'))
+                flags  = kwargs.get('flags') or 0
+
+            except Exception as e:
+                self._fail_tasks([task], e)
+                continue
+
+            key = (cpi.session._id,
+                   src_ps.split('/', 1)[0], tgt_ps.split('/', 1)[0])
+
+            if key not in batches:
+                batches[key] = {'shell': cpi.shell, 'pairs': list(),
+                                'tasks': list()}
+
+            batches[key]['pairs'].append((src_ps, tgt_ps, flags))
+            batches[key]['tasks'].append(task)
+
+        for batch in batches.values():
+
+            try:
+                task_id = self.go_submit(batch['shell'], batch['pairs'])
+
+            except Exception as e:
+                self._fail_tasks(batch['tasks'], e)
+                continue
+
+            with self.batch_lock:
+                self.batches[task_id] = batch
+                for task in batch['tasks']:
+                    self.batch_tasks[id(task)] = task_id
+                    task._set_state(rsc.RUNNING)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _fail_tasks(self, tasks, e):
+
+        if not isinstance(e, rse.SagaException):
+            e = rse.NoSuccess(str(e))
+
+        for task in tasks:
+            task._set_exception(e)
+            task._set_state(rsc.FAILED)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _poll_batches(self, tasks):
+
+        # check the GO task status of all unfinished batches for the given
+        # tasks, and finalize the saga tasks of completed batches
+
+        with self.batch_lock:
+            task_ids = set([self.batch_tasks[id(task)] for task in tasks
+                                              if id(task) in self.batch_tasks])
+
+        for task_id in task_ids:
+
+            with self.batch_lock:
+                batch = self.batches.get(task_id)
+
+            if not batch:
+                continue
+
+            try:
+                status = self.go_status(batch['shell'], task_id)
+
+            except Exception as e:
+                self._fail_tasks(batch['tasks'], e)
+                self._drop_batch(task_id)
+                continue
+
+            if status not in GO_FINAL:
+                continue
+
+            for _, target, _ in batch['pairs']:
+                self.stat_cache_invalidate(batch['shell'], target)
+
+            if status == 'SUCCEEDED':
+                for task in batch['tasks']:
+                    task._set_result(None)
+            else:
+                self._fail_tasks(batch['tasks'], self.go_error(status))
+
+            self._drop_batch(task_id)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _drop_batch(self, task_id):
+
+        with self.batch_lock:
+            batch = self.batches.pop(task_id, None)
+            if batch:
+                for task in batch['tasks']:
+                    self.batch_tasks.pop(id(task), None)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_wait(self, tasks, mode, timeout):
+
+        # tasks which are not part of a batch are waited for individually
+        with self.batch_lock:
+            others = [task for task in tasks
+                           if id(task) not in self.batch_tasks
+                           and task._future]
+
+        for task in others:
+            if task.get_state() not in rsc.FINAL:
+                task.wait(timeout)
+
+        start = time.time()
+        while True:
+
+            states = self.container_get_states(tasks)
+            final  = [state in rsc.FINAL for state in states]
+
+            if all(final) or (mode == rsc.ANY and any(final)):
+                return
+
+            if timeout >= 0 and time.time() - start >= timeout:
+                return
+
+            time.sleep(self.batch_poll)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_cancel(self, tasks, timeout):
+
+        with self.batch_lock:
+            task_ids = set([self.batch_tasks[id(task)] for task in tasks
+                                              if id(task) in self.batch_tasks])
+            others   = [task for task in tasks
+                             if id(task) not in self.batch_tasks]
+
+        # canceling a batch cancels all saga tasks in it
+        for task_id in task_ids:
+
+            with self.batch_lock:
+                batch = self.batches.get(task_id)
+
+            if batch:
+                self.run_go_cmd(batch['shell'], "cancel %s" % task_id)
+                for task in batch['tasks']:
+                    task._set_state(rsc.CANCELED)
+                self._drop_batch(task_id)
+
+        for task in others:
+            if task.get_state() not in rsc.FINAL:
+                task.cancel()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_get_states(self, tasks):
+
+        self._poll_batches(tasks)
+
+        # batched tasks are up to date now -- don't poll them again one by one
+        return [task.get_state() if task._future else go_task_state(task)
+                for task in tasks]
+
+
+    # --------------------------------------------------------------------------
+    #
+    # batched tasks have no future of their own, and are completed via the
+    # adaptor when waited for or inspected individually
+    #
+    def task_wait(self, task, timeout):
+
+        self.container_wait([task], rsc.ALL, timeout)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def task_get_state(self, task):
+
+        self._poll_batches([task])
+
+        return go_task_state(task)
 
 
     # --------------------------------------------------------------------------
@@ -631,20 +1019,107 @@ class Adaptor(a_base.Base):
     # Will raise DoesNotExist for non-existing entries.
     def stat(self, shell, ps):
 
-        # TODO: stat() would probably benefit from some caching
+        info = self.stat_cache_get(shell, ps)
+        if info:
+            return info
 
         out, err = self.run_go_cmd(shell, "ls -la '%s'" % ps, mode='raise')
 
-        mode = out.split('\n')[0].split()[0][0]
-        if   mode == '-': mode = 'file'
-        elif mode == 'd': mode = 'dir'
-        elif mode == 'l': mode = 'link'
-        else: raise rse.NoSuccess("stat unknown mode: '%s' (%s)" % (mode, out))
+        _, info = go_parse_ls(out.split('\n')[0])
+        self.stat_cache_set(shell, ps, info)
+
+        return info
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _stat_cache_shell(self, shell):
+
+        # stat info is cached per session, i.e. per GO shell
+        for entry in self.shells.values():
+            if entry.get('shell') is shell:
+                return entry.setdefault('stats', dict())
+
+        return dict()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_get(self, shell, ps):
+        """
+        return the cached stat info for the given path spec, or `None` if no
+        (valid) info is cached.
+        """
+
+        if not self.stat_ttl:
+            return None
+
+        ps = os.path.normpath(ps)
+
+        with self.cache_lock:
+
+            cache = self._stat_cache_shell(shell)
+            entry = cache.get(ps)
+
+            if not entry:
+                return None
+
+            if time.time() - entry[0] > self.stat_ttl:
+                del cache[ps]
+                return None
+
+            return entry[1]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_set(self, shell, ps, info):
+        """
+        cache the given stat info for the given path spec
+        """
+
+        if not self.stat_ttl:
+            return
+
+        with self.cache_lock:
+
+            now   = time.time()
+            cache = self._stat_cache_shell(shell)
+            cache[os.path.normpath(ps)] = [now, info]
+
+            # purge expired entries once in a while
+            if len(cache) > 1024:
+                for key in [k for k, v in cache.items()
+                                   if now - v[0] > self.stat_ttl]:
+                    del cache[key]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_invalidate(self, shell, ps):
+        """
+        Drop cached stat info for the given path spec, for all its parent
+        directories, and for everything below it.
+        """
+
+        if not self.stat_ttl:
+            return
+
+        ps = os.path.normpath(ps)
+
+        with self.cache_lock:
 
-        size = int(out.split('\n')[0].split()[3])
+            cache = self._stat_cache_shell(shell)
+            cache.pop(ps, None)
 
-        return {'mode': mode,
-                'size': size }
+            parent = ps
+            while parent not in ['/', '.', '']:
+                parent = os.path.dirname(parent)
+                cache.pop(parent, None)
+
+            prefix = ps.rstrip('/') + '/'
+            for key in [k for k in cache if k.startswith(prefix)]:
+                del cache[key]
 
 
 ################################################################################
@@ -659,6 +1134,23 @@ class GODirectory(cpi.Directory):
         _cpi_base = super(GODirectory, self)
         _cpi_base.__init__(api, adaptor)
 
+        # bulk copies are handled by the adaptor instance
+        self._set_container(adaptor)
+
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def task_wait(self, task, timeout):
+
+        self._adaptor.task_wait(task, timeout)
+
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def task_get_state(self, task):
+
+        return self._adaptor.task_get_state(task)
+
     # --------------------------------------------------------------------------
     #
     def _is_valid(self):
@@ -711,6 +1203,7 @@ class GODirectory(cpi.Directory):
         elif self.flags & api.CREATE:
             # TODO: check for errors?
             self._adaptor.run_go_cmd(self.shell, "mkdir '%s'" % ps)
+            self._adaptor.stat_cache_invalidate(self.shell, ps)
 
         else:
             stat = self._adaptor.stat(self.shell, ps)
@@ -830,13 +1323,22 @@ class GODirectory(cpi.Directory):
 
         npat_ps  = self.get_path_spec(url=npat)
         # TODO: catch errors?
-        out, err = self._adaptor.run_go_cmd(self.shell, "ls '%s'" % (npat_ps))
+        out, err = self._adaptor.run_go_cmd(self.shell,
+                                            "ls -l '%s'" % (npat_ps))
         lines = [_f for _f in out.split("\n") if _f]
         self._logger.debug(lines)
 
         self.entries = []
         for line in lines:
-            self.entries.append(Url(line.strip()))
+
+            name, info = go_parse_ls(line)
+            self.entries.append(Url(name))
+
+            # the long listing gives us the stat info for all entries of this
+            # directory for free
+            if not npat:
+                ps = '%s/%s' % (npat_ps.rstrip('/'), name.rstrip('/'))
+                self._adaptor.stat_cache_set(self.shell, ps, info)
 
         return self.entries
 
@@ -893,6 +1395,9 @@ class GODirectory(cpi.Directory):
 
         if src_ep_str == tgt_ep_str:
 
+            self._adaptor.stat_cache_invalidate(self.shell, src_ps)
+            self._adaptor.stat_cache_invalidate(self.shell, tgt_ps)
+
             try:
                 self._adaptor.run_go_cmd(self.shell, "rename '%s' '%s'"
                                         % (src_ps, tgt_ps))
@@ -935,6 +1440,8 @@ class GODirectory(cpi.Directory):
         # if the trailing '/' is specified -- otherwise the op *silently fails*!
         # Oh well, since we don't really (want to) know if the target is a dir
         # or not, we remove both versions... :/
+        self._adaptor.stat_cache_invalidate(self.shell, tgt_ps)
+
         cmd      = "rm %s -f '%s/'" % (cmd_flags, tgt_ps)
         out, err = self._adaptor.run_go_cmd(self.shell, cmd)
 
@@ -959,6 +1466,7 @@ class GODirectory(cpi.Directory):
         else:
             cmd = "mkdir '%s'" % tgt_ps
             self._adaptor.run_go_cmd(self.shell, cmd)
+            self._adaptor.stat_cache_invalidate(self.shell, tgt_ps)
 
 
     # --------------------------------------------------------------------------
@@ -1088,6 +1596,23 @@ class GOFile(cpi.File):
         _cpi_base = super(GOFile, self)
         _cpi_base.__init__(api, adaptor)
 
+        # bulk copies are handled by the adaptor instance
+        self._set_container(adaptor)
+
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def task_wait(self, task, timeout):
+
+        self._adaptor.task_wait(task, timeout)
+
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def task_get_state(self, task):
+
+        return self._adaptor.task_get_state(task)
+
     # --------------------------------------------------------------------------
     #
     def _is_valid(self):
@@ -1226,6 +1751,9 @@ class GOFile(cpi.File):
 
         if src_ep_str == tgt_ep_str:
 
+            self._adaptor.stat_cache_invalidate(self.shell, src_ps)
+            self._adaptor.stat_cache_invalidate(self.shell, tgt_ps)
+
             try:
                 self._adaptor.run_go_cmd(self.shell, "rename '%s' '%s'"
                                         % (src_ps, tgt_ps))
@@ -1255,6 +1783,8 @@ class GOFile(cpi.File):
         cmd      = "rm %s -f '%s'"  % (cmd_flags, tgt_ps)
         out, err = self._adaptor.run_go_cmd(self.shell, cmd, mode='ignore')
 
+        self._adaptor.stat_cache_invalidate(self.shell, tgt_ps)
+
     # --------------------------------------------------------------------------
     #
     @SYNC_CALL
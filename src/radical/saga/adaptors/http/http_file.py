@@ -8,12 +8,19 @@ __license__   = "MIT"
 """
 
 import os
-import urllib.request, urllib.parse, urllib.error
+import re
+import base64
+import contextlib
+import http.client
+import urllib.parse
+import threading          as mt
+import concurrent.futures as cf
 
 import radical.utils as ru
 
 from ...exceptions           import *
 from ...                     import url        as rsurl
+from ...                     import constants  as rsc
 from ...utils                import pty_shell  as rsups
 from ...utils                import misc       as rsumisc
 from ...                     import filesystem as api_fs
@@ -48,7 +55,13 @@ _ADAPTOR_DOC           = {
     "name"             : _ADAPTOR_NAME,
     "cfg_options"      : _ADAPTOR_OPTIONS,
     "capabilities"     : _ADAPTOR_CAPABILITIES,
-    "description"      : """The HTTP file adpator allows file transfer (copy) from remote resources to the local machine via the HTTP/HTTPS protocol, similar to cURL.""",
+    "description"      : """The HTTP file adpator allows file transfer (copy) from remote resources to the local machine via the HTTP/HTTPS protocol, similar to cURL.
+
+    Connections are kept alive and are reused for all transfers from the same
+    host.  Files are downloaded in chunks via range requests -- large files
+    are fetched with several concurrent requests, and interrupted downloads
+    are resumed.  Asynchronous copy tasks in a task container are downloaded
+    concurrently.""",
     "example"          : "examples/files/http_file_copy.py",
     "schemas"          : {"http"   :"use the http protocol to access a remote file",
                           "https"  :"use the https protocol to access a remote file"}
@@ -73,6 +86,87 @@ _ADAPTOR_INFO = {
     ]
 }
 
+# responses which are followed to a new location
+_REDIRECTS     = [301, 302, 303, 307, 308]
+_MAX_REDIRECTS = 5
+
+# errors on reused keep-alive connections which the server may have closed
+_STALE_ERRORS  = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                  ConnectionResetError, BrokenPipeError)
+
+# 'Content-Range: bytes 0-1023/4096'
+_CONTENT_RANGE = re.compile(r'^bytes\s+(\d+)-(\d+)/(\d+|\*)$')
+
+# read response bodies in blocks of that size
+_BLOCKSIZE     = 1024 * 1024
+
+
+###############################################################################
+#
+class _ConnectionPool(object):
+    """
+    Idle keep-alive connections per (scheme, host, port).  A connection is
+    checked out for one request/response cycle, and is returned afterwards if
+    the response was read completely.
+    """
+
+    # ----------------------------------------------------------------
+    #
+    def __init__(self, size, timeout):
+
+        self._size    = size
+        self._timeout = timeout
+        self._lock    = mt.Lock()
+        self._idle    = dict()
+
+    # ----------------------------------------------------------------
+    #
+    def connect(self, parts):
+
+        if parts.scheme == 'https':
+            return http.client.HTTPSConnection(parts.hostname, parts.port,
+                                               timeout=self._timeout)
+        else:
+            return http.client.HTTPConnection(parts.hostname, parts.port,
+                                              timeout=self._timeout)
+
+    # ----------------------------------------------------------------
+    #
+    def get(self, parts):
+        """
+        Returns a tuple `(key, connection, reused)` for the given url parts.
+        """
+
+        key = (parts.scheme, parts.hostname, parts.port)
+
+        with self._lock:
+            if self._idle.get(key):
+                return key, self._idle[key].pop(), True
+
+        return key, self.connect(parts), False
+
+    # ----------------------------------------------------------------
+    #
+    def put(self, key, conn):
+
+        with self._lock:
+            idle = self._idle.setdefault(key, list())
+            if len(idle) < self._size:
+                idle.append(conn)
+                return
+
+        conn.close()
+
+    # ----------------------------------------------------------------
+    #
+    def close(self):
+
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle = dict()
+
 
 ###############################################################################
 # The adaptor class
@@ -81,6 +175,9 @@ class Adaptor (a_base.Base):
     This is the actual adaptor class, which gets loaded by SAGA (i.e. by the
     SAGA engine), and which registers the CPI implementation classes which
     provide the adaptor's functionality.
+
+    The adaptor instance also holds the connection pool shared by all file
+    instances, and acts as their task container.
     """
 
     # ----------------------------------------------------------------
@@ -89,11 +186,358 @@ class Adaptor (a_base.Base):
 
         a_base.Base.__init__(self, _ADAPTOR_INFO, _ADAPTOR_OPTIONS)
 
+        self._chunk_size    = int(self._cfg.get('chunk_size',    8388608))
+        self._chunk_workers = int(self._cfg.get('chunk_workers', 4))
+        self._bulk_workers  = int(self._cfg.get('bulk_workers',  16))
+
+        self._pool = _ConnectionPool(int  (self._cfg.get('pool_size', 16)),
+                                     float(self._cfg.get('timeout',   60.0)))
+
     # ----------------------------------------------------------------
     #
     def sanity_check(self):
         pass
 
+    # ----------------------------------------------------------------
+    #
+    @contextlib.contextmanager
+    def request(self, url, headers=None):
+        """
+        Send a GET request over a pooled connection, following redirects, and
+        yield the response.  The connection is returned to the pool if the
+        response body was read completely.
+        """
+
+        url     = str(url)
+        headers = dict(headers or dict())
+
+        for _ in range(_MAX_REDIRECTS + 1):
+
+            parts = urllib.parse.urlsplit(url)
+            path  = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+
+            hdrs = dict(headers)
+            if parts.username:
+                auth = '%s:%s' % (urllib.parse.unquote(parts.username),
+                                  urllib.parse.unquote(parts.password or ''))
+                hdrs['Authorization'] = 'Basic %s' \
+                                      % base64.b64encode(auth.encode()).decode()
+
+            key, conn, reused = self._pool.get(parts)
+            try:
+                try:
+                    conn.request('GET', path, headers=hdrs)
+                    resp = conn.getresponse()
+
+                except _STALE_ERRORS:
+                    if not reused:
+                        raise
+                    # the server closed the idle connection -- use a new one
+                    conn.close()
+                    conn = self._pool.connect(parts)
+                    conn.request('GET', path, headers=hdrs)
+                    resp = conn.getresponse()
+
+            except Exception:
+                conn.close()
+                raise
+
+            if resp.status in _REDIRECTS and resp.getheader('Location'):
+                resp.read()
+                self._release(key, conn, resp)
+                url = urllib.parse.urljoin(url, resp.getheader('Location'))
+                continue
+
+            try:
+                yield resp
+            finally:
+                self._release(key, conn, resp)
+            return
+
+        raise NoSuccess("too many redirects for %s" % url)
+
+    # ----------------------------------------------------------------
+    #
+    def _release(self, key, conn, resp):
+
+        if resp.isclosed() and not resp.will_close:
+            self._pool.put(key, conn)
+        else:
+            conn.close()
+
+    # ----------------------------------------------------------------
+    #
+    def download(self, src, target):
+        """
+        Download `src` into the local file `target`.
+
+        The first request asks for the first chunk only: small files are thus
+        fetched with a single request, and for larger files the reply tells
+        the total size.  The remaining chunks are then fetched concurrently.
+        Data go into a part file next to the target, and the completed chunks
+        are recorded in a state file next to it.  If the download fails, the
+        next attempt only fetches the missing chunks -- as long as the server
+        confirms (via `If-Range`) that the file did not change meanwhile.
+        """
+
+        part = target + '.rs_part'
+        fd   = os.open(part, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            self._download_into(src, fd, part)
+
+        except Exception:
+            # keep the part file only if the download can be resumed
+            os.close(fd)
+            if not os.path.exists(part + '.state'):
+                os.unlink(part)
+            raise
+
+        os.close(fd)
+        _drop_state(part)
+        os.rename(part, target)
+
+    # ----------------------------------------------------------------
+    #
+    def _download_into(self, src, fd, part):
+
+        state   = _load_state(part, self._chunk_size)
+        headers = {'Range': 'bytes=0-%d' % (self._chunk_size - 1)}
+        if state:
+            headers['If-Range'] = state['validator']
+
+        with self.request(src, headers) as resp:
+
+            if resp.status == 200:
+                # no range support, or the file changed: full download
+                _drop_state(part)
+                os.ftruncate(fd, 0)
+                _read_into(fd, resp, 0)
+                return
+
+            if resp.status == 416:
+                # empty file
+                resp.read()
+                _drop_state(part)
+                os.ftruncate(fd, 0)
+                return
+
+            if resp.status == 404:
+                resp.read()
+                raise DoesNotExist("%s does not exist" % src)
+
+            if resp.status != 206:
+                resp.read()
+                raise NoSuccess("GET %s failed: %s %s"
+                               % (src, resp.status, resp.reason))
+
+            total, validator = _parse_range_reply(resp)
+            if not state or state['size'] != total:
+                os.ftruncate(fd, 0)
+                state = {'size'      : total,
+                         'validator' : validator,
+                         'done'      : set()}
+
+                # single chunk files are not worth resuming
+                if total > self._chunk_size:
+                    _save_state(part, self._chunk_size, state)
+
+            _read_into(fd, resp, 0)
+            _add_state(part, state, 0)
+
+        self._download_chunks(src, fd, part, state)
+
+
+    # ----------------------------------------------------------------
+    #
+    def _download_chunks(self, src, fd, part, state):
+
+        cs      = self._chunk_size
+        n       = (state['size'] + cs - 1) // cs
+        missing = [i for i in range(n) if i not in state['done']]
+
+        if not missing:
+            return
+
+        def _fetch(idx):
+
+            start   = idx * cs
+            end     = min(start + cs, state['size']) - 1
+            headers = {'Range'   : 'bytes=%d-%d' % (start, end)}
+            if state['validator']:
+                headers['If-Range'] = state['validator']
+
+            with self.request(src, headers) as resp:
+
+                if resp.status != 206:
+                    resp.read()
+                    raise NoSuccess("GET %s (range %d-%d) failed: %s %s"
+                                   % (src, start, end, resp.status,
+                                      resp.reason))
+
+                if _read_into(fd, resp, start) != end - start + 1:
+                    raise NoSuccess("GET %s (range %d-%d) incomplete"
+                                   % (src, start, end))
+
+            _add_state(part, state, idx)
+
+        workers = max(1, min(self._chunk_workers, len(missing)))
+        with cf.ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(_fetch, idx) for idx in missing]:
+                future.result()
+
+    # ----------------------------------------------------------------
+    #
+    def container_copy_self(self, tasks):
+        """
+        Run the copy operations of all given tasks concurrently, with at most
+        `bulk_workers` downloads in flight.
+        """
+
+        def _copy(task):
+
+            args   = list(task._method_context.get('_args',   list()))
+            kwargs = task._method_context.get('_kwargs', dict())
+
+            tgt   = args[0] if len(args) > 0 else kwargs.get('tgt_in')
+            flags = args[1] if len(args) > 1 else kwargs.get('flags', 0)
+
+            task._set_state(rsc.RUNNING)
+
+            # the task is completed here, not by its own future
+            task._future = None
+
+            try:
+                task._set_result(task._adaptor.copy_self(tgt, flags))
+            except Exception as e:
+                task._set_exception(e)
+                task._set_state(rsc.FAILED)
+
+        workers = max(1, min(self._bulk_workers, len(tasks)))
+        with cf.ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_copy, tasks))
+
+    # ----------------------------------------------------------------
+    #
+    def container_wait(self, tasks, mode, timeout):
+
+        # FIXME: we ignore the wait mode(ALL/ANY), and always wait for all
+        #        tasks...
+        for task in tasks:
+            if task.get_state() not in rsc.FINAL:
+                task.wait(timeout)
+
+    # ----------------------------------------------------------------
+    #
+    def container_cancel(self, tasks, timeout):
+
+        for task in tasks:
+            if task.get_state() not in rsc.FINAL:
+                task.cancel()
+
+    # ----------------------------------------------------------------
+    #
+    def container_get_states(self, tasks):
+
+        return [task.get_state() for task in tasks]
+
+
+# --------------------------------------------------------------------
+#
+def _read_into(fd, resp, offset):
+    """
+    Write the response body into the file at the given offset, and return the
+    number of bytes written.
+    """
+
+    n = 0
+    while True:
+        data = resp.read(_BLOCKSIZE)
+        if not data:
+            break
+        os.pwrite(fd, data, offset + n)
+        n += len(data)
+
+    return n
+
+
+# --------------------------------------------------------------------
+#
+def _parse_range_reply(resp):
+    """
+    Return total size and validator (ETag or Last-Modified) of a 206 reply.
+    """
+
+    match = _CONTENT_RANGE.match(resp.getheader('Content-Range', '').strip())
+    if not match or match.group(3) == '*':
+        raise NoSuccess("invalid range reply: %s"
+                       % resp.getheader('Content-Range'))
+
+    validator = resp.getheader('ETag') or resp.getheader('Last-Modified')
+
+    # weak etags cannot be used for If-Range
+    if validator and validator.startswith('W/'):
+        validator = None
+
+    return int(match.group(3)), validator
+
+
+# --------------------------------------------------------------------
+#
+# The state file of a part file has a header line `<size> <chunk_size>
+# <validator>`, followed by the indexes of completed chunks, one per line.
+#
+def _load_state(part, chunk_size):
+
+    try:
+        with open(part + '.state', 'r') as fin:
+            lines = fin.read().split('\n')
+    except IOError:
+        return None
+
+    try:
+        size, cs, validator = lines[0].split(' ', 2)
+        if not validator or int(cs) != chunk_size:
+            return None
+        if not os.path.exists(part):
+            return None
+
+        return {'size'      : int(size),
+                'validator' : validator,
+                'done'      : set([int(x) for x in lines[1:] if x.strip()])}
+
+    except ValueError:
+        return None
+
+
+def _save_state(part, chunk_size, state):
+
+    # downloads without validator cannot be resumed safely
+    if not state['validator']:
+        _drop_state(part)
+        return
+
+    with open(part + '.state', 'w') as fout:
+        fout.write('%d %d %s\n' % (state['size'], chunk_size,
+                                   state['validator']))
+
+
+def _add_state(part, state, idx):
+
+    state['done'].add(idx)
+
+    if os.path.exists(part + '.state'):
+        with open(part + '.state', 'a') as fout:
+            fout.write('%d\n' % idx)
+
+
+def _drop_state(part):
+
+    if os.path.exists(part + '.state'):
+        os.unlink(part + '.state')
+
 
 ###############################################################################
 #
@@ -107,6 +551,9 @@ class HTTPFile (cpi_fs.File):
         self._cpi_base = super(HTTPFile, self)
         self._cpi_base.__init__(api, adaptor)
 
+        # bulk copies are handled by the adaptor instance
+        self._set_container(adaptor)
+
     # ----------------------------------------------------------------
     #
     def __del__(self):
@@ -195,10 +642,10 @@ class HTTPFile (cpi_fs.File):
         #if rsumisc.url_is_relative (src) : src = rsumisc.url_make_absolute (cwdurl, src)
         #if rsumisc.url_is_relative (tgt) : tgt = rsumisc.url_make_absolute (cwdurl, tgt)
 
-        target = ""
-
         src_filename = os.path.basename(src.path)
         local_path = tgt.path
+        target = local_path
+
         if os.path.exists(tgt.path):
             if os.path.isfile(tgt.path):
                 # fail if overwtrite flag is not set, otherwise copy
@@ -216,9 +663,11 @@ class HTTPFile (cpi_fs.File):
                         raise BadParameter("Local file '%s' exists." % target)
 
         try:
-            urllib.request.urlretrieve(str(src), target)
+            self._adaptor.download(str(src), target)
+        except SagaException:
+            raise
         except Exception as e:
-            raise BadParameter("Couldn't copy %s to %s: %s" %
+            raise NoSuccess("Couldn't copy %s to %s: %s" %
                                     (str(src), target, str(e))) from e
 
     # ----------------------------------------------------------------
@@ -244,3 +693,4 @@ class HTTPFile (cpi_fs.File):
     @SYNC_CALL
     def is_file_self(self):
         return True
+
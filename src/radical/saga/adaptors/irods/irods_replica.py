@@ -24,11 +24,20 @@ __copyright__ = "Copyright 2012-2013, Ashley Zebrowski"
 __license__   = "MIT"
 
 import os
+import time
+import queue
 import shutil
-import string
+import threading
+import urllib.parse
 
 import radical.saga as rs
 
+# make sure the submodules used below are loaded
+import radical.saga.adaptors.base
+import radical.saga.adaptors.cpi.replica
+import radical.saga.adaptors.cpi.decorators
+import radical.saga.utils.pty_shell
+
 SYNC_CALL  = rs.adaptors.cpi.decorators.SYNC_CALL
 ASYNC_CALL = rs.adaptors.cpi.decorators.ASYNC_CALL
 
@@ -171,6 +180,24 @@ class Adaptor (rs.adaptors.base.Base):
                                           _ADAPTOR_INFO,
                                           _ADAPTOR_OPTIONS)
 
+        # the icommands run on this host
+        self.pty_url = rs.url.Url (self._cfg.get ('pty_url', 'ssh://localhost'))
+
+        # replications run concurrently over a pool of that many shells, and
+        # iput / iget use that many I/O threads per transfer (`0` leaves that
+        # to iRODS)
+        self.concurrency = int (self._cfg.get ('concurrency', 4))
+        self.threads     = int (self._cfg.get ('transfer_threads', 0))
+        self.shells      = dict ()
+
+        # replica catalog cache: logical file entries by logical path, and the
+        # time of the last bulk listing by logical directory.  See
+        # `irods_get_entry()` -- a TTL of `0` disables the cache.
+        self.loc_ttl     = float (self._cfg.get ('location_cache_ttl', 60.0))
+        self.loc_cache   = dict ()
+        self.loc_dirs    = dict ()
+        self.loc_sweep   = time.time () + self.loc_ttl
+
 
     def sanity_check (self) :
         try:
@@ -180,7 +207,7 @@ class Adaptor (rs.adaptors.base.Base):
 
             # open a temporary shell
             self.shell = rs.utils.pty_shell.PTYShell(
-                             rs.url.Url("ssh://localhost"), logger=self._logger)
+                             self.pty_url, logger=self._logger)
 
             # run ils, see if we get any errors -- if so, fail the
             # sanity check
@@ -213,78 +240,415 @@ class Adaptor (rs.adaptors.base.Base):
            commands with
         '''
 
-        result = []
         try:
-            cw = wrapper
+            return list (self.irods_iter_listing (irods_dir, wrapper))
 
-            # execute the ils -L command
-            ret, out, _ = cw.run_sync ("ils -L %s" % irods_dir)
+        except Exception as e:
+            raise rs.NoSuccess ("Couldn't get directory listing: %s " % e) \
+                  from e
 
-            # make sure we ran ok
-            if ret != 0:
-                raise rs.NoSuccess("Could not open directory %s [%s]: %s"
-                                  % (irods_dir, str(ret), out))
-
-            # strip extra linebreaks from stdout, make a list from the
-            # linebreaks that remain, skip first entry which just tells us the
-            # current directory
-            for item in out.strip().split("\n"):
-
-                # if we are listing a directory or remote resource file
-                # location i.e.
-                #
-                # [azebro1@gw68]$ ils -L /osg/home/azebro1
-                # /osg/home/azebro1:
-                #    azebro1           1 UFlorida-SSERCA_FTP            12 2012-11-14.09:55 & irods-test.txt
-                #          /data/cache/UFlorida-SSERCA_FTPplaceholder/home/azebro1/irods-test.txt    osgGridFtpGroup
-                #
-                # then we want to ignore that entry (not using it for now)
-                if item.strip().startswith("/"):
-                    continue
-
-                # remove whitespace
-                item = item.strip()
 
-                # entry for file or directory
-                dir_entry = irods_logical_entry()
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_iter_listing (self, irods_dir, wrapper, recursive=False) :
+        '''Generator over the irods_logical_entry instances for the files
+           and directories in the given iRODS logical directory.  The output of
+           a single `ils -L` (or `ils -lr` for recursive listings) is parsed
+           line by line: the replicas of a file are listed consecutively, and
+           are merged into a single entry with multiple locations.  Entry
+           names are relative to `irods_dir`.
+           :param irods_dir: iRODS directory we want to get a listing of
+           :param wrapper: the shell we will run our iRODS commands in
+           :param recursive: also list all sub directories
+        '''
 
-                # if we have a directory here
-                if item.startswith("C- "):
-                    dir_entry.name = item[3:]
-                    dir_entry.is_directory = True
+        if recursive: cmd = "ils -lr %s" % irods_dir
+        else        : cmd = "ils -L %s"  % irods_dir
 
-                # if we have a file here
-                else:
-                    # ils -L output looks like this after you split it:
-                    #  0           1    2                      3     4                   5    6
-                    # ['azebro1', '1', 'UFlorida-SSERCA_FTP', '12', '2012-11-14.09:55', '&', 'irods-test.txt']
-                    # not sure what 1 and 5 are ...
-                    dir_entry.owner = item.split()[0]
-                    dir_entry.locations = [item.split()[2]]
-                    dir_entry.size = item.split()[3]
-                    dir_entry.date = item.split()[4]
-                    dir_entry.name = item.split()[6]
-
-                result.append(dir_entry)
-
-            # merge all entries on the list with duplicate filenames into a
-            # single entry with one filename and multiple resource locations
-            final_list = []
-            for item in result:
-                if item.name in [i.name for i in final_list]:
-                    # duplicate name, merge this entry with the previous one
-                    for final_list_item in final_list:
-                        if final_list_item.name == item.name:
-                            final_list_item.locations.append(item.locations[0])
-                else:
-                    final_list.append(item)
-            return final_list
+        ret, out, _ = wrapper.run_sync (cmd)
 
-        except Exception as e:
-            raise rs.NoSuccess ("Couldn't get directory listing: %s %s " % e) \
-                  from e
+        # make sure we ran ok
+        if ret != 0:
+            raise rs.NoSuccess("Could not open directory %s [%s]: %s"
+                              % (irods_dir, str(ret), out))
 
-        return result
+        base    = irods_dir.rstrip ('/')
+        coll    = base
+        current = None
+
+        for item in out.split ("\n"):
+
+            item = item.strip ()
+
+            if not item:
+                continue
+
+            # collection headers look like
+            #
+            #   /osg/home/azebro1/subdir:
+            #
+            # and entries are relative to them.  Other lines starting with '/'
+            # are physical replica locations (ils -L), which we ignore:
+            #
+            #   /data/cache/UFlorida-SSERCA_FTPplaceholder/home/azebro1/irods-test.txt    osgGridFtpGroup
+            if item.startswith ("/"):
+                if item.endswith (":"):
+                    coll = item[:-1].rstrip ('/')
+                continue
+
+            if coll == base or not coll.startswith (base + '/'):
+                prefix = ''
+            else:
+                prefix = coll[len (base) + 1:] + '/'
+
+            # directories: 'C- /osg/home/azebro1/subdir'
+            if item.startswith ("C- "):
+
+                if current:
+                    yield current
+                    current = None
+
+                dir_entry = irods_logical_entry ()
+                dir_entry.name = prefix \
+                               + os.path.basename (item[3:].rstrip ('/'))
+                dir_entry.is_directory = True
+
+                yield dir_entry
+                continue
+
+            # ils -l output for a replica looks like this after you split it:
+            #  0           1    2                      3     4                   5
+            # ['azebro1', '1', 'UFlorida-SSERCA_FTP', '12', '2012-11-14.09:55', '& irods-test.txt']
+            # where field 1 is the replica number, and '&' marks an up-to-date
+            # replica (it is missing for stale ones).
+            fields = item.split (None, 5)
+            if len (fields) < 6:
+                raise rs.NoSuccess ("Error parsing iRODS listing: %s" % item)
+
+            name = fields[5]
+            if name.startswith ("& "):
+                name = name[2:]
+            name = prefix + name.strip ()
+
+            if current and current.name == name:
+                current.locations.append (fields[2])
+                continue
+
+            if current:
+                yield current
+
+            current = irods_logical_entry ()
+            current.owner     = fields[0]
+            current.locations = [fields[2]]
+            current.size      = fields[3]
+            current.date      = fields[4]
+            current.name      = name
+
+        if current:
+            yield current
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_get_entry (self, path, wrapper) :
+        '''Return the irods_logical_entry for the given logical path.  On
+           a cache miss, the complete parent directory is listed, and all its
+           entries are cached -- so that subsequent lookups of its siblings are
+           local.  Raises DoesNotExist for unknown paths.
+           :param path: logical path of the file we want to look up
+           :param wrapper: the shell we will run our iRODS commands in
+        '''
+
+        path = path.rstrip ('/')
+
+        if not self.loc_ttl :
+            listing = self.irods_get_directory_listing (path, wrapper)
+            if not listing :
+                raise rs.DoesNotExist ("no such logical file: %s" % path)
+            return listing[0]
+
+        parent = os.path.dirname (path)
+
+        for fetch in [False, True] :
+
+            if fetch :
+                try :
+                    entries = list (self.irods_iter_listing (parent, wrapper))
+                except Exception as e :
+                    raise rs.NoSuccess ("Couldn't get directory listing: %s "
+                                       % e) from e
+                self.irods_cache_listing (parent, entries)
+
+            with self._lock :
+
+                now   = time.time ()
+                entry = self.loc_cache.get (path)
+
+                if entry and now - entry[0] <= self.loc_ttl :
+                    return entry[1]
+
+                # a fresh listing of the parent does not know the path
+                listed = self.loc_dirs.get (parent)
+                if listed and now - listed <= self.loc_ttl :
+                    raise rs.DoesNotExist ("no such logical file: %s" % path)
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_cache_listing (self, irods_dir, entries, recursive=False) :
+        '''Cache the given entries of a (recursive) listing of `irods_dir`.
+        '''
+
+        if not self.loc_ttl :
+            return
+
+        base = irods_dir.rstrip ('/')
+
+        with self._lock :
+
+            now = time.time ()
+
+            # purge expired entries once per TTL period
+            if now >= self.loc_sweep :
+                for key in [k for k, v in self.loc_cache.items ()
+                                   if now - v[0] > self.loc_ttl] :
+                    del self.loc_cache[key]
+                for key in [k for k, v in self.loc_dirs.items ()
+                                   if now - v > self.loc_ttl] :
+                    del self.loc_dirs[key]
+                self.loc_sweep = now + self.loc_ttl
+
+            self.loc_dirs[base] = now
+
+            for entry in entries :
+                path = '%s/%s' % (base, entry.name)
+                self.loc_cache[path] = [now, entry]
+
+                if recursive and entry.is_directory :
+                    self.loc_dirs[path] = now
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_invalidate (self, path) :
+        '''Drop cached information on the given logical path, on everything
+           below it, and the listing state of its parent directory.
+        '''
+
+        path   = path.rstrip ('/')
+        prefix = path + '/'
+
+        with self._lock :
+
+            self.loc_cache.pop (path, None)
+            self.loc_dirs.pop  (path, None)
+            self.loc_dirs.pop  (os.path.dirname (path), None)
+
+            for key in [k for k in self.loc_cache if k.startswith (prefix)] :
+                del self.loc_cache[key]
+            for key in [k for k in self.loc_dirs  if k.startswith (prefix)] :
+                del self.loc_dirs[key]
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_pool_shell (self, n) :
+        '''Return the n'th shell from the pool for concurrent operations
+           (which is created, or replaced if dead, as needed).
+        '''
+
+        with self._lock :
+            shell = self.shells.get (n)
+
+        if not shell or not shell.alive () :
+
+            shell = rs.utils.pty_shell.PTYShell (self.pty_url,
+                                                 logger=self._logger)
+            with self._lock :
+                self.shells[n] = shell
+
+        return shell
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_run_many (self, cmds) :
+        '''Run the given icommands concurrently over up to `concurrency`
+           pooled shells, and return a list with `None` for each successful
+           command, and the respective exception otherwise.
+        '''
+
+        results = [None] * len (cmds)
+        jobs    = queue.Queue ()
+
+        for idx, cmd in enumerate (cmds) :
+            jobs.put ((idx, cmd))
+
+        # get the shells up front, so that the commands start together
+        n_shells = max (1, min (self.concurrency, len (cmds)))
+        shells   = [self.irods_pool_shell (n) for n in range (n_shells)]
+
+        def _worker (n) :
+
+            shell = shells[n]
+
+            while True :
+
+                try :
+                    idx, cmd = jobs.get_nowait ()
+                except queue.Empty :
+                    return
+
+                try :
+                    if not shell.alive () :
+                        shell = self.irods_pool_shell (n)
+
+                    self._logger.debug ("Executing: %s" % cmd)
+                    ret, out, _ = shell.run_sync (cmd)
+
+                    if ret :
+                        results[idx] = rs.NoSuccess ("%s failed [%s]: %s"
+                                                    % (cmd, str(ret), out))
+                except Exception as e :
+                    results[idx] = rs.NoSuccess ("%s failed: %s" % (cmd, e))
+
+        threads = [threading.Thread (target=_worker, args=[n])
+                   for n in range (n_shells)]
+
+        for thread in threads :
+            thread.daemon = True
+            thread.start ()
+
+        for thread in threads :
+            thread.join ()
+
+        return results
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_replicate_many (self, pairs) :
+        '''Replicate all given (logical path, resource) pairs concurrently,
+           and return a list with `None` for each successful replication, and
+           the respective exception otherwise.
+        '''
+
+        return self.irods_run_many (["irepl -R %s %s" % (resource, path)
+                                     for path, resource in pairs])
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def irods_resources (self, target) :
+        '''Return the list of target resources (or resource groups) given as
+           `?resource=a,b,c` in the target URL, or an empty list.
+        '''
+
+        if not target :
+            return []
+
+        query = rs.Url (target).get_query ()
+
+        if not query :
+            return []
+
+        resources = list ()
+        for key, val in urllib.parse.parse_qsl (query) :
+            if key == 'resource' :
+                resources += [r for r in val.split (",") if r]
+
+        return resources
+
+
+    # ----------------------------------------------------------------
+    #
+    # bulk operations: replicate tasks run in a task container are executed
+    # concurrently, over the pooled shells.
+    #
+    def container_replicate (self, tasks) :
+
+        pairs = list ()
+        owner = list ()
+        for task in tasks :
+
+            cpi    = task._adaptor
+            args   = list (task._method_context.get ('_args',   list ()))
+            kwargs = task._method_context.get ('_kwargs', dict ())
+            target = args[0] if args else kwargs.get ('name')
+
+            task._set_state (rs.RUNNING)
+
+            resources = self.irods_resources (target)
+            if not resources :
+                task._future = None
+                task._set_exception (rs.BadParameter ("no target resource "
+                                                     "in %s" % target))
+                task._set_state (rs.FAILED)
+                continue
+
+            for resource in resources :
+                pairs.append ((cpi._url.get_path (), resource))
+                owner.append (task)
+
+        results = self.irods_replicate_many (pairs)
+
+        for path, _ in pairs :
+            self.irods_invalidate (path)
+
+        # tasks are not hashable, so we key their first error by id
+        errors = dict ()
+        for task, res in zip (owner, results) :
+            if id (task) not in errors :
+                errors[id (task)] = [task, None]
+            if res and not errors[id (task)][1] :
+                errors[id (task)][1] = res
+
+        for task, error in errors.values () :
+
+            # the task is completed here, not by its own future
+            task._future = None
+
+            if error :
+                task._set_exception (error)
+                task._set_state (rs.FAILED)
+            else :
+                task._set_result (None)
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def container_wait (self, tasks, mode, timeout) :
+
+        for task in tasks :
+            if task.get_state () not in rs.constants.FINAL :
+                task.wait (timeout)
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def container_cancel (self, tasks, timeout) :
+
+        for task in tasks :
+            if task.get_state () not in rs.constants.FINAL :
+                task.cancel ()
+
+
+    # ----------------------------------------------------------------
+    #
+    #
+    def container_get_states (self, tasks) :
+
+        return [task.get_state () for task in tasks]
 
 
     # ----------------------------------------------------------------
@@ -397,11 +761,11 @@ class IRODSDirectory (rs.adaptors.cpi.replica.LogicalDirectory) :
         self.owner = None
         self.date  = None
 
-        self.shell = rs.utils.pty_shell.PTYShell (rs.url.Url("ssh://localhost"))
+        self.shell = rs.utils.pty_shell.PTYShell (adaptor.pty_url)
 
     def __del__ (self):
         self._logger.debug("Deconstructor for iRODS directory")
-        self.shell.close()
+        self.shell.finalize (kill_pty=True)
 
     # ----------------------------------------------------------------
     #
@@ -509,6 +873,7 @@ class IRODSDirectory (rs.adaptors.cpi.replica.LogicalDirectory) :
         '''This method is called upon logicaldir.remove() '''
 
         complete_path = rs.Url(path).get_path()
+        self._adaptor.irods_invalidate(complete_path)
 
         try:
             self._logger.debug("Executing: irm -r %s" % complete_path)
@@ -543,6 +908,19 @@ class IRODSDirectory (rs.adaptors.cpi.replica.LogicalDirectory) :
         complete_path = self._url.path
         result = []
 
+        # recursive listings are obtained by a single `ils -lr`, and fill the
+        # replica catalog cache on the way
+        if flags and flags & rs.namespace.RECURSIVE :
+            try:
+                entries = list(self._adaptor.irods_iter_listing
+                                       (complete_path, self.shell, True))
+            except Exception as e:
+                raise rs.NoSuccess ("Couldn't list directory: %s " % e) from e
+
+            self._adaptor.irods_cache_listing(complete_path, entries, True)
+
+            return [entry.name for entry in entries]
+
         self._logger.debug("Attempting to get directory listing for logical"
                            "path %s" % complete_path)
 
@@ -591,13 +969,16 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
         self.date         = None
         self.is_directory = False
 
-        self.shell = rs.utils.pty_shell.PTYShell (rs.url.Url("ssh://localhost"))
+        self.shell = rs.utils.pty_shell.PTYShell (adaptor.pty_url)
+
+        # bulk replications are handled by the adaptor instance
+        self._set_container (adaptor)
 
         # TODO: "stat" the file
 
     def __del__ (self):
         self._logger.debug("Deconstructor for iRODS file")
-        self.shell.close()
+        self.shell.finalize (kill_pty=True)
 
 
     # ----------------------------------------------------------------
@@ -706,10 +1087,10 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
         '''
 
         # return a list of all replica locations for a file
-        path    = self._url.get_path()
-        listing = self._adaptor.irods_get_directory_listing(path, self.shell)
+        path  = self._url.get_path()
+        entry = self._adaptor.irods_get_entry(path, self.shell)
 
-        return listing[0].locations
+        return list(entry.locations)
 
 
     # ----------------------------------------------------------------
@@ -721,7 +1102,10 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
         This method is called upon logicaldir.get_size()
         '''
 
-        return self.size
+        path  = self._url.get_path()
+        entry = self._adaptor.irods_get_entry(path, self.shell)
+
+        return int(entry.size)
 
 
     # ----------------------------------------------------------------
@@ -730,9 +1114,26 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
     @SYNC_CALL
     def remove_location(self, location):
         '''This method is called upon logicaldir.remove_locations()
+           The location names the resource(s) to remove the replicas from, as
+           `?resource=a,b`.
         '''
-        raise rs.NotImplemented._log (self._logger, "Not implemented")
-        return
+
+        complete_path = self._url.get_path()
+
+        resources = self._adaptor.irods_resources(location)
+        if not resources:
+            raise rs.BadParameter("no resource in location %s" % location)
+
+        self._adaptor.irods_invalidate(complete_path)
+
+        # trim the replicas on those resources, but keep at least one copy
+        for resource in resources:
+            ret, out, _ = self.shell.run_sync("itrim -N 1 -S %s %s"
+                                             % (resource, complete_path))
+            if ret:
+                raise rs.NoSuccess("Could not remove location %s of %s "
+                                   "[%s]: %s" % (resource, complete_path,
+                                                 str(ret), out))
 
 
     # ----------------------------------------------------------------
@@ -746,27 +1147,25 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
         # path to file we are replicating on iRODS
         complete_path = self._url.get_path()
 
-        # TODO: Verify Correctness in the way the resource is grabbed
-        query = rs.Url(target).get_query()
-        resource = query.split("=")[1]
+        # the target may name several resources (`?resource=a,b,c`), which
+        # are replicated to concurrently
+        resources = self._adaptor.irods_resources(target)
+        if not resources:
+            raise rs.BadParameter("no target resource in %s" % target)
+
         self._logger.debug("Attempting to replicate logical file %s to "
                            "resource/resource group %s"
-                           % (complete_path, resource))
+                           % (complete_path, ', '.join(resources)))
 
-        try:
-            self._logger.debug("Executing: irepl -R %s %s"
-                              % (resource, complete_path))
-            ret, out, _ = self.shell.run_sync("irepl -R %s %s"
-                                             % (resource, complete_path))
+        errors = self._adaptor.irods_replicate_many(
+                         [(complete_path, resource) for resource in resources])
+        errors = [str(e) for e in errors if e]
 
-            if ret:
-                raise Exception("Could not replicate logical file %s to"
-                                "resource/resource group %s, errorcode %s: %s"
-                               % (complete_path, resource, str(ret), out))
+        self._adaptor.irods_invalidate(complete_path)
 
-        except Exception as e:
-            raise rs.NoSuccess._log(self._logger, "replicate failed: %s" % e) \
-                  from e
+        if errors:
+            raise rs.NoSuccess._log(self._logger, "replicate failed: %s"
+                                   % '; '.join(errors))
 
 
     # ----------------------------------------------------------------
@@ -785,6 +1184,9 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
         self._logger.debug("Attempting to move logical file %s to location %s"
                           % (source_path, dest_path))
 
+        self._adaptor.irods_invalidate(source_path)
+        self._adaptor.irods_invalidate(dest_path)
+
         try:
             ret, out, _ = self.shell.run_sync("imv %s %s"
                                              % (source_path, dest_path))
@@ -817,6 +1219,8 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
         complete_path = self._url.get_path()
         self._logger.debug("Attempting to remove file at: %s" % complete_path)
 
+        self._adaptor.irods_invalidate(complete_path)
+
         try:
             ret, out, _ = self.shell.run_sync("irm %s" % complete_path)
 
@@ -866,8 +1270,10 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
 
         # extract the path from the LogicalFile object, excluding
         # the filename
-        destination_path = self._url.get_path()[0:string.rfind(
-                           self._url.get_path(), "/") + 1]
+        destination_path = os.path.dirname(self._url.get_path()) + '/'
+
+        self._adaptor.irods_invalidate(destination_path
+                                      + os.path.basename(complete_path))
 
         try:
             # note we're uploading
@@ -875,8 +1281,8 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
                                "will register file in logical dir: %s"
                               % destination_path)
 
-            # the query holds our target resource
-            query = rs.Url(target).get_query()
+            # the query holds our target resource(s)
+            resources = self._adaptor.irods_resources(target)
 
             # list of args we will generate
             arg_list = ""
@@ -886,26 +1292,38 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
                 if flags & rs.namespace.OVERWRITE:
                     arg_list += "-f "
 
+            if self._adaptor.threads:
+                arg_list += "-N %d " % self._adaptor.threads
+
             # was no resource selected?
-            if not query:
+            if not resources:
                 self._logger.debug("Attempting to upload to default resource")
                 ret, out, _ = self.shell.run_sync("iput %s %s %s" %
                                     (arg_list, complete_path, destination_path))
 
-            # resource was selected, have to parse it and supply to iput -R
+            # resource was selected, supply it to iput -R
             else:
-                # TODO: Verify correctness
-                resource = query.split("=")[1]
-
-                self._logger.debug("upload to %s" % resource)
+                self._logger.debug("upload to %s" % resources[0])
                 ret, out, _ = self.shell.run_sync("iput -R %s %s %s %s" %
-                                         (resource, arg_list, complete_path,
+                                         (resources[0], arg_list, complete_path,
                                           destination_path))
 
             if ret:
                 raise rs.NoSuccess("Could not upload file %s, errorcode %s: %s"
                                   % (complete_path, str(ret), out))
 
+            # further resources get replicas, concurrently
+            if len(resources) > 1:
+                logical_path = destination_path \
+                             + os.path.basename(complete_path)
+                errors = self._adaptor.irods_replicate_many(
+                               [(logical_path, r) for r in resources[1:]])
+                errors = [str(e) for e in errors if e]
+
+                if errors:
+                    raise rs.NoSuccess("Could not replicate file %s: %s"
+                                      % (logical_path, '; '.join(errors)))
+
         except Exception as e:
             # couldn't upload for unspecificed reason
             raise rs.NoSuccess._log (self._logger, "upload failed: %s" % e) \
@@ -946,8 +1364,12 @@ class IRODSFile (rs.adaptors.cpi.replica.LogicalFile) :
                                "specified local target is %s"
                               % (logical_path, target))
 
-            if target: cmd = "iget %s %s" % (logical_path, local_path)
-            else     : cmd = "iget %s"    %  logical_path
+            args = ""
+            if self._adaptor.threads:
+                args = "-N %d " % self._adaptor.threads
+
+            if target: cmd = "iget %s%s %s" % (args, logical_path, local_path)
+            else     : cmd = "iget %s%s"    % (args, logical_path)
 
             self._logger.debug("Executing: %s" % cmd)
             ret, out, _ = self.shell.run_sync(cmd)
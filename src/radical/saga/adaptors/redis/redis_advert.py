@@ -79,6 +79,11 @@ class Adaptor (a_base.Base):
         self._bulk  = BulkDirectory ()
         self._redis = {}
 
+        self._cache_size   = int  (self._cfg.get ('cache_size', 10000))
+        self._cache_ttl    = float(self._cfg.get ('cache_ttl',  1.0))
+        self._cache_notify = str  (self._cfg.get ('cache_notify', 'false')) \
+                                  .lower () in ['true', 'yes', '1']
+
 
     # --------------------------------------------------------------------------
     #
@@ -106,11 +111,26 @@ class Adaptor (a_base.Base):
                 hash = "redis://%s:%d"       %                 (host, port)
 
         if hash not in self._redis :
-            self._redis[hash] = rns.redis_ns_server (url)
+            self._redis[hash] = rns.redis_ns_server (url,
+                                        cache_size   = self._cache_size,
+                                        cache_ttl    = self._cache_ttl,
+                                        cache_notify = self._cache_notify)
 
         return self._redis[hash]
 
 
+    # --------------------------------------------------------------------------
+    #
+    def get_cache_stats (self) :
+        """
+        Return the entry cache statistics (size, hits, misses, evictions,
+        expirations and invalidations) for all redis servers in use, keyed by
+        server.
+        """
+
+        return {hash : r.cache.stats () for hash, r in self._redis.items ()}
+
+
     # --------------------------------------------------------------------------
     #
     def sanity_check (self) :
@@ -293,42 +313,41 @@ class RedisDirectory (cpi.Directory) :
     @SYNC_CALL
     def list (self, pattern, flags) :
 
-        if  pattern :
-            raise rse.BadParameter ("pattern for list() not supported")
-
-
-        ret = []
-
-        if  not flags :
-
-            ret = self._nsdir.list ()
-
-
-        elif flags == api.RECURSIVE :
+        if  flags and flags != api.RECURSIVE :
+            raise rse.BadParameter ("list() only supports the RECURSIVE flag")
 
-            # ------------------------------------------------------------------
-            def get_kids (path) :
+        if  not pattern and not flags :
+            return self._nsdir.list ()
 
-                d    = api.Directory (path)
-                kids = d.list ()
+        # the subtree is walked on the server, one round trip per level
+        return self._nsdir.find (pattern, recursive=bool(flags))
 
-                for kid in kids :
 
-                    kid_url      = self._url
-                    kid_url.path = kid
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def find (self, pattern, flags) :
 
-                    if  d.is_dir (kid_url) :
-                        get_kids (kid_url)
+        return self.find_adverts (pattern, None, None, flags)
 
-                    ret.append (kid)
-            # ------------------------------------------------------------------
 
-            get_kids (self._url)
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def find_adverts (self, name_pattern, attr_pattern, obj_type, flags) :
 
+        if  obj_type :
+            raise rse.BadParameter ("obj_type for find() not supported")
 
-        else :
-            raise rse.BadParameter ("list() only supports the RECURSIVE flag")
+        if  flags and flags != api.RECURSIVE :
+            raise rse.BadParameter ("find() only supports the RECURSIVE flag")
 
+        ret = []
+        for path in self._nsdir.find (name_pattern, attr_pattern,
+                                      recursive=bool(flags)) :
+            url      = Url (self._url)
+            url.path = path
+            ret.append (url)
 
         return ret
 
@@ -485,6 +504,22 @@ class RedisEntry (cpi.Entry) :
         return self._nsentry.set_key (key, val)
 
 
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def set_attributes (self, attrs) :
+
+        return self._nsentry.set_keys (attrs)
+
+
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def get_attributes (self, keys) :
+
+        return self._nsentry.get_keys (keys)
+
+
     # --------------------------------------------------------------------------
     #
     @SYNC_CALL
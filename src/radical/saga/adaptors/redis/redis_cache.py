@@ -16,28 +16,41 @@ TTL = 'ttl'
 
 ######################################################################
 #
+# A bounded LRU cache with per entry lifetime.  Entries are kept in LRU order
+# (hits move an entry to the end, evictions pop from the front).  Expired
+# entries are dropped when found on lookup, and in a full sweep which runs at
+# most once per TTL period, triggered by `set()` -- so the sweep cost is
+# amortized over all insertions.
+#
+# If a `notify` callable is given, it is called with `(key, True)` whenever
+# a key enters the cache, and with `(key, False)` whenever it leaves it.  It
+# is called while the cache is locked, and thus must not block.
+#
 class Cache :
 
     # ----------------------------------------------------------------
     #
-    def __init__ (self, logger, size=CACHE_DEFAULT_SIZE, ttl=CACHE_DEFAULT_TTL) :
+    def __init__ (self, logger, size=CACHE_DEFAULT_SIZE, ttl=CACHE_DEFAULT_TTL,
+                        notify=None) :
 
         if int (size) < 1 :
             raise AttributeError ('size < 1 or not a number')
 
-        if int (ttl) < 0 :
+        if float (ttl) < 0 :
             raise AttributeError ('ttl < 0 or not a number')
 
-        self.size   = size
-        self.ttl    = ttl
+        self.size   = int   (size)
+        self.ttl    = float (ttl)
         self.dict   = OrderedDict()
         self.lock   = mt.RLock()
         self.logger = logger
+        self.notify = notify
         self.hit    = 0
         self.miss   = 0
-
-        # start a thread which, with low priority, cleans out the dict now and
-        # then (pops items until a live one is found
+        self.evict  = 0
+        self.expire = 0
+        self.inval  = 0
+        self.sweep  = time.time () + self.ttl
 
 
     # ----------------------------------------------------------------
@@ -45,35 +58,70 @@ class Cache :
     def _dump (self) :
         print(" ---------------------------------------------- ")
         print(" CACHE STATISTICS : ")
-        print(" size: %5d" % len(self.dict))
-        print(" hit : %5d" % self.hit) 
-        print(" miss: %5d" % self.miss)
+        for key, val in self.stats ().items () :
+            print(" %-6s: %5d" % (key, val))
         print(list(self.dict.keys()))
         print(" ---------------------------------------------- ")
 
 
     # ----------------------------------------------------------------
     #
-    def get (self, key) :
+    def _notify (self, key, cached) :
+
+        if self.notify :
+            self.notify (key, cached)
+
+
+    # ----------------------------------------------------------------
+    #
+    def stats (self) :
+
+        with self.lock :
+            return {'size'   : len (self.dict),
+                    'hit'    : self.hit,
+                    'miss'   : self.miss,
+                    'evict'  : self.evict,
+                    'expire' : self.expire,
+                    'inval'  : self.inval}
+
+
+    # ----------------------------------------------------------------
+    #
+    def _sweep (self, now) :
+
+        # TTLs are not refreshed on hits, so LRU order is not expiry order --
+        # we need to look at all entries.
+        expired = [key for key, entry in self.dict.items ()
+                                      if entry[TTL] <= now]
+        for key in expired :
+            del self.dict[key]
+            self._notify (key, False)
+
+        self.expire += len (expired)
+        self.sweep   = now + self.ttl
 
-        self.logger.debug ("redis_cache_get %s", key)
+
+    # ----------------------------------------------------------------
+    #
+    def get (self, key) :
 
         with self.lock:
 
             # check if we have a live entry
-            if key in self.dict :
+            entry = self.dict.get (key)
 
-                now = time.time ()
+            if entry :
 
-                if self.ttl and self.dict[key][TTL] > now :
-                    # if yes, cache hit!
-                    # return data -- doh!
+                if entry[TTL] > time.time () :
+                    # cache hit!
+                    self.dict.move_to_end (key)
                     self.hit += 1
-                    return self.dict[key][VAL]
+                    return entry[VAL]
 
-                else :
-                    # entry timed out
-                    del self.dict[key]
+                # entry timed out
+                del self.dict[key]
+                self._notify (key, False)
+                self.expire += 1
 
             # cache entry not found, or timed out
             self.miss += 1
@@ -84,15 +132,30 @@ class Cache :
     #
     def set (self, key, value) :
 
+        if not self.ttl :
+            # caching is disabled
+            return
+
         with self.lock :
 
-            # remove superfluous(?) entries
-            while len (self.dict) >= self.size :
-                self.dict.popitem (last=False)
+            now = time.time ()
 
-            self.dict[key]      = {}
-            self.dict[key][VAL] = value
-            self.dict[key][TTL] = time.time () + self.ttl
+            if now >= self.sweep :
+                self._sweep (now)
+
+            if key in self.dict :
+                self.dict.move_to_end (key)
+
+            else :
+                # evict least recently used entries
+                while len (self.dict) >= self.size :
+                    self._notify (self.dict.popitem (last=False)[0], False)
+                    self.evict += 1
+
+                self._notify (key, True)
+
+            self.dict[key] = {VAL : value,
+                              TTL : now + self.ttl}
 
 
     # ----------------------------------------------------------------
@@ -101,10 +164,22 @@ class Cache :
 
         with self.lock :
             del self.dict[key]
+            self._notify (key, False)
 
 
     # ----------------------------------------------------------------
+    #
+    def invalidate (self, key) :
+        """
+        Drop the entry for `key` if it exists, e.g. on a keyspace notification
+        about a change by some other client.
+        """
 
+        with self.lock :
+            if self.dict.pop (key, None) is not None :
+                self._notify (key, False)
+                self.inval += 1
 
 
+    # ----------------------------------------------------------------
 
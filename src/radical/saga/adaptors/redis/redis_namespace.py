@@ -44,6 +44,14 @@ All parts of the above structure are set/get in a single pipelined transactional
 'MULTI' block.  One could consider to move the ops into a lua script, if
 performance is insufficient.
 
+Change events are published on one channel per path::
+
+    saga-advert-events:/etc/passwd : ATTRIBUTE<US>key_1<US>val_1[<US>key_2...]
+    saga-advert-events:/etc/       : CREATE<US>passwd
+
+where <US> is the ASCII unit separator.  Clients only subscribe to the channels
+of paths they have callbacks registered for.
+
 TODO:
     - use locks to make thread safe(r)
 
@@ -51,11 +59,15 @@ TODO:
 
 import redis
 
-import re
 import os
+import re
 import time
+import queue
+import fnmatch
 import threading as mt
 
+from collections import OrderedDict
+
 import radical.utils as ru
 
 from ...       import exceptions as rse
@@ -78,6 +90,25 @@ KEYS   = 'keys'
 VALS   = 'vals'
 
 MON    = 'saga-advert-events'
+SEP    = '\x1f'
+ESC    = '\\'
+
+CREATE    = 'CREATE'
+ATTRIBUTE = 'ATTRIBUTE'
+
+# max number of events coalesced before callbacks are invoked
+BURST  = 1024
+
+# max time the monitor blocks on the pubsub connection, and thus the delay for
+# subscription requests to be served
+POLL   = 0.1
+
+# keyspace notifications, and the event classes needed for cache coherence
+# (generic, hash and set commands)
+NOTIFY   = 'notify-keyspace-events'
+KEYSPACE = '__keyspace@%d__:'
+KEYSPACE_PREFIX = '__keyspace@'
+EVENTS   = 'ghs'
 
 
 # ------------------------------------------------------------------------------
@@ -100,6 +131,38 @@ def redis_ns_name(path):
     return os.path.split(path)[1]
 
 
+def redis_ns_is_glob(pattern):
+
+    return any(c in pattern for c in '*?[')
+
+
+def redis_ns_channel(path):
+
+    return MON + ':' + path
+
+
+# event fields are escaped, so that names and values can contain the separator
+def redis_ns_escape(field):
+
+    return str(field).replace(ESC, ESC + ESC).replace(SEP, ESC + 's')
+
+
+def redis_ns_unescape(field):
+
+    return re.sub(r'\\(.)', lambda m: SEP if m.group(1) == 's'
+                                         else m.group(1), field)
+
+
+def redis_ns_event(event, *args):
+
+    return SEP.join([event] + [redis_ns_escape(arg) for arg in args])
+
+
+def redis_ns_fields(data):
+
+    return [redis_ns_unescape(elem) for elem in ru.as_string(data).split(SEP)]
+
+
 # ------------------------------------------------------------------------------
 #
 class redis_ns_monitor(object):
@@ -112,9 +175,9 @@ class redis_ns_monitor(object):
         self.pub    = pub
         self.logger = r.logger
 
-        self.pat = {
-                'ATTRIBUTE': re.compile('\s*\[(?P<key>[^=]+)=(?P<val>.+)]\s*')
-        }
+        # the pubsub connection is not thread safe, so other threads hand
+        # (un)subscribe requests to the monitor thread
+        self._requests = queue.Queue()
 
         self._term   = mt.Event()
         self._worker = mt.Thread(target=self.work)
@@ -132,6 +195,56 @@ class redis_ns_monitor(object):
 
         self._term.set()
 
+    # --------------------------------------------------------------------------
+    #
+    def subscribe(self, channel):
+        '''
+        Queue a subscription request.  The returned event is set once the
+        monitor thread subscribed to the channel.
+        '''
+
+        done = mt.Event()
+        self._requests.put(('subscribe', channel, done))
+        return done
+
+    # --------------------------------------------------------------------------
+    #
+    def unsubscribe(self, channel):
+
+        done = mt.Event()
+        self._requests.put(('unsubscribe', channel, done))
+        return done
+
+    # --------------------------------------------------------------------------
+    #
+    def _serve_requests(self):
+
+        while True:
+            try:
+                op, channel, done = self._requests.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                getattr(self.pub, op)(channel)
+            finally:
+                done.set()
+
+    # --------------------------------------------------------------------------
+    #
+    def wait(self, done):
+        '''
+        Wait for a request to be served.  Callbacks run on the monitor thread
+        and may register new callbacks: their requests are served once the
+        callbacks return, so we cannot wait for them here.
+        '''
+
+        if mt.current_thread() is self._worker:
+            return
+
+        while not done.is_set() and not self._term.is_set():
+            done.wait(POLL)
+
     # --------------------------------------------------------------------------
     #
     def work(self):
@@ -144,66 +257,85 @@ class redis_ns_monitor(object):
     def _work(self):
 
         try:
-            callbacks = self.r.callbacks
-            sub       = self.pub.listen()
-
-            while sub:
+            while not self._term.is_set():
 
-                info = next(sub)
-                data = info['data']
+                self._serve_requests()
 
-                if not isinstance(data, str):
-                    self.logger.warn("ignoring event: %s"  %  data)
+                if not self.pub.subscribed:
+                    # no callbacks registered (yet)
+                    self._term.wait(POLL)
                     continue
 
-                # FIXME: need proper regex parsing
-                elems = data.split()
-                if not len(elems) == 3:
-                    self.logger.warn("ignoring event args: %s"  %  data)
-                    continue
+                info = self.pub.get_message(ignore_subscribe_messages=True,
+                                            timeout=POLL)
 
-                self.logger.debug("sub %s"  %  data)
-                event = elems[0]
-                path  = elems[1]
-                args  = elems[2:]
+                # drain whatever else arrived with this event, so that bursts
+                # of updates result in a single callback per path and key
+                updates = OrderedDict()
+                while info:
+                    self._handle(info, updates)
+                    if len(updates) >= BURST:
+                        break
+                    info = self.pub.get_message(ignore_subscribe_messages=True)
 
-                if path in callbacks:
+                if updates:
+                    self._dispatch(updates)
 
-                    if event == 'ATTRIBUTE':
+        except Exception:
+            self.logger.exception("monitoring thread died, callback disabled")
+            self._term.wait(1.0)
+            return
 
-                        # args are formatted like '[key=val]'
-                        match = self.pat[event].match(' '.join(args))
+    # --------------------------------------------------------------------------
+    #
+    def _handle(self, info, updates):
 
-                        if not match:
-                            self.logger.warn("parse error for %s" % args)
-                            continue
+        channel = ru.as_string(info['channel'])
 
-                        # FIXME: error check
-                        key     = match.group('key')
-                        val     = match.group('val')
+        if info['type'] != 'message':
+            return
 
-                        if key in callbacks[path]:
-                            for idx in callbacks[path][key]:
+        if channel.startswith(KEYSPACE_PREFIX):
+            # keyspace event: some client changed a cached key
+            self.r.cache.invalidate(channel.split(':', 1)[1])
+            return
 
-                              # cb  = callbacks[path][key][idx][0]
-                                obj = callbacks[path][key][idx][1]
+        path  = channel[len(MON) + 1:]
+        elems = redis_ns_fields(info['data'])
 
-                                obj.set_attribute(key, val, obj._UP)
+        # only attribute changes trigger callbacks - later values for the same
+        # key supersede earlier ones
+        if elems[0] == ATTRIBUTE:
+            for key, val in zip(elems[1::2], elems[2::2]):
+                updates.pop((path, key), None)
+                updates[(path, key)] = val
 
-                    if event == 'ATTRIBUTES':
-                        self.logger.warn("unknown event type %s" % event)
-                        pass
+    # --------------------------------------------------------------------------
+    #
+    def _dispatch(self, updates):
 
-        except Exception:
-            self.logger.exception("monitoring thread died, callback disabled")
-            return
+        # several callback ids can point to the same API object, which we only
+        # need to update once
+        todo = OrderedDict()
+        with self.r.cb_lock:
+            for (path, key), val in updates.items():
+                cbs = self.r.callbacks.get(path, {}).get(key, {})
+                for _, obj in cbs.values():
+                    todo[(id(obj), key)] = (obj, val)
+
+        # the attribute callbacks may register new callbacks - so we don't hold
+        # the lock while invoking them
+        for (_, key), (obj, val) in todo.items():
+            obj.set_attribute(key, val, obj._UP)
 
 
 # ------------------------------------------------------------------------------
 #
 class redis_ns_server(redis.Redis):
 
-    def __init__(self, url):
+    def __init__(self, url, cache_size=redis_cache.CACHE_DEFAULT_SIZE,
+                            cache_ttl=redis_cache.CACHE_DEFAULT_TTL,
+                            cache_notify=False):
 
         if url.scheme != 'redis':
             raise rse.BadParameter("unsupported url scheme (%s)" %  url)
@@ -221,21 +353,19 @@ class redis_ns_server(redis.Redis):
         if url.password: self.password = url.password
 
         # create redis client
-        t1 = time.time()
         redis.Redis.__init__(self,
                              host      = self.host,
                              port      = self.port,
                              db        = self.db,
                              password  = self.password,
                              errors    = self.errors)
-        t2 = time.time()
 
         # add a logger
         self.logger = ru.Logger('radical.saga')
 
-        # create a cache dict and attach to redis client instance.  Cache
-        # lifetime is set to 10 times the redis-connect latency.
-        self.cache = redis_cache.Cache(logger=self.logger, ttl=((t2-t1)*10))
+        # create a cache dict and attach to redis client instance
+        self.cache = redis_cache.Cache(logger=self.logger,
+                                       size=cache_size, ttl=cache_ttl)
 
         # create a second client to manage the (blocking)
         # pubsub communication for event notifications
@@ -245,20 +375,75 @@ class redis_ns_server(redis.Redis):
                               password  = self.password,
                               errors    = self.errors)
 
-        # set up pubsub endpoint, and start a thread to monitor channels
+        # set up pubsub endpoint, and start a thread to monitor channels.  We
+        # subscribe to the event channels of paths once callbacks get
+        # registered on them.
         self.callbacks = dict()
+        self.cb_lock   = mt.RLock()
         self.pub = self.r2.pubsub()
-        self.pub.subscribe(MON)
-        # FIXME: create one pubsub channel per path (for paths which have
-        #        callbacks registered)
 
         self.monitor = redis_ns_monitor(self, self.pub)
+
+        # keep the cache coherent with changes by other clients, by watching
+        # the keys while they are cached
+        if self.cache.ttl and self._check_keyspace(cache_notify):
+            self.cache.notify = self._watch_key
+
         self.monitor.start()
 
+    # --------------------------------------------------------------------------
+    #
+    def _check_keyspace(self, enable):
+        '''
+        Check if the server emits the keyspace events needed to invalidate
+        cache entries changed by other clients.  Those are a server wide
+        setting, so we only enable them if `enable` is set (which requires the
+        `CONFIG` command to be available).  Otherwise, and on any error, the
+        cache relies on its TTL alone.
+        '''
+
+        try:
+            cfg  = self.config_get(NOTIFY)
+            cfg  = {ru.as_string(k): ru.as_string(v) for k, v in cfg.items()}
+            have = cfg.get(NOTIFY, '')
+
+            if 'A' in have: need = set('K')
+            else          : need = set('K' + EVENTS)
+
+            if need <= set(have):
+                return True
+
+            if not enable:
+                self.logger.info("no keyspace events, cache relies on ttl")
+                return False
+
+            self.config_set(NOTIFY, ''.join(sorted(need | set(have))))
+            return True
+
+        except Exception as e:
+            self.logger.warn("no keyspace events, cache relies on ttl: %s" % e)
+            return False
+
+    # --------------------------------------------------------------------------
+    #
+    def _watch_key(self, key, cached):
+        '''
+        Cache hook: listen for keyspace events on keys while they are cached.
+        This is called with the cache locked, so we only queue the requests.
+        '''
+
+        channel = KEYSPACE % self.db + key
+
+        if cached: self.monitor.subscribe(channel)
+        else     : self.monitor.unsubscribe(channel)
+
+    # --------------------------------------------------------------------------
+    #
     def __del__(self):
 
         if self.pub:
-            self.pub.unsubscribe(MON)
+            self.monitor.stop()
+            self.pub.close()
 
 
 # ------------------------------------------------------------------------------
@@ -448,7 +633,7 @@ class redis_ns_entry:
 
         # issue notification about entry creation to parent dir
         self.logger.debug("pub CREATE %s [%s]" % (parent, name))
-        self.r.publish(MON,   "CREATE %s [%s]" % (parent, name))
+        self.r.publish(redis_ns_channel(parent), redis_ns_event(CREATE, name))
 
         # refresh cache state
         self.cache.set(NODE + ':' + path, self.node)
@@ -484,6 +669,141 @@ class redis_ns_entry:
 
         return self.kids
 
+    # --------------------------------------------------------------------------
+    #
+    def walk(self, recursive=True):
+        '''
+        Return the paths of all entries below this directory.  The tree is
+        traversed breadth first, with one pipelined round trip per tree level
+        (the kids of plain entries are simply empty sets).
+        '''
+
+        if not self.node[TYPE] == DIR:
+            raise rse.IncorrectState("walk() only supported on directories")
+
+        self.logger.debug("redis_ns_entry.walk %s" % self.path)
+
+        ret   = list()
+        level = [self.path]
+
+        while level:
+
+            p = self.r.pipeline()
+            for path in level:
+                p.smembers(KIDS + ':' + path)
+
+            level = sorted(ru.as_string(kid) for kids in p.execute()
+                                             for kid  in kids)
+            ret  += level
+
+            if not recursive:
+                break
+
+        return ret
+
+    # --------------------------------------------------------------------------
+    #
+    def find(self, name_pattern=None, attr_pattern=None, recursive=True):
+        '''
+        Return the paths of all entries below this directory whose name
+        matches `name_pattern`, and which have an attribute matching
+        `attr_pattern` (`key=val`, where both parts can contain POSIX shell
+        wildcards, and either can be omitted).  Attribute patterns are resolved
+        via the KEYS and VALS index sets, so the tree is only walked if the
+        pattern does not narrow the search -- candidates are then verified
+        against their data hashes in a single pipeline.
+        '''
+
+        if not self.node[TYPE] == DIR:
+            raise rse.IncorrectState("find() only supported on directories")
+
+        self.logger.debug("redis_ns_entry.find %s [%s] [%s]"
+                          % (self.path, name_pattern, attr_pattern))
+
+        paths = None
+        kpat  = '*'
+        vpat  = '*'
+
+        if attr_pattern:
+            kpat, _, vpat = attr_pattern.partition('=')
+            kpat = kpat or '*'
+            vpat = vpat or '*'
+            paths = self._index_lookup(kpat, vpat)
+
+        if paths is None:
+            paths = self.walk(recursive)
+
+        else:
+            # index hits are global - limit them to our subtree
+            base  = self.path.rstrip('/')
+            paths = sorted(path for path in paths
+                                if path.startswith(base + '/')
+                                and path.rstrip('/') != base)
+            if not recursive:
+                paths = [path for path in paths
+                              if redis_ns_parent(path.rstrip('/')) in
+                                 [base, base + '/']]
+
+        if name_pattern:
+            paths = [path for path in paths
+                          if fnmatch.fnmatchcase(
+                              redis_ns_name(path.rstrip('/')), name_pattern)]
+
+        if attr_pattern and paths:
+
+            p = self.r.pipeline()
+            for path in paths:
+                p.hgetall(DATA + ':' + path)
+
+            # the indexes do not pair keys with values, so check the data
+            ret = list()
+            for path, data in zip(paths, p.execute()):
+                for key, val in data.items():
+                    if fnmatch.fnmatchcase(ru.as_string(key), kpat) and \
+                       fnmatch.fnmatchcase(ru.as_string(val), vpat):
+                        ret.append(path)
+                        break
+            paths = ret
+
+        return paths
+
+    # --------------------------------------------------------------------------
+    #
+    def _index_lookup(self, kpat, vpat):
+        '''
+        Return the set of paths which have any key matching `kpat` and any value
+        matching `vpat`, according to the attribute indexes, or `None` if the
+        patterns match anything anyway.  Wildcard patterns are expanded over
+        the index set names via SCAN.
+        '''
+
+        sets = list()
+        for prefix, pat in [(KEYS, kpat), (VALS, vpat)]:
+
+            if pat == '*':
+                continue
+
+            if redis_ns_is_glob(pat):
+                names = [ru.as_string(name) for name in
+                         self.r.scan_iter(match=prefix + ':' + pat, count=1000)]
+                if not names:
+                    return set()
+            else:
+                names = [prefix + ':' + pat]
+
+            sets.append(names)
+
+        if not sets:
+            return None
+
+        p = self.r.pipeline()
+        for names in sets:
+            p.sunion(names)
+
+        hits = [set(ru.as_string(list(members))) for members in p.execute()]
+
+        return set.intersection(*hits)
+
     # --------------------------------------------------------------------------
     #
     def fetch(self):
@@ -599,7 +919,8 @@ class redis_ns_entry:
 
             # nothing changed - so just trigger the set event
             self.logger.debug("Pub ATTRIBUTE %s [%s=%s]" % (path, key, val))
-            self.r.publish(MON,   "ATTRIBUTE %s [%s=%s]" % (path, key, val))
+            self.r.publish(redis_ns_channel(path),
+                           redis_ns_event(ATTRIBUTE, key, val))
 
             # nothing else to do
             return
@@ -626,36 +947,126 @@ class redis_ns_entry:
 
         # issue notification about key creation/update
         self.logger.debug("PUB ATTRIBUTE %s [%s=%s]" % (path, key, val))
-        self.r.publish(MON,   "ATTRIBUTE %s [%s=%s]" % (path, key, val))
+        self.r.publish(redis_ns_channel(path),
+                       redis_ns_event(ATTRIBUTE, key, val))
 
         # update cache
         self.data[key] = val
         self.cache.set(DATA + ':' + path, self.data)
 
+    # --------------------------------------------------------------------------
+    #
+    def get_keys(self, keys):
+
+        path = self.path
+        self.logger.debug("redis_ns_entry.get_keys %s: %s" % (path, keys))
+
+        try:
+            data = ru.as_string(self.cache.get(DATA + ':' + path))
+
+        except AttributeError:
+            # cache miss - only fetch the requested keys
+            vals = self.r.hmget(DATA + ':' + path, keys)
+            data = {key: ru.as_string(val) for key, val in zip(keys, vals)
+                                           if  val is not None}
+
+        missing = [key for key in keys if key not in data]
+        if missing:
+            raise rse.BadParameter("no such attribute (%s)" % missing)
+
+        return {key: data[key] for key in keys}
+
+    # --------------------------------------------------------------------------
+    #
+    def set_keys(self, data):
+        '''
+        Set a number of keys in one transaction, which also updates the key/val
+        indexes and issues a single notification for all keys.  The old values
+        are read under WATCH, so concurrent updates to the entry cause a retry.
+        '''
+
+        path = self.path
+        keys = list(data.keys())
+        self.logger.debug("set_keys %s: %s" % (path, keys))
+
+        if not keys:
+            return
+
+        pairs = list()
+        for key in keys:
+            pairs += [key, data[key]]
+
+        # ----------------------------------------------------------------------
+        def _set_keys(p):
+
+            old = p.hmget(DATA + ':' + path, keys)
+
+            p.multi()
+            p.hset(NODE + ':' + path, None, None, {'mtime': time.time()})
+            p.hset(DATA + ':' + path, None, None, data)
+
+            for key, val in zip(keys, old):
+
+                if val is None:
+                    # new key: add new key index entry
+                    p.sadd(KEYS + ':' + str(key), path)
+
+                elif ru.as_string(val) != str(data[key]):
+                    # delete old invalid value index entry
+                    p.srem(VALS + ':' + ru.as_string(val), path)
+
+                p.sadd(VALS + ':' + str(data[key]), path)
+
+            p.publish(redis_ns_channel(path), redis_ns_event(ATTRIBUTE, *pairs))
+        # ----------------------------------------------------------------------
+
+        self.r.transaction(_set_keys, DATA + ':' + path)
+
+        # our own data may be incomplete, so rather refetch on next use
+        self.cache.invalidate(DATA + ':' + path)
+
     # --------------------------------------------------------------------------
     #
     def manage_callback(self, key, id, cb, obj):
-        # FIXME: this needs a shared lock with the monitor thread!
 
-        self.logger.debug("redis_ns_entry.manage__callback %s: %s" %
-                          (self.path, key))
+        path = self.path
+        self.logger.debug("redis_ns_entry.manage_callback %s: %s" % (path, key))
 
-        if self.path not in self.callbacks:
-            self.callbacks[self.path] = {}
-            if key not in self.callbacks[self.path]:
-                self.callbacks[self.path][key] = {}
+        # requests are queued under the lock, so that they are served in the
+        # order of callback changes, but we wait for them outside of it, as
+        # the monitor thread needs the lock to dispatch events
+        done = None
 
-        if id is None:
-            del self.callbacks[self.path][key]
+        with self.r.cb_lock:
 
-        if cb:
-            self.callbacks[self.path][key][id] = [cb, obj]
-        else:
-            # cb == None: remove that callback
-            # FIXME: if we have no callbacks for key, remove [key]
-            # FIXME: if we have no keys for path, remove [path]
-            # FIXME: if we remove a [path], unsubscribe for its notifications
-            del self.callbacks[self.path][key][id]
+            if cb:
+                # listen for events on this path once we have a callback
+                if path not in self.callbacks:
+                    self.callbacks[path] = dict()
+                    done = self.r.monitor.subscribe(redis_ns_channel(path))
+
+                if key not in self.callbacks[path]:
+                    self.callbacks[path][key] = dict()
+
+                self.callbacks[path][key][id] = [cb, obj]
+
+            else:
+                # cb == None: remove that callback (or all for that key)
+                cbs = self.callbacks.get(path, {}).get(key, {})
+
+                if id is None: cbs.clear()
+                else         : cbs.pop(id, None)
+
+                if path in self.callbacks and not cbs:
+                    self.callbacks[path].pop(key, None)
+
+                if path in self.callbacks and not self.callbacks[path]:
+                    del self.callbacks[path]
+                    self.r.monitor.unsubscribe(redis_ns_channel(path))
+
+        # make sure we see all events once the callback is registered
+        if done:
+            self.r.monitor.wait(done)
 
 
 # ------------------------------------------------------------------------------
@@ -7,9 +7,12 @@ __license__   = "MIT"
 """ shell based file adaptor implementation """
 
 import os
+import time
+import uuid
 import errno
 
 
+from ...                     import constants  as rsc
 from ...                     import exceptions as rse
 from ...                     import url        as rsurl
 from ...utils                import pty_shell  as rsups
@@ -139,6 +142,174 @@ _ADAPTOR_INFO          = {
 }
 
 
+# ------------------------------------------------------------------------------
+#
+# File system metadata are obtained with a single `stat` invocation per path,
+# which reports on the path itself (`stat`) and on what it points to (`stat
+# -L`).  For a broken link, only the first line is returned -- for a missing
+# path, none.
+#
+_STAT_FORMAT = "%%F|%%s|%%Y|%%h"  # escaped for `_STAT_CMD % {...}`
+_STAT_CMD    = " stat    -c '" + _STAT_FORMAT + "' '%(path)s' 2>/dev/null" \
+             + " && stat -L -c '" + _STAT_FORMAT + "' '%(path)s' 2>/dev/null"
+_STAT_TYPES  = {'directory'          : 'dir',
+                'regular file'       : 'file',
+                'regular empty file' : 'file',
+                'symbolic link'      : 'link'}
+
+# expired stat cache entries are purged when the cache grows beyond this size
+_STAT_SWEEP  = 1024
+
+
+def _stat_parse(out):
+    """
+    Parse the output of `_STAT_CMD` into a stat info dict:
+
+        exists : True if the path exists (links are followed, as `test -e`)
+        type   : type of the path itself: 'dir', 'file', 'link', 'other', or
+                 `None` if the path does not exist
+        size   : size in bytes (links are followed)
+        mtime  : modification time in seconds since epoch (links are followed)
+        nlink  : number of hard links
+    """
+
+    stats = list()
+    for line in out.split('\n'):
+        elems = line.strip().split('|')
+        if len(elems) == 4:
+            stats.append(elems)
+
+    info = {'exists' : False,
+            'type'   : None,
+            'size'   : None,
+            'mtime'  : None,
+            'nlink'  : None}
+
+    if not stats:
+        return info
+
+    try:
+        info['type'] = _STAT_TYPES.get(stats[0][0], 'other')
+        info['size'], info['mtime'], info['nlink'] = \
+                [int(x) for x in stats[-1][1:]]
+    except Exception as e:
+        raise rse.NoSuccess("could not parse stat output: %s" % out) from e
+
+    info['exists'] = bool(len(stats) > 1)
+
+    return info
+
+
+# ------------------------------------------------------------------------------
+#
+# Directory listings with metadata are obtained with two `find` passes in
+# a single command: the first one reports on all entries themselves, the second
+# one (`find -L ... -xtype l`) reports on what the symbolic links among them
+# point to.  Fields are separated by ASCII unit separators (`\037`), the entry
+# name comes last.  `%(start)s`, `%(depth)s` and `%(name)s` select between
+# listing a directory's content and matching a glob pattern.
+#
+_LIST_SEP    = '\\037'   # as interpreted by `find -printf`
+_LIST_FORMAT = _LIST_SEP.join(['%%y', '%%s', '%%T@', '%%n', '%%l', '%(name)s'])
+_LIST_CMD    = " find    %(start)s %(depth)s" \
+               "          -printf 'E" + _LIST_SEP + _LIST_FORMAT + "\\n' &&" \
+               " find -L %(start)s %(depth)s -xtype l" \
+               " -printf 'L" + _LIST_SEP + _LIST_FORMAT + "\\n'"
+_LIST_TYPES  = {'d' : 'dir',
+                'f' : 'file',
+                'l' : 'link'}
+
+
+def _list_parse(out):
+    """
+    Parse the output of `_LIST_CMD` into a list of `(name, info, target)`
+    tuples, where `info` is a stat info dict as returned by `_stat_parse()`,
+    and `target` is the target of a symbolic link (or `None`).  Entries are
+    returned in listing order.
+    """
+
+    entries = dict()
+    for line in out.split('\n'):
+
+        elems = line.rstrip('\r').split('\x1f', 6)
+        if len(elems) != 7 or elems[0] not in ['E', 'L']:
+            continue
+
+        kind, ftype, size, mtime, nlink, target, name = elems
+
+        try:
+            stats = {'exists' : True,
+                     'type'   : _LIST_TYPES.get(ftype, 'other'),
+                     'size'   : int(size),
+                     'mtime'  : int(float(mtime)),
+                     'nlink'  : int(nlink)}
+        except Exception as e:
+            raise rse.NoSuccess("could not parse list output: %s" % line) \
+                  from e
+
+        if kind == 'E':
+            if stats['type'] == 'link':
+                # only a broken link has no 'L' record to follow
+                stats['exists'] = False
+            entries[name] = [stats, target or None]
+
+        elif name in entries:
+            # followed link: keep type and target of the link itself
+            info = entries[name][0]
+            info['exists'] = bool(ftype != 'l')
+            info['size']   = stats['size']
+            info['mtime']  = stats['mtime']
+            info['nlink']  = stats['nlink']
+
+    return [(name, info, target) for name, (info, target) in entries.items()]
+
+
+# ------------------------------------------------------------------------------
+#
+# Recursive walks use a single `find -printf` pass, which also reports the type
+# of link targets (`%Y`), but does not follow links.  Hidden entries are skipped
+# (and not descended into), as for `list()`.  `%(filter)s` can restrict the
+# reported entries by name.
+#
+_WALK_FORMAT = _LIST_SEP.join(['%%y', '%%Y', '%%s', '%%T@', '%%n', '%%l', '%%P'])
+_WALK_CMD    = " find . -mindepth 1 -name '.*' -prune -o %(filter)s" \
+               " -printf 'W" + _LIST_SEP + _WALK_FORMAT + "\\n'"
+
+
+def _walk_parse(line):
+    """
+    Parse a line of `_WALK_CMD` output into a `(name, info, target)` tuple (see
+    `_list_parse()`), or return `None` if the line is not a valid record.  As
+    links are not followed, their `size`, `mtime` and `nlink` are `None`.
+    """
+
+    elems = line.rstrip('\r').split('\x1f', 7)
+    if len(elems) != 8 or elems[0] != 'W':
+        return None
+
+    _, ftype, ttype, size, mtime, nlink, target, name = elems
+
+    info = {'exists' : True,
+            'type'   : _LIST_TYPES.get(ftype, 'other'),
+            'size'   : None,
+            'mtime'  : None,
+            'nlink'  : None}
+
+    if info['type'] == 'link':
+        # `N`: target does not exist, `L`: link loop, `?`: error
+        info['exists'] = bool(ttype not in ['N', 'L', '?'])
+        return (name, info, target)
+
+    try:
+        info['size']  = int(size)
+        info['mtime'] = int(float(mtime))
+        info['nlink'] = int(nlink)
+    except Exception as e:
+        raise rse.NoSuccess("could not parse walk output: %s" % line) from e
+
+    return (name, info, None)
+
+
 # ------------------------------------------------------------------------------
 #
 # use the native python facilities to create local directories
@@ -173,6 +344,13 @@ class Adaptor(a_base.Base):
 
         a_base.Base.__init__(self, _ADAPTOR_INFO, _ADAPTOR_OPTIONS)
 
+        # file system metadata cache, per target host, see
+        # `stat_cache_*()`.  Entries expire after `stat_cache_ttl` seconds,
+        # a TTL of `0` disables the cache.
+        self._stat_cache = dict()
+        self._stat_ttl   = float(self._cfg.get('stat_cache_ttl', 10.0))
+        self._stat_sweep = _STAT_SWEEP
+
 
     # --------------------------------------------------------------------------
     #
@@ -198,6 +376,99 @@ class Adaptor(a_base.Base):
         return lease_tgt
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _stat_cache_host(self, url):
+
+        # the lease target identifies scheme, user, host and port -- i.e. the
+        # file system as seen through that URL
+        host = str(self.get_lease_target(url))
+
+        return self._stat_cache.setdefault(host, dict())
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_get(self, url, path):
+        """
+        return the cached stat info for the given path on the url's host, or
+        `None` if no (valid) info is cached.
+        """
+
+        if not self._stat_ttl:
+            return None
+
+        with self._lock:
+
+            cache = self._stat_cache_host(url)
+            entry = cache.get(os.path.normpath(path))
+
+            if not entry:
+                return None
+
+            if time.time() - entry[0] > self._stat_ttl:
+                del cache[os.path.normpath(path)]
+                return None
+
+            return entry[1]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_set(self, url, path, info):
+        """
+        cache the given stat info for the given path on the url's host
+        """
+
+        if not self._stat_ttl:
+            return
+
+        with self._lock:
+
+            now   = time.time()
+            cache = self._stat_cache_host(url)
+            cache[os.path.normpath(path)] = [now, info]
+
+            # purge expired entries once in a while
+            if len(cache) > self._stat_sweep:
+                for key in [k for k, v in cache.items()
+                                   if now - v[0] > self._stat_ttl]:
+                    del cache[key]
+                self._stat_sweep = max(_STAT_SWEEP, 2 * len(cache))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_invalidate(self, url, path):
+        """
+        Drop cached stat info for the given path, for all its parent
+        directories (their sizes change), and for everything below it.
+        """
+
+        if not self._stat_ttl:
+            return
+
+        path = os.path.normpath(path)
+
+        with self._lock:
+
+            cache = self._stat_cache_host(url)
+            entry = cache.pop(path, None)
+
+            parent = path
+            while parent not in ['/', '.', '']:
+                parent = os.path.dirname(parent)
+                cache.pop(parent, None)
+
+            # a known regular file has no descendants
+            if entry and entry[1]['type'] == 'file':
+                return
+
+            prefix = path.rstrip('/') + '/'
+            for key in [k for k in cache if k.startswith(prefix)]:
+                del cache[key]
+
+
 ###############################################################################
 #
 class ShellDirectory(cpi_fs.Directory):
@@ -210,6 +481,10 @@ class ShellDirectory(cpi_fs.Directory):
         _cpi_base = super(ShellDirectory, self)
         _cpi_base.__init__(api, adaptor)
 
+        # copy tasks on this directory can be bulk-handled, see
+        # `container_copy()`
+        self._set_container(self)
+
 
     # --------------------------------------------------------------------------
     #
@@ -233,6 +508,8 @@ class ShellDirectory(cpi_fs.Directory):
         ret     = None
         out     = None
 
+        self._invalidate(dirname, base=tgt)
+
         if  rsumisc.url_is_compatible(cwdurl, tgt):
 
             ret, out, _ = self._command(" mkdir -p '%s'\n" % (dirname),
@@ -250,7 +527,7 @@ class ShellDirectory(cpi_fs.Directory):
         else:
             lease_tgt = self._adaptor.get_lease_target(tgt)
             with self.lm.lease(lease_tgt, self.shell_creator, tgt) as tmp_shell:
-                tmp_shell.run_sync('mkdir -p %s' % dirname)
+                tmp_shell.run_sync("mkdir -p '%s'" % dirname)
 
 
     # --------------------------------------------------------------------------
@@ -299,14 +576,68 @@ class ShellDirectory(cpi_fs.Directory):
              as cmd_shell:
 
             if  make_location and location.path:
-                pre_cmd = "mkdir -p %s &&" % location.path
+                pre_cmd = "mkdir -p '%s' &&" % location.path
             else:
                 pre_cmd = ""
 
-            return cmd_shell.run_sync("%s cd %s && %s"
+            return cmd_shell.run_sync("%s cd '%s' && %s"
                                      % (pre_cmd, location.path, command))
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _abs_url(self, tgt_in):
+
+        tgt = rsurl.Url(tgt_in)  # deep copy
+
+        if  not tgt.path:
+            tgt.path = self.url.path or '/'
+
+        if  rsumisc.url_is_relative(tgt):
+            tgt = rsumisc.url_make_absolute(self.url, tgt)
+
+        return tgt
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _stat(self, tgt_in):
+        """
+        Return stat info for the given target (see `_stat_parse()`), from the
+        adaptor's stat cache if possible.
+        """
+
+        tgt  = self._abs_url(tgt_in)
+        info = self._adaptor.stat_cache_get(self.url, tgt.path)
+
+        if  info is None:
+            _, out, _ = self._command(_STAT_CMD % {'path': tgt.path})
+            info = _stat_parse(out)
+            self._adaptor.stat_cache_set(self.url, tgt.path, info)
+
+        return info
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _invalidate(self, tgt_in, base=None):
+        """
+        Drop stat cache entries affected by a change of the given target.
+        """
+
+        if  base is None:
+            base = self.url
+
+        tgt = rsurl.Url(tgt_in)  # deep copy
+        if  rsumisc.url_is_relative(tgt):
+            tgt = rsumisc.url_make_absolute(base, tgt)
+
+        if  rsumisc.url_is_compatible(base, tgt):
+            self._adaptor.stat_cache_invalidate(base, tgt.path)
+        else:
+            self._adaptor.stat_cache_invalidate(tgt, tgt.path)
+
+
     # --------------------------------------------------------------------------
     #
     def initialize(self):
@@ -339,6 +670,9 @@ class ShellDirectory(cpi_fs.Directory):
         else:
             ret, out, _ = self._command(cmd, make_location=mkl)
 
+        if  self.flags & (c.CREATE | c.CREATE_PARENTS):
+            self._invalidate(self.url)
+
         if  ret:
             raise rse.BadParameter("invalid dir '%s': %s" % (path, out))
 
@@ -418,6 +752,9 @@ class ShellDirectory(cpi_fs.Directory):
 
         ret, out, _ = self._command(cmd)
 
+        if  flags & (c.CREATE | c.CREATE_PARENTS):
+            self._invalidate(tgturl)
+
         if  ret:
             raise rse.BadParameter("invalid dir '%s': %s" % (cwdurl, tgturl))
 
@@ -477,6 +814,137 @@ class ShellDirectory(cpi_fs.Directory):
         return self.entries
 
 
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def list_entries(self, npat, flags):
+
+        self._is_valid()
+
+        # FIXME: eval flags
+
+        # like `list()`, we skip hidden entries unless a pattern asks for them
+        if  npat is None:
+            cmd = _LIST_CMD % {'start' : '.',
+                               'depth' : "-mindepth 1 -maxdepth 1 ! -name '.*'",
+                               'name'  : '%P'}
+        else:
+            cmd = _LIST_CMD % {'start' : npat,
+                               'depth' : '-maxdepth 0',
+                               'name'  : '%p'}
+
+        ret, out, _ = self._command(cmd + '\n')
+
+        if  ret:
+            raise rse.NoSuccess("failed to list_entries(): (%s)(%s)"
+                           % (ret, out))
+
+        entries = list()
+        for name, info, target in _list_parse(out):
+
+            path = os.path.join(self.url.path or '/', name)
+            self._adaptor.stat_cache_set(self.url, path, info)
+
+            entry = dict(info)
+            entry['url']    = rsurl.Url(name)
+            entry['target'] = target
+            entries.append(entry)
+
+        return entries
+
+
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def walk(self, npat, flags):
+
+        self._is_valid()
+
+        # FIXME: eval flags
+
+        if  npat is None:
+            cmd = _WALK_CMD % {'filter' : ''}
+        else:
+            cmd = _WALK_CMD % {'filter' : "-name '%s'" % npat}
+
+        # the generator only starts the remote command when first iterated
+        return self._walk(cmd)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _walk(self, cmd):
+        """
+        Run the given walk command on a leased shell, and yield entries while
+        the command output streams in.  The shell stays leased until the walk
+        completes or the generator is closed.  Walk results are *not* added to
+        the stat cache, so that memory consumption stays constant for large
+        trees.
+        """
+
+        lease_tgt = self._adaptor.get_lease_target(self.url)
+
+        with self.lm.lease(lease_tgt, self.shell_creator, self.url) as shell:
+
+            shell.run_async(" cd '%s' && %s" % (self.url.path, cmd))
+
+            done    = False
+            found   = 0
+            errors  = list()
+
+            try:
+                while not done:
+
+                    # get either all complete lines received so far, or the
+                    # remaining output up to the prompt
+                    fret, match = shell.find([shell.prompt, r'.*\n'],
+                                             timeout=-1)
+
+                    if  fret == 0:
+                        ret, txt = shell._eval_prompt(match)
+                        done     = True
+                    else:
+                        txt      = match
+
+                    for line in txt.split('\n'):
+
+                        if not line:
+                            continue
+
+                        res = _walk_parse(line)
+
+                        if  res is None:
+                            # most likely an error message: keep the last few
+                            errors = (errors + [line])[-10:]
+                            continue
+
+                        name, info, target = res
+
+                        entry = dict(info)
+                        entry['url']    = rsurl.Url(name)
+                        entry['target'] = target
+
+                        found += 1
+                        yield entry
+
+            finally:
+                if  not done:
+                    # the consumer stopped early: interrupt the remote command
+                    # and re-sync with the shell prompt
+                    try:
+                        shell.send('\x03')
+                        shell.find_prompt()
+                    except Exception:
+                        shell.finalize(kill_pty=True)
+
+            if  ret:
+                if  not found:
+                    raise rse.NoSuccess("failed to walk(): (%s)(%s)"
+                                       % (ret, '\n'.join(errors)))
+                self._logger.warning("walk() incomplete: (%s)(%s)"
+                                    % (ret, '\n'.join(errors)))
+
+
     # --------------------------------------------------------------------------
     #
     @SYNC_CALL
@@ -513,6 +981,8 @@ class ShellDirectory(cpi_fs.Directory):
 
         files_copied = list()
 
+        self._invalidate(tgt)
+
         # if cwd, src and tgt point to the same host, we just run a shell cp
         # command on that host
         if  rsumisc.url_is_compatible(cwdurl, src) and \
@@ -616,6 +1086,223 @@ class ShellDirectory(cpi_fs.Directory):
         return files_copied
 
 
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def copy_many(self, pairs, flags):
+
+        self._is_valid()
+
+        cwdurl   = rsurl.Url(self.url)  # deep copy
+        results  = [None] * len(pairs)
+        mkp      = bool(flags & (c.CREATE | c.CREATE_PARENTS))
+        rec_flag = ""
+        if  flags & c.RECURSIVE:
+            rec_flag  += "-r "
+
+        # sort the pairs into copies on the directory's host, and into stagings
+        # to / from other hosts (keyed by lease target and direction)
+        on_host = list()
+        staging = dict()
+
+        for idx, (src_in, tgt_in) in enumerate(pairs):
+
+            src = rsurl.Url(src_in)  # deep copy
+            tgt = rsurl.Url(tgt_in)  # deep copy
+
+            if rsumisc.url_is_relative(src):
+                src = rsumisc.url_make_absolute(cwdurl, src)
+            if rsumisc.url_is_relative(tgt):
+                tgt = rsumisc.url_make_absolute(cwdurl, tgt)
+
+            self._invalidate(tgt)
+
+            remote = None
+            mode   = None
+
+            if  rsumisc.url_is_compatible(cwdurl, src) and \
+                rsumisc.url_is_compatible(cwdurl, tgt):
+                on_host.append((idx, src.path, tgt.path))
+                continue
+
+            if  not rsumisc.url_is_local(cwdurl):
+                if  rsumisc.url_is_local(src) and \
+                    rsumisc.url_is_compatible(cwdurl, tgt):
+                    remote, mode = cwdurl, 'to'
+                elif rsumisc.url_is_local(tgt) and \
+                     rsumisc.url_is_compatible(cwdurl, src):
+                    remote, mode = cwdurl, 'from'
+
+            elif rsumisc.url_is_local(src):
+                if  not tgt.scheme or \
+                    tgt.scheme.lower() in _ADAPTOR_SCHEMAS:
+                    remote, mode = tgt, 'to'
+
+            elif rsumisc.url_is_local(tgt):
+                if  not src.scheme or \
+                    src.scheme.lower() in _ADAPTOR_SCHEMAS:
+                    remote, mode = src, 'from'
+
+            if  not remote:
+                results[idx] = rse.BadParameter("unsupported copy %s to %s"
+                                               % (src, tgt))
+                continue
+
+            key = (str(self._adaptor.get_lease_target(remote)), mode)
+            if  key not in staging:
+                staging[key] = [remote, list()]
+            staging[key][1].append((idx, src.path, tgt.path))
+
+        if  on_host:
+            self._copy_on_host(on_host, rec_flag, mkp, results)
+
+        for (_, mode), (remote, copies) in staging.items():
+
+            cp_pairs  = [(src, tgt) for _, src, tgt in copies]
+            lease_tgt = self._adaptor.get_lease_target(remote)
+
+            try:
+                with self.lm.lease(lease_tgt, self.shell_creator, remote) \
+                    as copy_shell:
+
+                    if  mode == 'to':
+                        res = copy_shell.run_copy_many_to(cp_pairs, rec_flag,
+                                                          make_parents=mkp)
+                    else:
+                        res = copy_shell.run_copy_many_from(cp_pairs, rec_flag,
+                                                            make_parents=mkp)
+            except Exception as e:
+                res = [e] * len(copies)
+
+            for (idx, _, _), r in zip(copies, res):
+                results[idx] = r
+
+        return results
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _copy_on_host(self, copies, rec_flag, mkp, results):
+        """
+        Run the given `(idx, src, tgt)` copies on the directory's host, with
+        a single script which reports failed copies.  Errors are stored in
+        `results[idx]`.
+        """
+
+        script = list()
+
+        if  mkp:
+            for path in sorted(set([os.path.dirname(tgt)
+                                    for _, _, tgt in copies])):
+                if  path:
+                    script.append("mkdir -p '%s' 2>/dev/null" % path)
+
+        for idx, src, tgt in copies:
+            script.append("msg=$(cp %s '%s' '%s' 2>&1) "
+                          "|| echo \"RS_COPY_FAILED %d $msg\""
+                          % (rec_flag, src, tgt, idx))
+
+        fname     = '/tmp/rs_copy_many.%s.sh' % uuid.uuid4()
+        lease_tgt = self._adaptor.get_lease_target(self.url)
+
+        with self.lm.lease(lease_tgt, self.shell_creator, self.url) as shell:
+
+            shell.write_to_remote('\n'.join(script) + '\n', fname)
+            ret, out, _ = shell.run_sync(" /bin/sh '%s'; rm -f '%s'"
+                                        % (fname, fname))
+
+        if  ret:
+            for idx, _, _ in copies:
+                results[idx] = rse.NoSuccess("copy failed (%s): %s"
+                                            % (ret, out))
+            return
+
+        for line in out.split('\n'):
+
+            elems = line.strip().split(' ', 2)
+
+            if  len(elems) < 2 or elems[0] != 'RS_COPY_FAILED':
+                continue
+
+            idx = int(elems[1])
+            msg = elems[2] if len(elems) > 2 else ''
+
+            if  'No such file' in msg:
+                results[idx] = rse.DoesNotExist("copy failed: %s" % msg)
+            else:
+                results[idx] = rse.NoSuccess("copy failed: %s" % msg)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_copy(self, tasks):
+        """
+        Run the copy operations of all given tasks as bulk, via `copy_many()`.
+        """
+
+        # tasks with the same flags go into the same bulk
+        bulks = dict()
+        for task in tasks:
+
+            args   = list(task._method_context.get('_args',   list()))
+            kwargs = task._method_context.get('_kwargs', dict())
+
+            src   = args[0] if len(args) > 0 else kwargs.get('src_in')
+            tgt   = args[1] if len(args) > 1 else kwargs.get('tgt_in')
+            flags = args[2] if len(args) > 2 else kwargs.get('flags', 0)
+
+            bulks.setdefault(flags or 0, list()).append((task, src, tgt))
+
+        for flags, bulk in bulks.items():
+
+            for task, _, _ in bulk:
+                task._set_state(rsc.RUNNING)
+
+            try:
+                results = self.copy_many([(src, tgt) for _, src, tgt in bulk],
+                                         flags)
+            except Exception as e:
+                results = [e] * len(bulk)
+
+            for (task, _, _), res in zip(bulk, results):
+
+                # the task is completed here, not by its own future
+                task._future = None
+
+                if  res:
+                    task._set_exception(res)
+                    task._set_state(rsc.FAILED)
+                else:
+                    task._set_result(list())
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_wait(self, tasks, mode, timeout):
+
+        # FIXME: we ignore the wait mode(ALL/ANY), and always wait for all
+        #        tasks...
+        for task in tasks:
+            if  task.get_state() not in rsc.FINAL:
+                task.wait(timeout)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_cancel(self, tasks, timeout):
+
+        for task in tasks:
+            if  task.get_state() not in rsc.FINAL:
+                task.cancel()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_get_states(self, tasks):
+
+        return [task.get_state() for task in tasks]
+
+
     # --------------------------------------------------------------------------
     #
     @SYNC_CALL
@@ -653,6 +1340,7 @@ class ShellDirectory(cpi_fs.Directory):
         if  rsumisc.url_is_compatible(cwdurl, src) and \
             rsumisc.url_is_compatible(cwdurl, tgt):
 
+            self._invalidate(tgt)
             ret, out, err = self._command(" ln -s '%s' '%s'\n"
                                          % (src.path, tgt.path))
             if ret:
@@ -723,6 +1411,7 @@ class ShellDirectory(cpi_fs.Directory):
 
         if  rsumisc.url_is_compatible(cwdurl, tgt):
 
+            self._invalidate(tgt)
             ret, out, err = self._command(" rm -f %s '%s'\n"
                                          % (rec_flag, tgt.path))
             if ret:
@@ -758,6 +1447,7 @@ class ShellDirectory(cpi_fs.Directory):
         if flags & c.CREATE_PARENTS:
             opt = "-p"
 
+        self._invalidate(tgt)
         ret, out, err = self._command(" %s mkdir %s '%s'"
                                      % (chk, opt, path), make_location=True)
 
@@ -788,19 +1478,32 @@ class ShellDirectory(cpi_fs.Directory):
 
         self._is_valid()
 
-        tgt = rsurl.Url(tgt_in)  # deep copy
+        tgt  = self._abs_url(tgt_in)
+        info = self._stat(tgt)
 
-        ret, out, err = self._command(" du -ks '%s' | xargs | cut -f 1 -d ' '\n"
-                                     % tgt.path)
-        if ret:
-            raise rse.NoSuccess("get size for (%s) failed (%s): %s [%s]"
-                                % (tgt, ret, out, err))
+        if  not info['exists']:
+            raise rse.NoSuccess("get size for (%s) failed: does not exist" % tgt)
 
-        try:
-            return int(out) * 1024  # see '-k' option to 'du'
-        except Exception as e:
-            raise rse.NoSuccess("could not get file size: %s (%s)" % (out, e)) \
-                  from e
+        if  info['type'] != 'dir':
+            return info['size']
+
+        # directory sizes are determined recursively, and are also cached
+        if  info.get('dsize') is None:
+
+            ret, out, err = self._command(
+                                " du -ks '%s' | xargs | cut -f 1 -d ' '\n"
+                                % tgt.path)
+            if ret:
+                raise rse.NoSuccess("get size for (%s) failed (%s): %s [%s]"
+                                    % (tgt, ret, out, err))
+
+            try:
+                info['dsize'] = int(out) * 1024  # see '-k' option to 'du'
+            except Exception as e:
+                raise rse.NoSuccess("could not get file size: %s (%s)"
+                                    % (out, e)) from e
+
+        return info['dsize']
 
 
     # --------------------------------------------------------------------------
@@ -820,12 +1523,7 @@ class ShellDirectory(cpi_fs.Directory):
 
         self._is_valid()
 
-        tgt = rsurl.Url(tgt_in)  # deep copy
-
-        ret, out, _ = self._command(" test -e '%s'" % tgt.path)
-
-        if ret: return False
-        else  : return True
+        return self._stat(tgt_in)['exists']
 
 
     # ----------------------------------------------------------------
@@ -845,16 +1543,7 @@ class ShellDirectory(cpi_fs.Directory):
 
         self._is_valid()
 
-        tgt  = rsurl.Url(tgt_in)  # deep copy
-        path = tgt.path
-        if not path:
-            path = '.'
-
-        ret, out, _ = self._command(" test -d '%s' && test ! -h '%s'"
-                    % (path, path))
-
-        if ret: return False
-        else  : return True
+        return self._stat(tgt_in)['type'] == 'dir'
 
 
     # --------------------------------------------------------------------------
@@ -874,12 +1563,7 @@ class ShellDirectory(cpi_fs.Directory):
 
         self._is_valid()
 
-        tgt = rsurl.Url(tgt_in)  # deep copy
-
-        ret, out, _ = self._command(" test -f '%s' && test ! -h '%s'"
-                                   % (tgt.path, tgt.path))
-        if ret: return False
-        else  : return True
+        return self._stat(tgt_in)['type'] == 'file'
 
 
     # --------------------------------------------------------------------------
@@ -899,12 +1583,7 @@ class ShellDirectory(cpi_fs.Directory):
 
         self._is_valid()
 
-        tgt = rsurl.Url(tgt_in)  # deep copy
-
-        ret, out, _ = self._command(" test -h '%s'" % tgt.path)
-
-        if ret: return False
-        else  : return True
+        return self._stat(tgt_in)['type'] == 'link'
 
 
     # --------------------------------------------------------------------------
@@ -956,6 +1635,10 @@ class ShellFile(cpi_fs.File):
     def _create_parent(self, cwdurl, tgt):
 
         dirname = rsumisc.url_get_dirname(tgt)
+        parent  = rsurl.Url(tgt)
+        parent.path = dirname
+
+        self._invalidate(parent)
 
         if rsumisc.url_is_compatible(cwdurl, tgt):
 
@@ -976,7 +1659,7 @@ class ShellFile(cpi_fs.File):
 
             lease_tgt = self._adaptor.get_lease_target(tgt)
             with self.lm.lease(lease_tgt, self.shell_creator, tgt) as tmp_shell:
-                tmp_shell.run_sync('mkdir -p %s' % dirname)
+                tmp_shell.run_sync("mkdir -p '%s'" % dirname)
 
 
     # --------------------------------------------------------------------------
@@ -991,7 +1674,47 @@ class ShellFile(cpi_fs.File):
 
         with self.lm.lease(lease_tgt, self.shell_creator, self.cwdurl) as shell:
 
-            return shell.run_sync("cd %s && %s\n" % (cwd_path, cmd))
+            return shell.run_sync("cd '%s' && %s\n" % (cwd_path, cmd))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _stat(self):
+        """
+        Return stat info for this file (see `_stat_parse()`), from the
+        adaptor's stat cache if possible.
+        """
+
+        path = self.url.path
+        info = self._adaptor.stat_cache_get(self.cwdurl, path)
+
+        if  info is None:
+            _, out, _ = self._run_sync(_STAT_CMD % {'path': path})
+            info = _stat_parse(out)
+            self._adaptor.stat_cache_set(self.cwdurl, path, info)
+
+        return info
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _invalidate(self, tgt_in=None):
+        """
+        Drop stat cache entries affected by a change of the given target (or of
+        this file).
+        """
+
+        if  tgt_in is None:
+            tgt_in = self.url
+
+        tgt = rsurl.Url(tgt_in)  # deep copy
+        if  rsumisc.url_is_relative(tgt):
+            tgt = rsumisc.url_make_absolute(self.cwdurl, tgt)
+
+        if  rsumisc.url_is_compatible(self.cwdurl, tgt):
+            self._adaptor.stat_cache_invalidate(self.cwdurl, tgt.path)
+        else:
+            self._adaptor.stat_cache_invalidate(tgt, tgt.path)
 
 
     # --------------------------------------------------------------------------
@@ -1081,6 +1804,9 @@ class ShellFile(cpi_fs.File):
         else:
             cmd = " true"
 
+        if  self.flags & c.TRUNCATE:
+            cmd += "; : > '%s'" % (self.url.path)
+
 
         if  self.flags & c.READ:
             cmd += "; test -r '%s'" % (self.url.path)
@@ -1088,6 +1814,9 @@ class ShellFile(cpi_fs.File):
         if  self.flags & c.WRITE:
             cmd += "; test -w '%s'" % (self.url.path)
 
+        if  self.flags & (c.CREATE | c.CREATE_PARENTS | c.TRUNCATE):
+            self._invalidate()
+
         ret, out, _ = self._run_sync(cmd)
 
         if  ret:
@@ -1103,6 +1832,8 @@ class ShellFile(cpi_fs.File):
 
         self._logger.info("file initialized (%s)(%s)" % (ret, out))
 
+        # current byte offset for read/write -- `None` means end of file
+        self._pos  = 0
         self.valid = True
 
 
@@ -1161,6 +1892,8 @@ class ShellFile(cpi_fs.File):
         if  flags & c.CREATE_PARENTS:
             self._create_parent(cwdurl, tgt)
 
+        self._invalidate(tgt)
+
         # if cwd, src and tgt point to the same host, we just run a shell cp
         # command on that host
         if  rsumisc.url_is_compatible(cwdurl, src) and \
@@ -1271,6 +2004,7 @@ class ShellFile(cpi_fs.File):
         if  rsumisc.url_is_compatible(cwdurl, src) and \
             rsumisc.url_is_compatible(cwdurl, tgt):
 
+            self._invalidate(tgt)
             ret, out, err = self._run_sync(" ln -s '%s' '%s'\n"
                                           % (src.path, tgt.path))
             if  ret:
@@ -1297,17 +2031,28 @@ class ShellFile(cpi_fs.File):
         self.initialize()
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _offset(self):
+
+        if  self._pos is None:
+            self._pos = self.get_size_self()
+
+        return self._pos
+
+
     # --------------------------------------------------------------------------
     #
     @SYNC_CALL
     def write(self, string, flags=None):
         """
-        This call is intended to write a string to a local or remote file.
-        Since write() uses file staging calls, it cannot be used to randomly
-        write certain parts of a file (i.e. seek()). Together with read(),
-        it was designed to manipulate template files and write them back to
-        the remote directory. Be aware, that writing large files will
-        be very slow compared to native read(2) and write(2) calls.
+        Write a string at the current file position, and return the number of
+        bytes written.  If the file was opened with the APPEND flag, the
+        string is appended to the file instead.
+
+        Writes only overwrite the respective byte range (via `dd` on the
+        remote host), and never truncate the file -- open the file with the
+        TRUNCATE flag to discard its previous content.
         """
         self._is_valid()
         if  flags is None:
@@ -1315,45 +2060,70 @@ class ShellFile(cpi_fs.File):
         else:
             self.flags = flags
 
-        tgt = rsurl.Url(self.url)  # deep copy, is absolute
-
-        # FIXME: AM: this is stupid and wrong
-        if  flags == c.APPEND:
-            string = self.read() + string
+        tgt    = rsurl.Url(self.url)  # deep copy, is absolute
+        append = bool(flags & c.APPEND)
+        offset = 0 if append else self._offset()
 
         lease_tgt = self._adaptor.get_lease_target(self.cwdurl)
 
+        self._invalidate()
+
         with self.lm.lease(lease_tgt, self.shell_creator, self.cwdurl) as shell:
-            shell.write_to_remote(string, tgt.path)
+            shell.write_to_remote(string, tgt.path, offset=offset, append=append)
+
+        size = len(str.encode(string))
+
+        if  append: self._pos = None
+        else      : self._pos = offset + size
+
+        return size
 
 
     # --------------------------------------------------------------------------
     #
     @SYNC_CALL
-    def read(self,size=None):
+    def read(self, size=None):
         """
-        This call is intended to read a string wit length size from a local
-        or remote file.	Since read() uses file staging calls, it cannot be
-        used to randomly read certain parts of a file (i.e. seek()).
-        Together with write(), it was designed to manipulate template files
-        and write them back to the remote directory. Be aware, that reading
-        large files will be very slow compared to native read(2) and write(2)
-        calls.
+        Read up to `size` bytes from the current file position (or all data up
+        to the end of the file if `size` is not given).  Only the requested
+        bytes are transferred from the remote host -- plus the rest of a
+        multibyte character split at the end of the range, which is returned
+        completely.
         """
 
         self._is_valid()
 
         lease_tgt = self._adaptor.get_lease_target(self.cwdurl)
         tgt       = rsurl.Url(self.url)  # deep copy, is absolute
+        offset    = self._offset()
 
         with self.lm.lease(lease_tgt, self.shell_creator, self.cwdurl) as shell:
-            out = shell.read_from_remote(tgt.path)
+            out = shell.read_from_remote(tgt.path, offset=offset, size=size)
+
+        self._pos = offset + len(str.encode(out))
+
+        return out
 
-        if size is None:
-            return out
+
+    # --------------------------------------------------------------------------
+    #
+    @SYNC_CALL
+    def seek(self, off, whence):
+
+        self._is_valid()
+
+        if   whence == c.START  : pos = off
+        elif whence == c.CURRENT: pos = self._offset()      + off
+        elif whence == c.END    : pos = self.get_size_self() + off
         else:
-            return out[0:size - 1]
+            raise rse.BadParameter("invalid seek mode '%s'" % whence)
+
+        if  pos < 0:
+            raise rse.BadParameter("cannot seek to offset %d" % pos)
+
+        self._pos = pos
 
+        return pos
 
 
     # --------------------------------------------------------------------------
@@ -1372,6 +2142,8 @@ class ShellFile(cpi_fs.File):
         if  flags & c.RECURSIVE:
             rec_flag += "-r "
 
+        self._invalidate()
+
         ret, out, _ = self._run_sync(" rm -f %s '%s'\n" % (rec_flag, tgt.path))
         if  ret:
             raise rse.NoSuccess("remove (%s) failed (%s): (%s)"
@@ -1384,32 +2156,34 @@ class ShellFile(cpi_fs.File):
     def get_size_self(self):
 
         self._is_valid()
-        size      = None
-        size_mult = 1
-        ret       = None
-        out       = None
 
-        if  self.is_dir_self():
-            size_mult   = 1024   # see '-k' option to 'du'
+        info = self._stat()
+
+        if  not info['exists']:
+            raise rse.NoSuccess("get size for (%s) failed: does not exist"
+                               % self.url)
+
+        if  info['type'] != 'dir':
+            return info['size']
+
+        # directory sizes are determined recursively, and are also cached
+        if  info.get('dsize') is None:
+
             ret, out, _ = self._run_sync(
                           " du -ks '%s' | xargs | cut -f 1 -d ' '\n"
                           % self.url.path)
-        else:
-            ret, out, _ = self._run_sync(
-                          " wc -c '%s' | xargs | cut -f 1 -d ' '\n"
-                          % self.url.path)
 
-        if  ret:
-            raise rse.NoSuccess("get size for (%s) failed (%s): (%s)"
-                           % (self.url, ret, out))
+            if  ret:
+                raise rse.NoSuccess("get size for (%s) failed (%s): (%s)"
+                               % (self.url, ret, out))
 
-        try:
-            size = int(out) * size_mult
-        except Exception as e:
-            raise rse.NoSuccess("could not get file size: %s (%s)" % (out, e)) \
-                  from e
+            try:
+                info['dsize'] = int(out) * 1024  # see '-k' option to 'du'
+            except Exception as e:
+                raise rse.NoSuccess("could not get file size: %s (%s)"
+                                    % (out, e)) from e
 
-        return size
+        return info['dsize']
 
 
     # --------------------------------------------------------------------------
@@ -1419,16 +2193,7 @@ class ShellFile(cpi_fs.File):
 
         self._is_valid()
 
-        cwdurl = rsurl.Url(self.url)  # deep copy
-        path   = cwdurl.path
-        if not path:
-            path = '.'
-
-        ret, out, _ = self._run_sync(" test -d '%s' && test ! -h '%s'"
-                    % (path, path))
-
-        if ret == 0: return True
-        else       : return False
+        return self._stat()['type'] == 'dir'
 
 
     # --------------------------------------------------------------------------
@@ -1438,12 +2203,7 @@ class ShellFile(cpi_fs.File):
 
         self._is_valid()
 
-        cwdurl = rsurl.Url(self.url)  # deep copy
-
-        ret, out, _ = self._run_sync(" test -f '%s' && test ! -h '%s'"
-                                    % (cwdurl.path, cwdurl.path))
-
-        return True if ret == 0 else False
+        return self._stat()['type'] == 'file'
 
 
     # --------------------------------------------------------------------------
@@ -1453,11 +2213,7 @@ class ShellFile(cpi_fs.File):
 
         self._is_valid()
 
-        cwdurl = rsurl.Url(self.url)  # deep copy
-
-        ret, out, _ = self._run_sync(" test -h '%s'" % cwdurl.path)
-
-        return True if ret == 0 else False
+        return self._stat()['type'] == 'link'
 
 
     # --------------------------------------------------------------------------
@@ -1467,12 +2223,7 @@ class ShellFile(cpi_fs.File):
 
         self._is_valid()
 
-        cwdurl = rsurl.Url(self.url)  # deep copy
-
-        ret, out, _ = self._run_sync(" test -f '%s' && test ! -h '%s'"
-                                    % (cwdurl.path, cwdurl.path))
-
-        return True if ret == 0 else False
+        return self._stat()['type'] == 'file'
 
 
 # ------------------------------------------------------------------------------
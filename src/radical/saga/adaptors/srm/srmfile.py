@@ -1,10 +1,14 @@
 """ Local filesystem adaptor implementation """
 
 import os
+import time
+import queue
+import threading
 
 import radical.utils as ru
 
 from ...             import exceptions as rse
+from ...             import constants  as rsc
 from ...utils        import pty_shell  as sups
 from ...adaptors     import base       as rsab
 from ...adaptors.cpi import filesystem as cpi
@@ -71,6 +75,10 @@ OPERATION_TIMEOUT  = 3600  # Should be greater or equal than TRANSFER_TIMEOUT
 CONNECTION_TIMEOUT = 180   # Technically same as OPERATION_TIMEOUT,
                            # but used for non-transfer operations.
 
+# copy errors which are not worth a retry
+PERMANENT_ERRORS   = (rse.DoesNotExist, rse.AlreadyExists, rse.BadParameter,
+                      rse.AuthorizationFailed, rse.AuthenticationFailed)
+
 ###############################################################################
 # The adaptor class
 
@@ -84,15 +92,141 @@ class Adaptor(rsab.Base):
     def __init__(self) :
 
         rsab.Base.__init__(self, _ADAPTOR_INFO, _ADAPTOR_OPTIONS)
-        self.pty_url = self._cfg.get('pty_url', 'fork://localhost/')
+        self.pty_url     = self._cfg.get('pty_url', 'fork://localhost/')
+
+        # bulk copies (see `srm_copy_many()`) run over a pool of shells per
+        # session, and are retried on transient errors
+        self.concurrency = int(self._cfg.get('copy_concurrency', 4))
+        self.retries     = int(self._cfg.get('copy_retries', 2))
+        self.bulk        = str(self._cfg.get('copy_bulk', '')).lower() \
+                                                  in ['true', 'yes', '1']
+        self.shells      = dict()
+
+        # stat info by URL, see `stat_cache_*()`.  A TTL of `0` disables the
+        # cache.
+        self.stat_cache  = dict()
+        self.stat_ttl    = float(self._cfg.get('stat_cache_ttl', 10.0))
 
 
     def sanity_check(self):
         pass
 
 
+    # --------------------------------------------------------------------------
+    #
+    def url_str(self, url):
+
+        if isinstance(url, (api.File, api.Directory)):
+            url = url.get_url()
+
+        return str(url)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def srm_child(self, url, name):
+
+        # the SURL is either in the query (SFN=...) or in the URL path
+        url = ru.Url(url)
+        if url.query and url.query.startswith('SFN='):
+            url.query = 'SFN=%s' % os.path.join(url.query[4:], name)
+        else:
+            url.path  = os.path.join(url.path or '/', name)
+
+        return str(url)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def srm_parse_long(self, entry):
+
+        # -rw-r--r-- 1 45 44 19 May 30 15:29 name
+        fields = entry.split(None, 8)
+        if len(fields) < 5:
+            raise rse.NoSuccess("cannot parse listing: '%s'" % entry)
+
+        mode = fields[0][0]
+        if mode == '-':
+            mode = 'file'
+        elif mode == 'd':
+            mode = 'dir'
+        elif mode == 'l':
+            mode = 'link'
+        else:
+            raise rse.BadParameter("stat() unknown mode: '%s' (%s)" % (mode, entry))
+
+        name = fields[8].strip() if len(fields) > 8 else ''
+
+        return name, {'mode': mode,
+                      'size': int(fields[4])}
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_get(self, url):
+
+        if not self.stat_ttl:
+            return None
+
+        with self._lock:
+
+            key   = self.url_str(url)
+            entry = self.stat_cache.get(key)
+
+            if not entry:
+                return None
+
+            if time.time() - entry[0] > self.stat_ttl:
+                del self.stat_cache[key]
+                return None
+
+            return entry[1]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_set(self, url, info):
+
+        if not self.stat_ttl:
+            return
+
+        with self._lock:
+
+            now = time.time()
+            self.stat_cache[self.url_str(url)] = [now, info]
+
+            # purge expired entries once in a while
+            if len(self.stat_cache) > 1024:
+                for key in [k for k, v in self.stat_cache.items()
+                                   if now - v[0] > self.stat_ttl]:
+                    del self.stat_cache[key]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def stat_cache_invalidate(self, url):
+
+        # drop the entry, and everything below it
+        if not self.stat_ttl:
+            return
+
+        key = self.url_str(url)
+
+        with self._lock:
+
+            self.stat_cache.pop(key, None)
+
+            prefix = key.rstrip('/') + '/'
+            for k in [k for k in self.stat_cache if k.startswith(prefix)]:
+                del self.stat_cache[k]
+
+
     def file_get_size(self, shell, url):
 
+        info = self.stat_cache_get(url)
+        if info:
+            return info['size']
+
         try:
             # Following columns are displayed for each entry:
             # mode, number of links, group id, userid, size, last modification time, and name.
@@ -107,11 +241,11 @@ class Adaptor(rsab.Base):
             else:
                 raise Exception("Couldn't list file")
 
-        fields = out.split()
         # -rw-r--r-- 1 45 44 19 May 30 15:29 srm://osg-se.sprace.org.br:8443/srm/managerv2?SFN=/pnfs/sprace.org.br/data/osg/marksant/TESTFILE
-        _, _, _, _, size_str, _, _, _, _ = fields
+        _, info = self.srm_parse_long(out.strip())
+        self.stat_cache_set(url, info)
 
-        return int(size_str)
+        return info['size']
 
 
     def srm_stat(self, shell, url):
@@ -120,6 +254,10 @@ class Adaptor(rsab.Base):
         # file mode, number of links to the file, user id, group id, file size(bytes), locality, file name.
         # srm://srm.hep.fiu.edu:8443/srm/v2/server?SFN=/mnt/hadoop/osg/marksant/TESTFILE")
         # -rwxr-xr-x   1     1     2      19               ONLINE /mnt/hadoop/osg/marksant/TESTFILE
+        info = self.stat_cache_get(url)
+        if info:
+            return info
+
         try:
             # Following columns are displayed for each entry:
             # mode, number of links, group id, userid, size, last modification time, and name.
@@ -161,11 +299,13 @@ class Adaptor(rsab.Base):
             raise rse.BadParameter("stat() unknown mode: '%s' (%s)" % (mode, out))
 
         size = int(size_str)
-
-        return {
+        info = {
             'mode': mode,
             'size': size
         }
+        self.stat_cache_set(url, info)
+
+        return info
 
 
     # --------------------------------------------------------------------------
@@ -176,6 +316,9 @@ class Adaptor(rsab.Base):
             src = src.__str__()
         if isinstance(dst, api.file.File):
             dst = dst.get_url()
+
+        self.stat_cache_invalidate(dst)
+
         try:
             rc, out, _ = shell.run_sync('gfal-copy --parent --timeout %d --transfer-timeout %d %s %s' % (
                 OPERATION_TIMEOUT, TRANSFER_TIMEOUT, src, dst))
@@ -184,14 +327,270 @@ class Adaptor(rsab.Base):
             raise Exception("transfer failed") from e
 
         if rc != 0:
-            if 'SRM_INVALID_PATH' in out:
-                raise rse.DoesNotExist(src)
-            elif '(File exists)' in out:
-                raise rse.AlreadyExists(dst)
-            elif 'Could not open destination' in out:
-                raise rse.DoesNotExist(dst)
+            raise self.srm_copy_error(out, src, dst)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def srm_copy_error(self, out, src, dst):
+
+        if 'SRM_INVALID_PATH' in out:
+            return rse.DoesNotExist(src)
+        elif '(File exists)' in out:
+            return rse.AlreadyExists(dst)
+        elif 'Could not open destination' in out:
+            return rse.DoesNotExist(dst)
+        else:
+            return rse.NoSuccess("Copy failed.")
+
+
+    # --------------------------------------------------------------------------
+    #
+    def srm_copy_bulk(self, shell, srcs, dst_dir):
+        """
+        Copy all given sources into `dst_dir` with a single `gfal-copy
+        --from-file` call, and return a list with `None` for each successful
+        copy, and the respective exception otherwise.
+        """
+
+        for src in srcs:
+            self.stat_cache_invalidate(self.srm_child(dst_dir, os.path.basename(src)))
+
+        try:
+            rc, out, _ = shell.run_sync('mktemp')
+            if rc != 0:
+                raise rse.NoSuccess("Couldn't create bulk list: %s" % out)
+
+            lst = out.strip()
+            shell.write_to_remote('\n'.join(srcs) + '\n', lst)
+
+            rc, out, _ = shell.run_sync('gfal-copy --parent --timeout %d --transfer-timeout %d --from-file %s %s' % (
+                OPERATION_TIMEOUT, TRANSFER_TIMEOUT, lst, dst_dir))
+            shell.run_sync('rm -f %s' % lst)
+
+        except Exception as e:
+            shell.finalize(kill_pty=True)
+            return [rse.NoSuccess("bulk transfer failed: %s" % e)] * len(srcs)
+
+        # gfal-copy reports the status of each source on the line naming it,
+        # followed by any error details:
+        #   Copying srm://.../a   [DONE]  after 2s
+        #   Copying srm://.../b   [FAILED]  after 0s
+        #   gfal-copy error: 2 (No such file or directory) - ...
+        blocks  = dict([(src, '') for src in srcs])
+        current = None
+        for line in out.split('\n'):
+            for src in srcs:
+                if src in line.split():
+                    current = src
+                    break
+            if current:
+                blocks[current] += line + '\n'
+
+        results = list()
+        for src in srcs:
+            if '[DONE]' in blocks[src]:
+                results.append(None)
+            elif blocks[src]:
+                dst = self.srm_child(dst_dir, os.path.basename(src))
+                results.append(self.srm_copy_error(blocks[src], src, dst))
             else:
-                raise Exception("Copy failed.")
+                results.append(rse.NoSuccess("no transfer status for %s" % src))
+
+        return results
+
+
+    # --------------------------------------------------------------------------
+    #
+    def srm_copy_many(self, session, pairs, flags):
+        """
+        Copy all given (src, dst) pairs, and return a list with `None` for each
+        successful copy, and the respective exception otherwise.
+
+        The copies run concurrently over up to `copy_concurrency` shells, and
+        transient failures are retried up to `copy_retries` times.  In bulk
+        mode, files which keep their name and go into the same target
+        directory are transferred by a single `gfal-copy --from-file` call.
+        """
+
+        pairs   = [(self.url_str(src), self.url_str(dst)) for src, dst in pairs]
+        results = [rse.NoSuccess('copy %s not run' % src) for src, _ in pairs]
+        tries   = [0]    * len(pairs)
+        jobs    = queue.Queue()
+
+        # a job is a list of pair indexes: single copies, or bulks
+        bulks = dict()
+        for idx, (src, dst) in enumerate(pairs):
+
+            dst_dir, name = dst.rsplit('/', 1)
+            if self.bulk and name == os.path.basename(src):
+                bulks.setdefault(dst_dir, list()).append(idx)
+            else:
+                jobs.put([idx])
+
+        for idxs in bulks.values():
+            jobs.put(idxs)
+
+        def _worker(n):
+
+            while True:
+
+                try:
+                    idxs = jobs.get_nowait()
+                except queue.Empty:
+                    return
+
+                try:
+                    shell = self.pool_shell(session, n)
+
+                    if len(idxs) == 1:
+                        src, dst = pairs[idxs[0]]
+                        self.srm_transfer(shell, flags, src, dst)
+                        errors = [None]
+
+                    else:
+                        dst_dir = pairs[idxs[0]][1].rsplit('/', 1)[0]
+                        srcs    = [pairs[idx][0] for idx in idxs]
+                        errors  = self.srm_copy_bulk(shell, srcs, dst_dir)
+
+                except Exception as e:
+                    errors = [e] * len(idxs)
+
+                # retry failed copies individually
+                for idx, error in zip(idxs, errors):
+
+                    results[idx] = error
+
+                    if error and not isinstance(error, PERMANENT_ERRORS) \
+                             and tries[idx] < self.retries:
+                        self._logger.warning('retry copy %s: %s'
+                                            % (pairs[idx][0], error))
+                        tries[idx] += 1
+                        jobs.put([idx])
+
+        threads = [threading.Thread(target=_worker, args=[n])
+                   for n in range(max(1, min(self.concurrency, jobs.qsize())))]
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        return results
+
+
+    # --------------------------------------------------------------------------
+    #
+    def pool_shell(self, session, n):
+
+        # shells for bulk copies are kept per session, and replaced when dead
+        sid = getattr(session, '_id', None)
+
+        with self._lock:
+            shell = self.shells.setdefault(sid, dict()).get(n)
+
+        if not shell or not shell.alive():
+
+            shell = sups.PTYShell(self.pty_url, session)
+
+            with self._lock:
+                self.shells[sid][n] = shell
+
+        return shell
+
+
+    # --------------------------------------------------------------------------
+    #
+    # bulk operations: copy tasks run in a task container are handed to
+    # `srm_copy_many()`, per session and flags.
+    #
+    def container_copy_self(self, tasks):
+
+        self._container_copy(tasks, self_copy=True)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_copy(self, tasks):
+
+        self._container_copy(tasks, self_copy=False)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _container_copy(self, tasks, self_copy):
+
+        bulks = dict()
+        for task in tasks:
+
+            cpi    = task._adaptor
+            args   = list(task._method_context.get('_args',   list()))
+            kwargs = task._method_context.get('_kwargs', dict())
+
+            if self_copy:
+                args.insert(0, cpi._url)
+
+            src   = args[0] if len(args) > 0 else kwargs.get('src')
+            dst   = args[1] if len(args) > 1 else kwargs.get('tgt',
+                                                  kwargs.get('dst'))
+            flags = args[2] if len(args) > 2 else kwargs.get('flags', 0)
+
+            key = (getattr(cpi.session, '_id', None), flags or 0)
+            if key not in bulks:
+                bulks[key] = {'session': cpi.session, 'flags': flags or 0,
+                              'tasks'  : list(), 'pairs': list()}
+
+            bulks[key]['tasks'].append(task)
+            bulks[key]['pairs'].append((src, dst))
+
+        for bulk in bulks.values():
+
+            for task in bulk['tasks']:
+                task._set_state(rsc.RUNNING)
+
+            try:
+                results = self.srm_copy_many(bulk['session'], bulk['pairs'],
+                                             bulk['flags'])
+            except Exception as e:
+                results = [e] * len(bulk['tasks'])
+
+            for task, res in zip(bulk['tasks'], results):
+
+                # the task is completed here, not by its own future
+                task._future = None
+
+                if res:
+                    task._set_exception(res)
+                    task._set_state(rsc.FAILED)
+                else:
+                    task._set_result(None)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_wait(self, tasks, mode, timeout):
+
+        for task in tasks:
+            if task.get_state() not in rsc.FINAL:
+                task.wait(timeout)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_cancel(self, tasks, timeout):
+
+        for task in tasks:
+            if task.get_state() not in rsc.FINAL:
+                task.cancel()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def container_get_states(self, tasks):
+
+        return [task.get_state() for task in tasks]
 
 
     # --------------------------------------------------------------------------
@@ -201,6 +600,8 @@ class Adaptor(rsab.Base):
         if isinstance(tgt, api.file.File):
             tgt = tgt.get_url()
 
+        self.stat_cache_invalidate(tgt)
+
         try:
             rc, out, _ = shell.run_sync("gfal-rm --timeout %d %s" % (CONNECTION_TIMEOUT, tgt))
         except Exception as e:
@@ -225,6 +626,8 @@ class Adaptor(rsab.Base):
         if isinstance(tgt, ru.Url):
             tgt = str(tgt)
 
+        self.stat_cache_invalidate(tgt)
+
         try:
             rc, out, _ = shell.run_sync("gfal-rm --recursive %s" % tgt)
         except Exception as e:
@@ -249,8 +652,9 @@ class Adaptor(rsab.Base):
         if isinstance(url, api.File):
             url = url.get_url()
 
+        # the long listing fills the stat cache for all entries on the way
         try:
-            rc, out, _ = shell.run_sync("gfal-ls --color never --timeout %d %s" % (CONNECTION_TIMEOUT, url))
+            rc, out, _ = shell.run_sync("gfal-ls --color never --timeout %d --long %s" % (CONNECTION_TIMEOUT, url))
         except Exception as e:
             shell.finalize(kill_pty=True)
             raise Exception("list failed") from e
@@ -261,7 +665,16 @@ class Adaptor(rsab.Base):
             else:
                 raise Exception("Couldn't list directory.")
 
-        return out.split('\n')
+        names = list()
+        for entry in out.split('\n'):
+            if not entry.strip():
+                continue
+
+            name, info = self.srm_parse_long(entry)
+            self.stat_cache_set(self.srm_child(url, name), info)
+            names.append(name)
+
+        return names
 
 
     # --------------------------------------------------------------------------
@@ -296,7 +709,9 @@ class Adaptor(rsab.Base):
                 continue
 
             kind = entry[0]
-            name = entry.split()[8]
+            name, info = self.srm_parse_long(entry)
+            self.stat_cache_set(self.srm_child(url, name), info)
+
             if kind == '-':
                 files.append(name)
             elif kind == 'd':
@@ -326,6 +741,9 @@ class SRMDirectory (cpi.Directory):
         _cpi_base = super(SRMDirectory, self)
         _cpi_base.__init__(api, adaptor)
 
+        # bulk copies are handled by the adaptor instance
+        self._set_container(adaptor)
+
 
     # --------------------------------------------------------------------------
     #
@@ -430,6 +848,7 @@ class SRMDirectory (cpi.Directory):
         self._alive()
 
         url = self._adaptor.surl2query(self._url, self._surl, tgt_in)
+        self._adaptor.stat_cache_invalidate(url)
 
         try:
             rc, out, _ = self.shell.run_sync("srmmkdir %s" % url)
@@ -584,6 +1003,9 @@ class SRMFile(cpi.File):
         _cpi_base = super(SRMFile, self)
         _cpi_base.__init__(api, adaptor)
 
+        # bulk copies are handled by the adaptor instance
+        self._set_container(adaptor)
+
 
     def _dump(self):
         print("url    : %s"  % self._url)
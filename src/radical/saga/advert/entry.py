@@ -219,3 +219,58 @@ class Entry (nsentry.Entry, sa.Attributes) :
         return self._adaptor.delete_object (ttype=ttype)
 
 
+    # --------------------------------------------------------------------------
+    #
+    @rus.takes   ('Entry', 
+                  dict,
+                  rus.optional (rus.one_of (SYNC, ASYNC, TASK)))
+    @rus.returns ((rus.nothing, st.Task))
+    def set_attributes (self, attrs, ttype=None) : 
+        """
+        attrs :         dict
+        ttype:          saga.task.type enum
+        ret:            None / saga.Task
+
+        Set all given attributes in a single backend operation, which is much
+        cheaper than individual `set_attribute()` calls.
+        """
+
+        attrs = {self._attributes_t_underscore (
+                     self._attributes_t_keycheck (key)) : val
+                 for key, val in attrs.items ()}
+
+        ret = self._adaptor.set_attributes (attrs, ttype=ttype)
+
+        if not ttype :
+            for key, val in attrs.items () :
+                self.set_attribute (key, val, self._UP)
+
+        return ret
+
+
+    # --------------------------------------------------------------------------
+    #
+    @rus.takes   ('Entry', 
+                  rus.list_of (str),
+                  rus.optional (rus.one_of (SYNC, ASYNC, TASK)))
+    @rus.returns ((dict, st.Task))
+    def get_attributes (self, keys, ttype=None) : 
+        """
+        keys :          list [string]
+        ttype:          saga.task.type enum
+        ret:            dict / saga.Task
+
+        Get the values of all given attributes in a single backend operation.
+        """
+
+        keys = [self._attributes_t_underscore (
+                    self._attributes_t_keycheck (key)) for key in keys]
+
+        ret = self._adaptor.get_attributes (keys, ttype=ttype)
+
+        if not ttype :
+            for key, val in ret.items () :
+                self.set_attribute (key, val, self._UP)
+
+        return ret
+
@@ -6,6 +6,9 @@ __license__   = "MIT"
 
 import sys
 import inspect
+import itertools
+
+import threading                  as mt
 
 import radical.utils              as ru
 import radical.utils.signatures   as rus
@@ -14,6 +17,31 @@ from .adaptors import base        as sab
 from .         import engine
 
 
+# ------------------------------------------------------------------------------
+#
+# API type names are a property of the API class, not of the instance, so we
+# resolve them once per class and keep them here.  Instance IDs for API objects
+# are only used within this process, and are generated from cheap per-type
+# counters instead of going through `ru.generate_id` (which collects time,
+# user and state information on every call).  The ID format matches
+# `ru.ID_SIMPLE`.
+#
+_apitype_cache = dict()   # class  -> apitype
+_id_counters   = dict()   # prefix -> itertools.count
+_id_lock       = mt.Lock()
+
+
+def _generate_id(prefix):
+
+    counter = _id_counters.get(prefix)
+
+    if counter is None:
+        with _id_lock:
+            counter = _id_counters.setdefault(prefix, itertools.count())
+
+    return '%s.%04d' % (prefix, next(counter))
+
+
 # ------------------------------------------------------------------------------
 #
 class SimpleBase (object) :
@@ -37,14 +65,19 @@ class SimpleBase (object) :
             pass
 
         if not ok:
-            self._apitype = self._get_apitype()
+            cls     = self.__class__
+            apitype = _apitype_cache.get(cls)
+            if not apitype:
+                apitype = self._get_apitype()
+                _apitype_cache[cls] = apitype
+            self._apitype = apitype
 
 
         self._logger = ru.Logger('radical.saga')
         if uid:
             self._id = uid
         else:
-            self._id = ru.generate_id (self._apitype, mode=ru.ID_SIMPLE)
+            self._id = _generate_id(self._apitype)
 
       # self._logger.debug ("[saga.Base] %s.__init__()" % self._apitype)
 
@@ -57,6 +90,9 @@ class SimpleBase (object) :
 
         # apitype for saga.job.service.Service should be saga.job.Service --
         # but we need to make sure that this actually exists and is equivalent.
+        #
+        # NOTE: this is expensive (it inspects the whole package module), and
+        #       `SimpleBase.__init__` caches the result per class.
 
         mname_1 = self.__module__            # saga.job.service
         cname   = self.__class__.__name__    # Service
@@ -65,13 +101,12 @@ class SimpleBase (object) :
         mname_1_elems.pop ()                 # ['saga', 'job']
         mname_2 = '.'.join (mname_1_elems)   # 'saga.job'
 
-        for mod_cname, mod_class in inspect.getmembers (sys.modules[mname_2]) :
-            if  mod_cname == cname           and \
-                inspect.isclass (mod_class)  and \
-                isinstance (self, mod_class)     :
+        mod_class = getattr (sys.modules[mname_2], cname, None)
+        if  inspect.isclass (mod_class)  and \
+            isinstance (self, mod_class)     :
 
-                apitype = "%s.%s" % (mname_2, cname)  # saga.job.Service
-                return apitype
+            apitype = "%s.%s" % (mname_2, cname)  # saga.job.Service
+            return apitype
 
         apitype = "%s.%s" % (mname_1, cname)  # saga.job.service.Service
         return apitype
@@ -95,10 +130,21 @@ class Base (SimpleBase) :
 
         SimpleBase.__init__ (self)
 
+        # the session is passed on to the adaptor's `init_instance` - we only
+        # need it here to scope the engine's adaptor binding cache
+        from . import session as ss
+
+        session = kwargs.get('session')
+        if not session:
+            for arg in args:
+                if isinstance(arg, ss.Session):
+                    session = arg
+                    break
+
         _engine       = engine.Engine ()
         self._adaptor = adaptor
         self._adaptor = _engine.bind_adaptor(self, self._apitype, schema,
-                                             adaptor)
+                                             adaptor, session=session)
 
         # Sync creation (normal __init__) will simply call the adaptor's
         # init_instance at this point.  _init_task should *not* be evaluated,
@@ -6,34 +6,13 @@ __license__   = "MIT"
 
 """ Provides the SAGA runtime. """
 
-import radical.utils as ru
-
-from .. import exceptions as rse
+import time
 
+import threading     as mt
 
-# ------------------------------------------------------------------------------
-#
-# we set the default of the pty share mode to 'no' on CentOS, as that seems to
-# consistently come with old ssh versions which can't handle sharing for sftp
-# channels.
-#
-_share_mode_default = 'auto'
-try:
-    import subprocess as sp
-    _p = sp.Popen ('lsb_release -a | grep "Distributor ID" | cut -f 2 -d ":"',
-                   stdout=sp.PIPE, stderr=sp.STDOUT, shell=True)
-    _os_flavor = _p.communicate()[0].strip().lower()
-
-    if 'centos'  in _os_flavor or \
-       'cent_os' in _os_flavor or \
-       'cent-os' in _os_flavor or \
-       'cent os' in _os_flavor :
-        _share_mode_default = 'no'
+import radical.utils as ru
 
-except Exception:
-    # we ignore this then -- we are relatively sure that the above should work
-    # on CentOS...
-    pass
+from .. import exceptions as rse
 
 
 # ------------------------------------------------------------------------------
@@ -46,7 +25,9 @@ class Engine(object, metaclass=ru.Singleton):
     loading and management, and which binds adaptor instances to
     API object instances.   The Engine singleton is implicitly
     instantiated as soon as SAGA is imported into Python.  It
-    will, on creation, load all available adaptors.  Adaptors
+    will, on creation, load all available adaptors (or, if the
+    `lazy_adaptors` option is set, record them for loading on
+    first use, see `_load_adaptors()`).  Adaptors
     modules MUST provide an 'Adaptor' class, which will register
     the adaptor in the engine with information like these
     (simplified)::
@@ -127,6 +108,20 @@ class Engine(object, metaclass=ru.Singleton):
         # Engine manages cpis from adaptors
         self._adaptor_registry = dict()
 
+        # adaptor modules which are known from the adaptor manifest but which
+        # are not loaded, yet (see `_load_adaptors()`), and the registry order
+        # of all adaptors
+        self._lazy_registry    = dict()
+        self._lazy_names       = dict()
+        self._adaptor_order    = dict()
+        self._lock             = mt.RLock()
+
+        # cache the cpi info which last bound successfully for any
+        # (ctype, schema, session) triple, and the time of the last failed
+        # binding attempt for any (ctype, schema, session, adaptor, cpi)
+        self._bind_cache       = dict()
+        self._bind_failures    = dict()
+
         # get angine, adaptor and pty configs
         self._cfg      = ru.Config('radical.saga.engine')
         self._pty_cfg  = ru.Config('radical.saga.pty')
@@ -135,20 +130,29 @@ class Engine(object, metaclass=ru.Singleton):
         # Initialize the logging, and log version (this is a singleton!)
         self._logger = ru.Logger('radical.saga')
 
+        # adaptors which failed to bind are tried last for that long (seconds)
+        self._bind_failure_ttl = float(self._cfg.get('bind_failure_ttl', 60))
+
         # load adaptors
         self._load_adaptors()
 
 
     # --------------------------------------------------------------------------
     #
-    def _load_adaptors (self, inject_registry=None):
+    def _load_adaptors (self, inject_registry=None, inject_manifest=None):
         """
         Try to load all adaptors that are registered in saga.engine.registry.py.
         This method is called from the constructor.  As Engine is a singleton,
         this method is called once after the module is first loaded in any
         python application.
 
+        If the `lazy_adaptors` engine config option is set, adaptors which are
+        listed in the registry's adaptor manifest are not imported here, but
+        are only recorded for the API types and URL schemas they serve.  They
+        get loaded by `_load_lazy_adaptors()` once they are actually needed.
+
         :param inject_registry: Inject a fake registry. *For unit tests only*.
+        :param inject_manifest: Inject a fake manifest. *For unit tests only*.
         """
 
 
@@ -158,278 +162,393 @@ class Engine(object, metaclass=ru.Singleton):
         # so, we reset cpi infos from the earlier singleton creation.
         if inject_registry is not None:
             self._adaptor_registry = dict()
-            self._registry = {'adaptor_registry' : inject_registry}
+            self._lazy_registry    = dict()
+            self._lazy_names       = dict()
+            self._adaptor_order    = dict()
+            self._bind_cache       = dict()
+            self._bind_failures    = dict()
+            self._registry = {'adaptor_registry' : inject_registry,
+                              'adaptor_manifest' : inject_manifest}
+
+        manifest = dict()
+        if self._cfg.get('lazy_adaptors'):
+            manifest = self._registry.get('adaptor_manifest') or dict()
 
         # attempt to load all registered modules
         for module_name in self._registry.get('adaptor_registry', []):
 
-            self._logger.info ("loading  adaptor %s" % module_name)
+            info = manifest.get(module_name)
 
+            if info:
+                self._register_lazy_adaptor(module_name, info)
+            else:
+                self._load_adaptor(module_name)
 
-            # first, import the module
-            adaptor_module = None
-            try :
-                adaptor_module = ru.import_module(module_name)
 
-            except Exception as e:
-                self._logger.warning("skip adaptor %s: import failed (%s)",
-                                     module_name, e, exc_info=True)
-                continue
+    # --------------------------------------------------------------------------
+    #
+    def _register_lazy_adaptor (self, module_name, info):
+        """
+        Record the API types and schemas an adaptor module serves according to
+        the adaptor manifest, without importing the module.
+        """
 
-            # we expect the module to have an 'Adaptor' class
-            # implemented, which, on calling 'register()', returns
-            # a info dict for all implemented adaptor classes.
-            adaptor_instance = None
-            adaptor_info     = None
+        self._logger.debug ("deferring adaptor %s" % module_name)
 
-            try:
-                adaptor_instance = adaptor_module.Adaptor ()
-                adaptor_info     = adaptor_instance.register ()
+        self._adaptor_order.setdefault(info['name'], len(self._adaptor_order))
+        self._lazy_names[info['name']] = module_name
 
-            except rse.SagaException:
-                self._logger.warning("skip adaptor %s: failed to load",
-                                     module_name, exc_info=True)
-                continue
+        for cpi_type in info['types']:
 
-            except Exception:
-                self._logger.warning("skip adaptor %s: init failed",
-                                     module_name, exc_info=True)
-                continue
+            if cpi_type not in self._lazy_registry:
+                self._lazy_registry[cpi_type] = dict()
 
+            for schema in info['schemas']:
 
-            # the adaptor must also provide a sanity_check() method, which sould
-            # be used to confirm that the adaptor can function properly in the
-            # current runtime environment (e.g., that all pre-requisites and
-            # system dependencies are met).
-            try:
-                adaptor_instance.sanity_check ()
+                schema  = schema.lower ()
+                modules = self._lazy_registry[cpi_type].setdefault(schema, [])
 
-            except Exception:
-                self._logger.warning("skip adaptor %s: test failed",
-                                     module_name, exc_info=True)
-                continue
+                if module_name not in modules:
+                    modules.append(module_name)
 
 
-            # check if we have a valid adaptor_info
-            if adaptor_info is None :
-                self._logger.warning("skip adaptor %s: invalid adaptor data",
-                                     module_name)
-                continue
+    # --------------------------------------------------------------------------
+    #
+    def _load_lazy_adaptors (self, ctype=None, schema=None, name=None):
+        """
+        Load all deferred adaptors which serve the given API type and schema,
+        or which have the given adaptor name.  If no schema is specified, all
+        adaptors for that API type are loaded.  If nothing is specified, all
+        deferred adaptors are loaded.
+        """
 
+        if not self._lazy_registry:
+            return
 
-            if  'name'    not in adaptor_info or \
-                'cpis'    not in adaptor_info or \
-                'version' not in adaptor_info or \
-                'schemas' not in adaptor_info    :
-                self._logger.warning("skip adaptor %s: incomplete data",
-                                     module_name)
-                continue
+        with self._lock:
 
+            modules = list()
 
-            adaptor_name    = adaptor_info['name']
-            adaptor_version = adaptor_info['version']
-            adaptor_schemas = adaptor_info['schemas']
-            adaptor_enabled = True  # default
+            if name:
+                if name in self._lazy_names:
+                    modules.append(self._lazy_names[name])
 
-            # disable adaptors in 'alpha' or 'beta' versions -- unless
-            # the 'load_beta_adaptors' config option is set to True
-            if not self._cfg.load_beta_adaptors:
+            elif ctype:
+                for key, val in self._lazy_registry.get(ctype, {}).items():
+                    if schema is None or key == schema.lower ():
+                        modules += val
 
-                if 'alpha' in adaptor_version.lower() or \
-                   'beta'  in adaptor_version.lower()    :
+            else:
+                for val in self._lazy_registry.values ():
+                    for mods in val.values ():
+                        modules += mods
 
-                    self._logger.warning("skip beta adaptor %s (version %s)",
-                                         module_name, adaptor_version)
-                    continue
+            if not modules:
+                return
 
+            # a module is only loaded once - remove it from the lazy registry
+            for cpi_type in list(self._lazy_registry.keys ()):
+                for key in list(self._lazy_registry[cpi_type].keys ()):
+                    mods = [m for m in self._lazy_registry[cpi_type][key]
+                                   if m not in modules]
+                    if mods: self._lazy_registry[cpi_type][key] = mods
+                    else   : del(self._lazy_registry[cpi_type][key])
+                if not self._lazy_registry[cpi_type]:
+                    del(self._lazy_registry[cpi_type])
 
-            # get the 'enabled' option in the adaptor's config
-            # section (radical.saga.cpi.base) ensures that the option exists,
-            # if it is initialized correctly in the adaptor class.
-            adaptor_config  = None
-            adaptor_enabled = False
+            for adaptor_name in list(self._lazy_names.keys ()):
+                if self._lazy_names[adaptor_name] in modules:
+                    del(self._lazy_names[adaptor_name])
 
-            try :
-                adaptor_config  = ru.Config('radical.saga.adaptors',
-                                            name=adaptor_name)
-                adaptor_enabled = adaptor_config.get('enabled', True)
+            loaded = list()
+            for module_name in modules:
+                if module_name not in loaded:
+                    loaded.append(module_name)
+                    self._load_adaptor(module_name)
 
-            except rse.SagaException:
-                self._logger.warning("skip adaptor %s: init failed",
-                                     module_name, exc_info=True)
-                continue
+            # adaptors are tried in registry order when binding - keep that
+            # order, independent of the order in which they got loaded
+            order = self._adaptor_order
+            for val in self._adaptor_registry.values ():
+                for infos in val.values ():
+                    infos.sort(key=lambda x: order.get(x['adaptor_name'], 0))
 
-            except Exception as e:
-                self._logger.warning("skip adaptor %s: init error",
-                                     module_name, exc_info=True)
-                continue
 
+    # --------------------------------------------------------------------------
+    #
+    def _load_adaptor (self, module_name):
+        """
+        Import, initialize and sanity check one adaptor module, and register all
+        its cpi classes.
+        """
 
-            # only load adaptor if it is not disabled via config files
-            if not adaptor_enabled:
-                self._logger.warning("skip adaptor %s: disabled", module_name)
-                continue
+        self._logger.info ("loading  adaptor %s" % module_name)
+
+
+        # first, import the module
+        adaptor_module = None
+        try :
+            adaptor_module = ru.import_module(module_name)
+
+        except Exception as e:
+            self._logger.warning("skip adaptor %s: import failed (%s)",
+                                 module_name, e, exc_info=True)
+            return
+
+        # we expect the module to have an 'Adaptor' class
+        # implemented, which, on calling 'register()', returns
+        # a info dict for all implemented adaptor classes.
+        adaptor_instance = None
+        adaptor_info     = None
+
+        try:
+            adaptor_instance = adaptor_module.Adaptor ()
+            adaptor_info     = adaptor_instance.register ()
+
+        except rse.SagaException:
+            self._logger.warning("skip adaptor %s: failed to load",
+                                 module_name, exc_info=True)
+            return
 
+        except Exception:
+            self._logger.warning("skip adaptor %s: init failed",
+                                 module_name, exc_info=True)
+            return
 
-            # check if the adaptor has anything to register
-            if 0 == len (adaptor_info['cpis']) :
-                self._logger.warning("skip adaptor %s: adaptor has no cpis",
+
+        # the adaptor must also provide a sanity_check() method, which sould
+        # be used to confirm that the adaptor can function properly in the
+        # current runtime environment (e.g., that all pre-requisites and
+        # system dependencies are met).
+        try:
+            adaptor_instance.sanity_check ()
+
+        except Exception:
+            self._logger.warning("skip adaptor %s: test failed",
+                                 module_name, exc_info=True)
+            return
+
+
+        # check if we have a valid adaptor_info
+        if adaptor_info is None :
+            self._logger.warning("skip adaptor %s: invalid adaptor data",
+                                 module_name)
+            return
+
+
+        if  'name'    not in adaptor_info or \
+            'cpis'    not in adaptor_info or \
+            'version' not in adaptor_info or \
+            'schemas' not in adaptor_info    :
+            self._logger.warning("skip adaptor %s: incomplete data",
+                                 module_name)
+            return
+
+
+        adaptor_name    = adaptor_info['name']
+        adaptor_version = adaptor_info['version']
+        adaptor_schemas = adaptor_info['schemas']
+        adaptor_enabled = True  # default
+
+        # disable adaptors in 'alpha' or 'beta' versions -- unless
+        # the 'load_beta_adaptors' config option is set to True
+        if not self._cfg.load_beta_adaptors:
+
+            if 'alpha' in adaptor_version.lower() or \
+               'beta'  in adaptor_version.lower()    :
+
+                self._logger.warning("skip beta adaptor %s (version %s)",
+                                     module_name, adaptor_version)
+                return
+
+
+        # get the 'enabled' option in the adaptor's config
+        # section (radical.saga.cpi.base) ensures that the option exists,
+        # if it is initialized correctly in the adaptor class.
+        adaptor_config  = None
+        adaptor_enabled = False
+
+        try :
+            adaptor_config  = ru.Config('radical.saga.adaptors',
+                                        name=adaptor_name)
+            adaptor_enabled = adaptor_config.get('enabled', True)
+
+        except rse.SagaException:
+            self._logger.warning("skip adaptor %s: init failed",
+                                 module_name, exc_info=True)
+            return
+
+        except Exception as e:
+            self._logger.warning("skip adaptor %s: init error",
+                                 module_name, exc_info=True)
+            return
+
+
+        # only load adaptor if it is not disabled via config files
+        if not adaptor_enabled:
+            self._logger.warning("skip adaptor %s: disabled", module_name)
+            return
+
+
+        # check if the adaptor has anything to register
+        if 0 == len (adaptor_info['cpis']) :
+            self._logger.warning("skip adaptor %s: adaptor has no cpis",
+                                 module_name)
+            return
+
+
+        # we got an enabled adaptor with valid info - yay!  We can
+        # now register all adaptor classes (cpi implementations).
+        for cpi_info in adaptor_info['cpis'] :
+
+            # check cpi information details for completeness
+            if  'type'  not in cpi_info or \
+                'class' not in cpi_info    :
+                self._logger.warning("skip %s cpi: incomplete info detail",
                                      module_name)
                 continue
 
 
-            # we got an enabled adaptor with valid info - yay!  We can
-            # now register all adaptor classes (cpi implementations).
-            for cpi_info in adaptor_info['cpis'] :
-
-                # check cpi information details for completeness
-                if  'type'  not in cpi_info or \
-                    'class' not in cpi_info    :
-                    self._logger.warning("skip %s cpi: incomplete info detail",
-                                         module_name)
-                    continue
+            # adaptor classes are registered for specific API types.
+            cpi_type  = cpi_info['type']
+            cpi_cname = cpi_info['class']
+            cpi_class = None
 
+            try :
+                cpi_class = getattr (adaptor_module, cpi_cname)
 
-                # adaptor classes are registered for specific API types.
-                cpi_type  = cpi_info['type']
-                cpi_cname = cpi_info['class']
-                cpi_class = None
+            except Exception:
+                # this exception likely means that the adaptor does not call
+                # the radical.saga.adaptors.Base initializer (correctly)
+                self._logger.warning("skip adaptor %s: invalid %s",
+                                     module_name, cpi_info['class'],
+                                     exc_info=True)
+                continue
 
-                try :
-                    cpi_class = getattr (adaptor_module, cpi_cname)
+            # make sure the cpi class is a valid cpi for the given type.
+            # We walk through the list of known modules, and try to find
+            # a modules which could have that class.  We do the following
+            # tests:
+            #
+            #   cpi_class: ShellJobService
+            #   cpi_type:  radical.saga.job.Service
+            #   modules:   radical.saga.adaptors.cpi.job
+            #   modules:   radical.saga.adaptors.cpi.job.service
+            #   classes:   radical.saga.adaptors.cpi.job.Service
+            #   classes:   radical.saga.adaptors.cpi.job.service.Service
+            #
+            #   cpi_class: X509Context
+            #   cpi_type:  radical.saga.Context
+            #   modules:   radical.saga.adaptors.cpi.context
+            #   classes:   radical.saga.adaptors.cpi.context.Context
+            #
+            # So, we add a 'adaptors.cpi' after the 'saga' namespace
+            # element, then append the rest of the given namespace.  If that
+            # gives a module which has the requested class, fine -- if not,
+            # we add a lower cased version of the class name as last
+            # namespace element, and check again.
+
+            # ->   radical .  saga .  job .  Service
+            # <- ['radical', 'saga', 'job', 'Service']
+            cpi_type_nselems = cpi_type.split ('.')
+
+            if  len(cpi_type_nselems) < 3 or \
+                len(cpi_type_nselems) > 4    :
+                self._logger.warning("skip adaptor %s invalid cpi %s",
+                                     module_name, cpi_type)
+                continue
 
-                except Exception:
-                    # this exception likely means that the adaptor does not call
-                    # the radical.saga.adaptors.Base initializer (correctly)
-                    self._logger.warning("skip adaptor %s: invalid %s",
-                                         module_name, cpi_info['class'],
-                                         exc_info=True)
-                    continue
+            if  cpi_type_nselems[0] != 'radical' and \
+                cpi_type_nselems[1] != 'saga'    :
+                self._logger.warning("skip adaptor %s: invalid cpi ns %s",
+                                     module_name, cpi_type, exc_info=True)
+                continue
 
-                # make sure the cpi class is a valid cpi for the given type.
-                # We walk through the list of known modules, and try to find
-                # a modules which could have that class.  We do the following
-                # tests:
-                #
-                #   cpi_class: ShellJobService
-                #   cpi_type:  radical.saga.job.Service
-                #   modules:   radical.saga.adaptors.cpi.job
-                #   modules:   radical.saga.adaptors.cpi.job.service
-                #   classes:   radical.saga.adaptors.cpi.job.Service
-                #   classes:   radical.saga.adaptors.cpi.job.service.Service
-                #
-                #   cpi_class: X509Context
-                #   cpi_type:  radical.saga.Context
-                #   modules:   radical.saga.adaptors.cpi.context
-                #   classes:   radical.saga.adaptors.cpi.context.Context
-                #
-                # So, we add a 'adaptors.cpi' after the 'saga' namespace
-                # element, then append the rest of the given namespace.  If that
-                # gives a module which has the requested class, fine -- if not,
-                # we add a lower cased version of the class name as last
-                # namespace element, and check again.
-
-                # ->   radical .  saga .  job .  Service
-                # <- ['radical', 'saga', 'job', 'Service']
-                cpi_type_nselems = cpi_type.split ('.')
-
-                if  len(cpi_type_nselems) < 3 or \
-                    len(cpi_type_nselems) > 4    :
-                    self._logger.warning("skip adaptor %s invalid cpi %s",
-                                         module_name, cpi_type)
+            # -> ['radical', 'saga',                    'job', 'Service']
+            # <- ['radical', 'saga', 'adaptors', 'cpi', 'job', 'Service']
+            cpi_type_nselems.insert (2, 'adaptors')
+            cpi_type_nselems.insert (3, 'cpi')
+
+         #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job',  'Service']
+         #  # <- ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
+         #  cpi_type_cname = cpi_type_nselems.pop ()
+         #
+         #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
+         #  # <-  'radical.saga.adaptors.cpi.job
+         #  # <-  'radical.saga.adaptors.cpi.job.service
+         #  cpi_type_modname_1 = '.'.join (cpi_type_nselems)
+         #  cpi_type_modname_2 = '.'.join (cpi_type_nselems + \
+         #                                 [cpi_type_cname.lower()])
+         #
+         #  # does either module exist?
+         #  cpi_type_modname = None
+         #
+         #  if  cpi_type_modname_1 in sys.modules :
+         #      cpi_type_modname = cpi_type_modname_1
+         #
+         #  if  cpi_type_modname_2 in sys.modules :
+         #      cpi_type_modname = cpi_type_modname_2
+         #
+         #  if  not cpi_type_modname :
+         #      self._logger.warning("skip adaptor %s: unknown cpi %s",
+         #                           module_name, cpi_type, exc_info=True)
+         #      sys.exit()
+         #      continue
+         #
+         #  # so, make sure the given cpi is actually
+         #  # implemented by the adaptor class
+         #  cpi_ok = False
+         #  for name, cpi_obj \
+         #      in inspect.getmembers (sys.modules[cpi_type_modname]):
+         #      if  name == cpi_type_cname      and \
+         #          inspect.isclass (cpi_obj)       :
+         #          if  issubclass (cpi_class, cpi_obj) :
+         #              cpi_ok = True
+         #
+         #  if not cpi_ok :
+         #      self._logger.warning("skip adaptor %s: no cpi %s (%s)",
+         #                           module_name, cpi_class, cpi_type,
+         #                            exc_info=True)
+         #      continue
+
+
+            # finally, register the cpi for all its schemas!
+            registered_schemas = list()
+            for adaptor_schema in adaptor_schemas:
+
+                adaptor_schema = adaptor_schema.lower ()
+
+                # make sure we can register that cpi type
+                if cpi_type not in self._adaptor_registry:
+                    self._adaptor_registry[cpi_type] = dict()
+
+                # make sure we can register that schema
+                if adaptor_schema not in self._adaptor_registry[cpi_type]:
+                    self._adaptor_registry[cpi_type][adaptor_schema] = []
+
+                # we register the cpi class, so that we can create
+                # instances as needed, and the adaptor instance,
+                # as that is passed to the cpi class c'tor later
+                # on (the adaptor instance is used to share state
+                # between cpi instances, amongst others)
+                info = {'cpi_cname'        : cpi_cname,
+                        'cpi_class'        : cpi_class,
+                        'adaptor_name'     : adaptor_name,
+                        'adaptor_instance' : adaptor_instance}
+
+                # make sure this tuple was not registered, yet
+                if info in self._adaptor_registry[cpi_type][adaptor_schema]:
+                    self._logger.warning("skip adaptor %s: exists %s: %s",
+                                         module_name, cpi_class,
+                                         adaptor_instance, exc_info=True)
                     continue
 
-                if  cpi_type_nselems[0] != 'radical' and \
-                    cpi_type_nselems[1] != 'saga'    :
-                    self._logger.warning("skip adaptor %s: invalid cpi ns %s",
-                                         module_name, cpi_type, exc_info=True)
-                    continue
+                self._adaptor_registry[cpi_type] \
+                                      [adaptor_schema].append(info)
+                registered_schemas.append(str("%s://" % adaptor_schema))
 
-                # -> ['radical', 'saga',                    'job', 'Service']
-                # <- ['radical', 'saga', 'adaptors', 'cpi', 'job', 'Service']
-                cpi_type_nselems.insert (2, 'adaptors')
-                cpi_type_nselems.insert (3, 'cpi')
-
-             #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job',  'Service']
-             #  # <- ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
-             #  cpi_type_cname = cpi_type_nselems.pop ()
-             #
-             #  # -> ['radical', 'saga', 'adaptors', 'cpi', 'job'], 'Service'
-             #  # <-  'radical.saga.adaptors.cpi.job
-             #  # <-  'radical.saga.adaptors.cpi.job.service
-             #  cpi_type_modname_1 = '.'.join (cpi_type_nselems)
-             #  cpi_type_modname_2 = '.'.join (cpi_type_nselems + \
-             #                                 [cpi_type_cname.lower()])
-             #
-             #  # does either module exist?
-             #  cpi_type_modname = None
-             #
-             #  if  cpi_type_modname_1 in sys.modules :
-             #      cpi_type_modname = cpi_type_modname_1
-             #
-             #  if  cpi_type_modname_2 in sys.modules :
-             #      cpi_type_modname = cpi_type_modname_2
-             #
-             #  if  not cpi_type_modname :
-             #      self._logger.warning("skip adaptor %s: unknown cpi %s",
-             #                           module_name, cpi_type, exc_info=True)
-             #      sys.exit()
-             #      continue
-             #
-             #  # so, make sure the given cpi is actually
-             #  # implemented by the adaptor class
-             #  cpi_ok = False
-             #  for name, cpi_obj \
-             #      in inspect.getmembers (sys.modules[cpi_type_modname]):
-             #      if  name == cpi_type_cname      and \
-             #          inspect.isclass (cpi_obj)       :
-             #          if  issubclass (cpi_class, cpi_obj) :
-             #              cpi_ok = True
-             #
-             #  if not cpi_ok :
-             #      self._logger.warning("skip adaptor %s: no cpi %s (%s)",
-             #                           module_name, cpi_class, cpi_type,
-             #                            exc_info=True)
-             #      continue
-
-
-                # finally, register the cpi for all its schemas!
-                registered_schemas = list()
-                for adaptor_schema in adaptor_schemas:
-
-                    adaptor_schema = adaptor_schema.lower ()
-
-                    # make sure we can register that cpi type
-                    if cpi_type not in self._adaptor_registry:
-                        self._adaptor_registry[cpi_type] = dict()
-
-                    # make sure we can register that schema
-                    if adaptor_schema not in self._adaptor_registry[cpi_type]:
-                        self._adaptor_registry[cpi_type][adaptor_schema] = []
-
-                    # we register the cpi class, so that we can create
-                    # instances as needed, and the adaptor instance,
-                    # as that is passed to the cpi class c'tor later
-                    # on (the adaptor instance is used to share state
-                    # between cpi instances, amongst others)
-                    info = {'cpi_cname'        : cpi_cname,
-                            'cpi_class'        : cpi_class,
-                            'adaptor_name'     : adaptor_name,
-                            'adaptor_instance' : adaptor_instance}
-
-                    # make sure this tuple was not registered, yet
-                    if info in self._adaptor_registry[cpi_type][adaptor_schema]:
-                        self._logger.warning("skip adaptor %s: exists %s: %s",
-                                             module_name, cpi_class,
-                                             adaptor_instance, exc_info=True)
-                        continue
-
-                    self._adaptor_registry[cpi_type] \
-                                          [adaptor_schema].append(info)
-                    registered_schemas.append(str("%s://" % adaptor_schema))
-
-                self._logger.info("Register adaptor %s for %s API: %s" %
-                                 (module_name, cpi_type, registered_schemas))
+            self._logger.info("Register adaptor %s for %s API: %s" %
+                             (module_name, cpi_type, registered_schemas))
 
 
 
@@ -444,6 +563,8 @@ class Engine(object, metaclass=ru.Singleton):
             name)
         '''
 
+        self._load_lazy_adaptors(ctype, schema)
+
         if ctype not in self._adaptor_registry :
             return []
 
@@ -468,6 +589,8 @@ class Engine(object, metaclass=ru.Singleton):
             interact with other adaptors.
         '''
 
+        self._load_lazy_adaptors(name=adaptor_name)
+
         for ctype in list(self._adaptor_registry.keys ()) :
             for schema in list(self._adaptor_registry[ctype].keys ()) :
                 for info in self._adaptor_registry[ctype][schema] :
@@ -482,7 +605,7 @@ class Engine(object, metaclass=ru.Singleton):
     # --------------------------------------------------------------------------
     #
     def bind_adaptor (self, api_instance, ctype, schema,
-                      preferred_adaptor, *args, **kwargs) :
+                      preferred_adaptor, *args, session=None, **kwargs) :
         '''
         Look for a suitable adaptor class to bind to, instantiate it, and
         initialize it.
@@ -490,8 +613,14 @@ class Engine(object, metaclass=ru.Singleton):
         If 'preferred_adaptor' is not 'None', only that given adaptors is
         considered, and adaptor classes are only created from that specific
         adaptor.
+
+        The adaptor class which last bound successfully for the given ctype,
+        schema and session is tried first, and adaptor classes which failed
+        to bind within the last `bind_failure_ttl` seconds are tried last.
         '''
 
+        self._load_lazy_adaptors(ctype, schema)
+
         if ctype not in self._adaptor_registry:
             error_msg = "No adaptor found for '%s' and URL scheme %s://" \
                                   % (ctype, schema)
@@ -505,10 +634,30 @@ class Engine(object, metaclass=ru.Singleton):
             raise rse.NotImplemented(error_msg)
 
 
+        # order the applicable adaptors: the one which bound last time goes
+        # first, recently failed ones go last
+        infos     = self._adaptor_registry[ctype][schema]
+        key       = (ctype, schema, session._id if session else None)
+        cached    = self._bind_cache.get(key)
+        now       = time.time()
+        ttl       = self._bind_failure_ttl
+
+        if len(infos) > 1:
+            good = list()
+            bad  = list()
+            for info in infos:
+                fkey   = key + (info['adaptor_name'], info['cpi_cname'])
+                failed = self._bind_failures.get(fkey, 0)
+                if   info is cached    : good.insert(0, info)
+                elif now - failed < ttl: bad.append(info)
+                else                   : good.append(info)
+            infos = good + bad
+
+
         # cycle through all applicable adaptors, and try to instantiate
         # a matching one.
         exception = rse.NoSuccess ("binding adaptor failed", api_instance)
-        for info in self._adaptor_registry[ctype][schema] :
+        for info in infos :
 
             cpi_cname        = info['cpi_cname']
             cpi_class        = info['cpi_class']
@@ -532,16 +681,22 @@ class Engine(object, metaclass=ru.Singleton):
 
               # self._logger.debug("Successfully bound %s.%s to %s" \
               #                  % (adaptor_name, cpi_cname, api_instance))
+                if info is not cached:
+                    self._bind_cache[key] = info
+                    self._bind_failures.pop(key + (adaptor_name, cpi_cname),
+                                            None)
                 return cpi_instance
 
 
             except rse.SagaException as e :
                 # adaptor class initialization failed - try next one
+                self._bind_failed(key, info)
                 exception._add_exception (e)
                 self._logger.info("adaptor ctor failed : %s.%s: %s"
                                  % (adaptor_name, cpi_class, str(e)))
                 continue
             except Exception as e :
+                self._bind_failed(key, info)
                 exception._add_exception (rse.NoSuccess (str(e), api_instance))
                 self._logger.info("adaptor ctor failed : %s.%s: %s"
                                  % (adaptor_name, cpi_class, str(e)))
@@ -554,6 +709,21 @@ class Engine(object, metaclass=ru.Singleton):
         raise exception._get_exception_stack ()
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _bind_failed (self, key, info):
+        '''
+        Record a failed binding attempt, so that the respective adaptor class is
+        tried last for a while.
+        '''
+
+        self._bind_failures[key + (info['adaptor_name'],
+                                   info['cpi_cname'])] = time.time()
+
+        if self._bind_cache.get(key) is info:
+            self._bind_cache.pop(key, None)
+
+
     # -----------------------------------------------------------------
     #
     def loaded_adaptors (self):
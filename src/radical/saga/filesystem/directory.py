@@ -199,6 +199,129 @@ class Directory (nsdir.Directory) :
         else      :  return self._adaptor.get_size_self (      ttype=ttype)
 
 
+    # --------------------------------------------------------------------------
+    #
+    @rus.takes   ('Directory',
+                  rus.optional (str),
+                  rus.optional (int, rus.nothing),
+                  rus.optional (rus.one_of (SYNC, ASYNC, TASK)))
+    @rus.returns ((rus.list_of (dict), st.Task))
+    def list_entries (self, pattern=None, flags=0, ttype=None) :
+        """
+        list_entries(pattern=None, flags=0)
+
+        List the directory's content, including metadata for each entry.
+
+        :param pattern:  (Optional) entry name pattern (like POSIX 'ls', e.g.
+                         '\*.txt')
+        :type pattern:   str()
+
+        Returns a list of dicts, one per entry, with the following keys:
+
+            url    : saga.Url, the entry name (as returned by `list()`)
+            type   : 'dir', 'file', 'link' or 'other'
+            exists : `False` for broken links, `True` otherwise
+            size   : size in bytes (links are followed)
+            mtime  : modification time in seconds since epoch (links are
+                     followed)
+            nlink  : number of hard links
+            target : target of a symbolic link, `None` for other entries
+
+        This is equivalent to calling `list()`, and then inspecting each entry
+        with `is_dir()`, `get_size()` etc., but usually requires only a single
+        remote operation.
+
+        Example::
+
+            # list all subdirectories
+            dir = saga.filesystem.Directory("sftp://localhost/tmp/")
+            for entry in dir.list_entries () :
+                if entry['type'] == 'dir' :
+                    print(entry['url'])
+        """
+        if  not flags : flags = 0
+        return self._adaptor.list_entries (pattern, flags, ttype=ttype)
+
+
+    # --------------------------------------------------------------------------
+    #
+    @rus.takes   ('Directory',
+                  rus.optional (str),
+                  rus.optional (int, rus.nothing),
+                  rus.optional (rus.one_of (SYNC, ASYNC, TASK)))
+    @rus.returns ((rus.anything, st.Task))
+    def walk (self, pattern=None, flags=0, ttype=None) :
+        """
+        walk(pattern=None, flags=0)
+
+        Recursively iterate over all entries below this directory.
+
+        :param pattern:  (Optional) entry name pattern (like POSIX 'find
+                         -name', e.g. '\*.txt')
+        :type pattern:   str()
+
+        Returns a generator which yields one dict per entry, with the same keys
+        as described for `list_entries()` -- the `url` is the path of the entry
+        relative to this directory.  Symbolic links are not followed, and their
+        `size`, `mtime` and `nlink` are reported as `None`.  Hidden entries are
+        skipped, and hidden directories are not descended into.
+
+        Entries are yielded while they are found -- the walk does not need to
+        complete before the first entries become available, and does not hold
+        the complete tree in memory.
+
+        Example::
+
+            # find all data files in a tree
+            dir = saga.filesystem.Directory("sftp://localhost/tmp/")
+            for entry in dir.walk ('*.dat') :
+                print(entry['url'], entry['size'])
+        """
+        if  not flags : flags = 0
+        return self._adaptor.walk (pattern, flags, ttype=ttype)
+
+
+    # --------------------------------------------------------------------------
+    #
+    @rus.takes   ('Directory',
+                  rus.list_of (tuple),
+                  rus.optional (int, rus.nothing),
+                  rus.optional (rus.one_of (SYNC, ASYNC, TASK)))
+    @rus.returns ((rus.list_of (rus.anything), st.Task))
+    def copy_many (self, pairs, flags=0, ttype=None) :
+        """
+        copy_many(pairs, flags=0)
+
+        Copy a list of entries in one bulk operation.
+
+        :param pairs:    list of `(source, target)` tuples, each as accepted
+                         by `copy()`
+        :param flags:    :ref:`filesystemflags`, applied to all copies
+
+        Returns a list with one element per pair: `None` if that copy
+        succeeded, or the exception describing why it failed.  A failing copy
+        does not abort the other copies.
+
+        Copies are grouped by host, and each group is performed in a single
+        remote operation where the backend supports that (e.g., one sftp batch
+        for all files staged to a remote host).  Asynchronous `copy()` tasks
+        collected in a :class:`saga.task.Container` are also handled this way
+        when the container is run.
+
+        Example::
+
+            # stage input files to a remote directory
+            dir   = saga.filesystem.Directory("sftp://remote.host.net/data/")
+            pairs = [('file://localhost/tmp/in.1', 'in.1'),
+                     ('file://localhost/tmp/in.2', 'in.2')]
+            for pair, err in zip(pairs, dir.copy_many (pairs)) :
+                if err :
+                    print('%s failed: %s' % (pair[0], err))
+        """
+        if  not flags : flags = 0
+        return self._adaptor.copy_many (pairs, flags, ttype=ttype)
+
+
     # --------------------------------------------------------------------------
     #
     @rus.takes   ('Directory',
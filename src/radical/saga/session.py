@@ -274,6 +274,7 @@ class DefaultSession(Session, metaclass=ru.Singleton):
         super(DefaultSession, self).__init__(default=False, uid=uid)
 
         _engine = engine.Engine()
+        _engine._load_lazy_adaptors('radical.saga.Context')
 
         if 'radical.saga.Context' not in _engine._adaptor_registry :
             self._logger.warning ("no context adaptors found")
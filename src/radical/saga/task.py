@@ -21,6 +21,37 @@ from .  import constants         as c
 STATES = [c.UNKNOWN, c.NEW, c.RUNNING, c.DONE, c.FAILED, c.CANCELED]
 
 
+# ------------------------------------------------------------------------------
+#
+# Only some adaptor methods provide metrics, and thus need the `_from_task`
+# parameter.  The CPI decorators determine that once per method and store it
+# as `_from_task` attribute on the wrapping function -- for undecorated methods
+# we inspect the signature once and memoize the result.
+#
+_from_task_cache = dict()
+
+
+def _accepts_from_task (call) :
+
+    func    = getattr (call, '__func__', call)
+    accepts = getattr (func, '_from_task', None)
+
+    if accepts is None :
+
+        accepts = _from_task_cache.get (func)
+
+        if accepts is None :
+            try :
+                params  = inspect.signature (func).parameters
+                accepts = '_from_task' in params
+            except (TypeError, ValueError) :
+                accepts = False
+
+            _from_task_cache[func] = accepts
+
+    return accepts
+
+
 # ------------------------------------------------------------------------------
 #
 class Task (sbase.SimpleBase, satt.Attributes) :
@@ -99,16 +130,15 @@ class Task (sbase.SimpleBase, satt.Attributes) :
         # check if this task is supposed to wrap a callable in a future
         if  '_call'   in self._method_context :
 
-            call   = self._method_context['call']
+            call   = self._method_context['_call']
             args   = self._method_context.get('_args',   list())
             kwargs = self._method_context.get('_kwargs', dict())
 
             # if the called function expects a task handle, provide it.
-            if  '_from_task' in inspect.getargspec (call)[0] and \
-                '_from_task' not in kwargs :
+            if  '_from_task' not in kwargs and _accepts_from_task (call) :
                 kwargs['_from_task'] = self
 
-            self._future = ru.Future (call=call, args=args, kwargs=kwargs)
+            self._future = ru.Future (call, *args, **kwargs)
 
 
         # ensure task goes into the correct state
@@ -174,6 +204,10 @@ class Task (sbase.SimpleBase, satt.Attributes) :
             self._future.wait (timeout)  # FIXME: timeout?!
             self._set_state   (self._future.state)
 
+        elif self.state in c.FINAL :
+            # completed by a bulk container operation
+            pass
+
         else :
             # FIXME: make sure task_wait exists.  Should be part of the CPI!
             self._adaptor.task_wait (self, timeout)
@@ -219,6 +253,19 @@ class Task (sbase.SimpleBase, satt.Attributes) :
         if self._future :
             self._set_state (self._future.state)
 
+        else :
+            # possibly run by a bulk container operation, which the adaptor
+            # keeps track of.  Note that we read the state without triggering
+            # the attribute getter (which calls us).
+            state = self._attributes_i_get (
+                              self._attributes_t_underscore (c.STATE), self._UP)
+
+            if  state not in c.FINAL and self._adaptor :
+                try :
+                    self._set_state (self._adaptor.task_get_state (self))
+                except (se.NotImplemented, AttributeError) :
+                    pass
+
         return self.state
 
 
@@ -406,7 +453,7 @@ class Container (sbase.SimpleBase, satt.Attributes) :
                         m_handle = handle
                         break
 
-                if not handle :
+                if not m_handle :
                     # Hmm, the specified container can't handle the call after
                     # all -- fall back to the unbound handling
                     buckets['unbound'] += tasks
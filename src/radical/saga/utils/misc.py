@@ -21,6 +21,8 @@ from ..    import exceptions as se
 
 _latencies = {}
 
+_share_mode_default = None
+
 
 # --------------------------------------------------------------------
 #
@@ -309,6 +311,81 @@ def normalize_version (v) :
 
 
 # --------------------------------------------------------------------
+#
+def get_ssh_share_mode_default () :
+    """
+    Returns the default ssh share mode (the ``ControlMaster`` setting) for this
+    host: ``no`` on CentOS (which seems to consistently come with old ssh
+    versions which can't handle sharing for sftp channels), and ``auto``
+    everywhere else.
+
+    The OS flavor is determined from ``/etc/os-release``.  The result is cached
+    in memory, and also on disk (in ``$RADICAL_BASE/.radical/saga/``) for as
+    long as ``/etc/os-release`` does not change.
+
+    Note that the ``lsb_release`` probe this replaces compared bytes against
+    strings, and thus never detected CentOS: connection sharing used to be
+    enabled everywhere.  On CentOS hosts, ssh channels, including the tar and
+    striped copy pipes, now each open their own connection unless
+    ``RADICAL_SAGA_PTY_SSH_SHAREMODE`` is set.
+    """
+
+    global _share_mode_default
+
+    if  _share_mode_default :
+        return _share_mode_default
+
+    fname = '/etc/os-release'
+    cache = '%s/ssh_share_mode.cache' % ru.get_radical_base ('saga').rstrip ('/')
+    mode  = 'auto'
+
+    try :
+        mtime = str (os.stat (fname).st_mtime)
+
+    except OSError :
+        # no os-release info - no CentOS either
+        _share_mode_default = mode
+        return _share_mode_default
+
+    try :
+        with open (cache, 'r') as fin :
+            c_mtime, c_mode = fin.read ().split ()
 
+        if  c_mtime == mtime and c_mode in ['auto', 'no'] :
+            _share_mode_default = c_mode
+            return _share_mode_default
 
+    except Exception :
+        # no (valid) cache - probe below
+        pass
+
+    try :
+        flavor = ''
+        with open (fname, 'r') as fin :
+            for line in fin :
+                if  line.startswith ('ID=') :
+                    flavor = line[3:].strip ().strip ('"\'').lower ()
+                    break
+
+        if  flavor in ['centos', 'cent_os', 'cent-os', 'cent os'] :
+            mode = 'no'
+
+    except Exception :
+        # we ignore this then -- default to `auto`
+        pass
+
+    try :
+        ru.rec_makedir (os.path.dirname (cache))
+        with open (cache, 'w') as fout :
+            fout.write ('%s %s\n' % (mtime, mode))
+
+    except Exception :
+        # caching is optional
+        pass
+
+    _share_mode_default = mode
+    return _share_mode_default
+
+
+# --------------------------------------------------------------------
 
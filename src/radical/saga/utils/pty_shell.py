@@ -7,7 +7,11 @@ __license__   = "MIT"
 import re
 import os
 import sys
+import time
+import uuid
 import errno
+import base64
+import hashlib
 import tempfile
 
 import radical.utils              as ru
@@ -27,6 +31,26 @@ from  ..import exceptions         as rse
 #
 _PTY_TIMEOUT = 2.0
 
+# striped transfers use this block size for `dd`
+_STRIPE_BLOCKSIZE = 1024 * 1024
+
+# small files are read and written through the pty, base64 encoded
+_B64_EOF    = 'RS_B64_EOF'
+_B64_ENCODE = "$(command -v base64 >/dev/null " \
+              "&& echo base64 || echo openssl base64)"
+_B64_DECODE = "$(command -v base64 >/dev/null " \
+              "&& echo base64 -d || echo openssl base64 -d)"
+
+# max length of UTF-8 encoded characters, in bytes
+_UTF8_MAX   = 4
+
+# resumable staging: resolve the target path as `cp` would, and report size,
+# mtime and type of that path, and the size of its part file
+_RESUME_STAT = " t='%(path)s'; test -d \"$t\" && t=\"$t/%(base)s\"; " \
+               "echo \"T $t\"; " \
+               "echo \"S $(stat -L -c '%%s %%Y %%F' \"$t\" 2>/dev/null)\"; " \
+               "echo \"P $(stat -c '%%s' \"$t.rs_part\" 2>/dev/null)\""
+
 
 # ------------------------------------------------------------------------------
 #
@@ -782,7 +806,7 @@ class PTYShell (object) :
 
     # ----------------------------------------------------------------
     #
-    def write_to_remote (self, src, tgt) :
+    def write_to_remote (self, src, tgt, offset=None, append=False) :
         """
         :type  src: string
         :param src: data to be staged into the target file
@@ -792,10 +816,22 @@ class PTYShell (object) :
                     The tgt path is not an URL, but expected to be a path
                     relative to the shell's URL.
 
+        :type  offset: int
+        :param offset: write the data at that byte offset (which can be `0`),
+                       leaving the rest of the file intact
+
+        :type  append: bool
+        :param append: append the data to the file
+
         The content of the given string is pasted into a file (specified by tgt)
-        on the remote system.  If that file exists, it is overwritten.
-        A NoSuccess exception is raised if writing the file was not possible
-        (missing permissions, incorrect path, etc.).
+        on the remote system.  If that file exists, it is replaced (unless
+        an `offset` or `append` is given).  A NoSuccess exception is raised if
+        writing the file was not possible (missing permissions, incorrect
+        path, etc.).
+
+        The data are base64 encoded and streamed through the shell's pty as
+        a here document, so that no local temporary file or separate copy
+        connection is needed.
         """
 
         try :
@@ -805,18 +841,33 @@ class PTYShell (object) :
             # FIXME: make this relative to the shell's pwd?  Needs pwd in
             # prompt, and updating pwd state on every find_prompt.
 
-            # first, write data into a tmp file
-            fhandle, fname = tempfile.mkstemp(suffix='.tmp',
-                                              prefix='rs_pty_staging_')
-            os.write(fhandle, str.encode(src))
-            os.fsync(fhandle)
-            os.close(fhandle)
+            if  isinstance (src, str) :
+                src = str.encode (src)
+
+            if  append :
+                redir = ">> '%s'" % tgt
+
+            elif offset is not None :
+                # dd seeks in blocks: use the largest power of two block size
+                # which divides the offset
+                if  offset : bs = min (offset & -offset, _STRIPE_BLOCKSIZE)
+                else       : bs = _STRIPE_BLOCKSIZE
+                redir = "| dd of='%s' bs=%d seek=%d conv=notrunc 2>/dev/null" \
+                      % (tgt, bs, offset // bs)
+
+            else :
+                redir = "> '%s'" % tgt
 
-            ret = self.stage_to_remote (fname, tgt)
+            data = base64.encodebytes (src).decode ()
+            cmd  = " %s <<'%s' %s\n%s%s" % (_B64_DECODE, _B64_EOF, redir,
+                                             data, _B64_EOF)
 
-            os.remove (fname)
+            ret, out, _ = self.run_sync (cmd)
+            if  ret :
+                raise rse.NoSuccess ("write to %s failed (%s): %s"
+                                    % (tgt, ret, out))
 
-            return ret
+            return list()
 
         except Exception as e :
             raise ptye.translate_exception (e) from e
@@ -824,12 +875,25 @@ class PTYShell (object) :
 
     # ----------------------------------------------------------------
     #
-    def read_from_remote (self, src) :
+    def read_from_remote (self, src, offset=0, size=None) :
         """
         :type  src: string
         :param src: path to source file to staged from
                     The src path is not an URL, but expected to be a path
                     relative to the shell's URL.
+
+        :type  offset: int
+        :param offset: start reading at that byte offset
+
+        :type  size: int
+        :param size: read that many bytes (or up to the end of the file)
+
+        Returns the (requested part of the) content of the file as string.
+        Like `write_to_remote()`, this streams the data through the shell's
+        pty.  A multibyte UTF-8 character which starts within the requested
+        range is always returned completely, so the result can be up to three
+        bytes longer than `size`, and a subsequent read at the end of the
+        range starts at a character boundary.
         """
 
         try :
@@ -839,20 +903,33 @@ class PTYShell (object) :
             # FIXME: make this relative to the shell's pwd?  Needs pwd in
             # prompt, and updating pwd state on every find_prompt.
 
-            # first, write data into a tmp file
-            fhandle, fname = tempfile.mkstemp(suffix='.tmp', prefix='rs_pty_staging_')
-            _ = self.stage_from_remote (src, fname)
-            os.close(fhandle)
+            # the data are base64 encoded for the transfer through the pty --
+            # the decoder ignores the pty's line breaks
+            if  offset : cat = "tail -c +%d '%s'" % (offset + 1, src)
+            else       : cat = "cat '%s'"         % src
+
+            # fetch enough extra bytes to complete a character at the end of
+            # the range
+            if  size is not None :
+                cat += " | head -c %d" % (size + _UTF8_MAX - 1)
 
-            os.system('sync')  # WTF?  Why do I need this?
+            ret, out, _ = self.run_sync (" if test -r '%s'; then %s | %s; "
+                                         "else echo 'No such file: %s'; "
+                                         "false; fi"
+                                        % (src, cat, _B64_ENCODE, src))
+            if  ret :
+                if 'No such file' in out :
+                    raise rse.DoesNotExist ("read from %s failed: %s"
+                                           % (src, out))
+                raise rse.NoSuccess ("read from %s failed (%s): %s"
+                                    % (src, ret, out))
 
-            fhandle2 = open(fname, 'r')
-            out      = fhandle2.read()
-            fhandle2.close()
+            data = base64.b64decode (out)
 
-            os.remove(fname)
+            if  size is not None :
+                data = data[:size + _utf8_missing (data[:size])]
 
-            return out
+            return data.decode ()
 
         except Exception as e :
             raise ptye.translate_exception (e) from e
@@ -871,6 +948,11 @@ class PTYShell (object) :
         :param tgt: path to target file to stage to.
                     The tgt path is not an URL, but expected to be a path
                     relative to the shell's URL.
+
+
+        If `ssh_stage_resume` is enabled, single files are staged like
+        `rsync --partial` would: unchanged targets are skipped, interrupted
+        transfers are resumed, and the result is checksum-verified.
         """
 
         self._trace ("stage to  : %s -> %s" % (src, tgt))
@@ -879,6 +961,11 @@ class PTYShell (object) :
         # prompt, and updating pwd state on every find_prompt.
 
         try :
+            if  self._use_resume (src, cp_flags) :
+                ret = self._stage_resumable ('put', src, tgt)
+                if  ret is not None :
+                    return ret
+
             return self.run_copy_to (src, tgt, cp_flags)
 
         except Exception as e :
@@ -898,6 +985,9 @@ class PTYShell (object) :
         :param tgt: path of local target file to stage to.
                     The tgt path is not an URL, but expected to be a path
                     relative to the current working directory.
+
+
+        See `stage_to_remote()` for the resumable mode.
         """
 
         self._trace ("stage from: %s -> %s" % (src, tgt))
@@ -906,12 +996,421 @@ class PTYShell (object) :
         # prompt, and updating pwd state on every find_prompt.
 
         try :
+            if  self._use_resume (src, cp_flags) :
+                ret = self._stage_resumable ('get', src, tgt)
+                if  ret is not None :
+                    return ret
+
             return self.run_copy_from (src, tgt, cp_flags)
 
         except Exception as e :
             raise ptye.translate_exception (e) from e
 
 
+    # --------------------------------------------------------------------------
+    #
+    def _use_resume (self, src, cp_flags) :
+
+        info = self.pty_info
+
+        if  info['shell_type'] != 'ssh'       : return False
+        if  not info.get ('ssh_stage_resume') : return False
+        if  '-r' in (cp_flags or '')          : return False
+        if  any ([c in src for c in '*?['])   : return False
+
+        return True
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _stage_resumable (self, mode, src, tgt) :
+        """
+        Stage a single file, skipping the transfer if the target has the same
+        size and mtime as the source (and, if `ssh_stage_checksum` is enabled,
+        the same checksum).  Data are written into a part file next to the
+        target which survives failed transfers: the next attempt verifies the
+        part file's content block by block against the source, and only
+        transfers the remainder.  Returns `None` if `src` is not a regular
+        file, so that the caller can fall back to a plain copy.
+        """
+
+        info = self.pty_info
+        bs   = _STRIPE_BLOCKSIZE
+
+        if  mode == 'put' :
+
+            if  not os.path.isfile (src) :
+                return None
+
+            s_size  = os.path.getsize (src)
+            s_mtime = int(os.path.getmtime (src))
+
+            ret, out, _ = self.run_sync (_RESUME_STAT
+                                        % {'path' : tgt,
+                                           'base' : os.path.basename (src)})
+            if  ret :
+                return None
+
+            stat    = _parse_resume_stat (out)
+            tgt     = stat['path']
+            t_size  = stat['size']
+            t_mtime = stat['mtime']
+            p_size  = stat['part']
+
+            src_md5 = lambda n=None       : _local_md5 (src, n)
+            tgt_md5 = lambda path, n=None : self._remote_md5 (path, n)
+
+        else :
+
+            ret, out, _ = self.run_sync (_RESUME_STAT
+                                        % {'path' : src, 'base' : ''})
+            if  ret :
+                return None
+
+            stat = _parse_resume_stat (out)
+            if  not stat['type'] or 'regular' not in stat['type'] :
+                return None
+
+            s_size  = stat['size']
+            s_mtime = stat['mtime']
+
+            if  os.path.isdir (tgt) :
+                tgt = os.path.join (tgt, os.path.basename (src))
+
+            t_size  = None
+            t_mtime = None
+            p_size  = None
+
+            if  os.path.isfile (tgt) :
+                t_size  = os.path.getsize (tgt)
+                t_mtime = int(os.path.getmtime (tgt))
+            if  os.path.isfile (tgt + '.rs_part') :
+                p_size  = os.path.getsize (tgt + '.rs_part')
+
+            src_md5 = lambda n=None       : self._remote_md5 (src, n)
+            tgt_md5 = lambda path, n=None : _local_md5 (path, n)
+
+        part = tgt + '.rs_part'
+
+        # unchanged targets are skipped
+        if  t_size == s_size and t_mtime == s_mtime :
+            if  not info.get ('ssh_stage_checksum') or \
+                src_md5 () == tgt_md5 (tgt) :
+                self._trace ("stage skip: %s -> %s" % (src, tgt))
+                return list()
+
+        # resume from the last full block of the part file which matches the
+        # source -- otherwise start from scratch
+        offset = 0
+        if  p_size and p_size <= s_size :
+            offset = (p_size // bs) * bs
+            if  offset and src_md5 (offset) != tgt_md5 (part, offset) :
+                offset = 0
+
+        if  p_size and not offset :
+            if  mode == 'put' : self.run_sync (" rm -f '%s'" % part,
+                                               iomode=IGNORE)
+            else              : os.unlink (part)
+
+        self._trace ("stage res : %s -> %s (%d / %d bytes)"
+                    % (src, tgt, offset, s_size))
+
+        repl = dict (info)
+        repl['src']   = src
+        repl['part']  = part
+        repl['bs']    = bs
+        repl['skip']  = offset // bs
+        repl['count'] = ''
+
+        script  = 'copy_to' if mode == 'put' else 'copy_from'
+        s_cmd   = info['scripts']['stripe+ssh'][script] % repl
+        cp_proc = supp.PTYProcess (['/bin/sh', '-c', s_cmd], cfg=self.cfg)
+        out     = cp_proc.wait ()
+
+        # the part file is kept for the next attempt
+        if  cp_proc.exit_code :
+            raise rse.NoSuccess ("file copy failed: %s" % out)
+
+        try :
+            self._verify_part (mode, part, s_size, src_md5 ())
+
+        except Exception :
+            # the part file is corrupt -- do not resume from it
+            if  mode == 'put' : self.run_sync (" rm -f '%s'" % part,
+                                               iomode=IGNORE)
+            else              : os.unlink (part)
+            raise
+
+        self._commit_part (mode, part, tgt, s_mtime)
+
+        return list()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _use_tar (self, mode, src, cp_flags) :
+        """
+        Recursive copies of large directory trees are slow over sftp and scp,
+        which handle one file at a time.  If the source of a recursive copy is
+        a single directory with at least `ssh_tar_threshold` entries, we stream
+        the tree through a tar pipe over the ssh connection instead.
+        """
+
+        info  = self.pty_info
+        limit = info.get ('ssh_tar_threshold', 0)
+
+        if  info['shell_type'] != 'ssh'  : return False
+        if  '-r' not in (cp_flags or '') : return False
+        if  limit <= 0                   : return False
+
+        if  any ([c in src for c in '*?[']) :
+            # wildcards are left to the copy tool
+            return False
+
+        src = src.rstrip ('/')
+        if  not src :
+            return False
+
+        if  mode == 'put' :
+
+            if  not os.path.isdir (src) :
+                return False
+
+            n = 0
+            for _, dirs, files in os.walk (src) :
+                n += len(dirs) + len(files)
+                if  n >= limit :
+                    return True
+            return False
+
+        else :
+
+            ret, out, _ = self.run_sync (" test -d '%s' && find '%s' | head -n %d | wc -l"
+                                        % (src, src, limit + 1))
+            if  ret :
+                return False
+
+            try :
+                # `find` also lists `src` itself
+                return int(out.strip ()) - 1 >= limit
+            except ValueError :
+                return False
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _run_copy_tar (self, mode, src, tgt) :
+
+        info = self.pty_info
+        src  = src.rstrip ('/')
+        repl = dict (info)
+        repl['src']       = src
+        repl['tgt']       = tgt
+        repl['src_dir']   = os.path.dirname  (src) or '.'
+        repl['src_base']  = os.path.basename (src)
+        repl['tar_flags'] = 'z' if info.get ('ssh_tar_compress') else ''
+
+        script = 'copy_to' if mode == 'put' else 'copy_from'
+        s_cmd  = info['scripts']['tar+ssh'][script] % repl
+
+        self._trace ("copy  tar : %s" % s_cmd)
+
+        cp_proc = supp.PTYProcess (['/bin/sh', '-c', s_cmd], cfg=self.cfg)
+        out     = cp_proc.wait ()
+        if  cp_proc.exit_code :
+            if 'No such file or directory' in out :
+                raise rse.DoesNotExist._log(info['logger'],
+                                           "file copy failed: %s" % out)
+            raise ptye.translate_exception(rse.NoSuccess(
+                                     "file copy failed: %s" % out))
+
+        return list()
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _use_stripes (self, mode, src, cp_flags) :
+        """
+        A single ssh stream is usually limited by cipher and window sizes, well
+        below the available network bandwidth.  If `src` is a single file with
+        at least `ssh_stripe_threshold` bytes, we transfer it as several byte
+        range stripes in parallel.  Returns the file size in that case, and `0`
+        otherwise.
+
+        Striping is disabled by default.  Only if it is enabled, the size of
+        remote files is checked, at the cost of one more round trip.
+        """
+
+        info  = self.pty_info
+        limit = info.get ('ssh_stripe_threshold', 0)
+
+        if  info['shell_type'] != 'ssh'          : return 0
+        if  '-r' in (cp_flags or '')             : return 0
+        if  limit <= 0                           : return 0
+        if  info.get ('ssh_stripe_count', 1) < 2 : return 0
+        if  any ([c in src for c in '*?['])      : return 0
+
+        if  mode == 'put' :
+
+            if  not os.path.isfile (src) :
+                return 0
+            size = os.path.getsize (src)
+
+        else :
+
+            ret, out, _ = self.run_sync (" test -f '%s' && wc -c < '%s'"
+                                        % (src, src))
+            if  ret :
+                return 0
+            try :
+                size = int(out.strip ())
+            except ValueError :
+                return 0
+
+        if  size < limit :
+            return 0
+
+        return size
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _remote_md5 (self, path, length=None) :
+        """
+        md5 checksum of the remote file (or of its first `length` bytes), or
+        `None` if that cannot be computed.
+        """
+
+        if  length is None : cat = "cat '%s'"        % path
+        else               : cat = "head -c %d '%s'" % (length, path)
+
+        ret, out, _ = self.run_sync (" test -r '%s' && %s | $(command -v md5sum "
+                                     "|| echo md5 -q)" % (path, cat))
+        if  ret or not out.strip () :
+            return None
+
+        return out.split ()[0]
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _verify_part (self, mode, part, size, src_md5) :
+        """
+        Check that a part file matches the md5 checksum of its source, or at
+        least its size if no checksum is available.
+        """
+
+        if  mode == 'put' : tgt_md5 = self._remote_md5 (part)
+        else              : tgt_md5 = _local_md5 (part)
+
+        if  src_md5 and tgt_md5 :
+            if  src_md5 != tgt_md5 :
+                raise rse.NoSuccess ("file copy failed: checksum mismatch "
+                                     "(%s != %s)" % (src_md5, tgt_md5))
+            return
+
+        # no md5 tool on the remote side -- check size at least
+        self.pty_info['logger'].warning ("cannot checksum %s, checking size "
+                                         "only" % part)
+        if  mode == 'put' :
+            ret, out, _ = self.run_sync (" wc -c < '%s'" % part)
+            tgt_size    = int(out.strip ()) if not ret else -1
+        else :
+            tgt_size    = os.path.getsize (part)
+
+        if  tgt_size != size :
+            raise rse.NoSuccess ("file copy failed: size mismatch "
+                                 "(%s != %s)" % (size, tgt_size))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _commit_part (self, mode, part, tgt, mtime=None) :
+        """
+        Move a verified part file to its target, and set the target's mtime.
+        """
+
+        if  mode == 'put' :
+            cmd = " mv -f '%s' '%s'" % (part, tgt)
+            if  mtime is not None :
+                stamp = time.strftime ('%Y%m%d%H%M.%S', time.gmtime (mtime))
+                cmd  += " && TZ=UTC touch -m -t %s '%s'" % (stamp, tgt)
+            ret, out, _ = self.run_sync (cmd)
+            if  ret :
+                raise rse.NoSuccess ("file copy failed: %s" % out)
+
+        else :
+            os.rename (part, tgt)
+            if  mtime is not None :
+                os.utime (tgt, (mtime, mtime))
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _run_copy_striped (self, mode, src, tgt, size) :
+
+        info   = self.pty_info
+        bs     = _STRIPE_BLOCKSIZE
+        ranges = _stripe_ranges (size, info['ssh_stripe_count'], bs)
+
+        # like `cp`, copy into `tgt` if that is a directory
+        if  mode == 'put' :
+            ret, _, _ = self.run_sync (" test -d '%s'" % tgt)
+            if  not ret :
+                tgt = '%s/%s' % (tgt.rstrip ('/'), os.path.basename (src))
+        elif os.path.isdir (tgt) :
+            tgt = os.path.join (tgt, os.path.basename (src))
+
+        # stripes are written into a part file next to the target, which only
+        # replaces the target once it is complete and verified
+        part   = '%s.rs_part.%s' % (tgt, uuid.uuid4 ().hex[:8])
+        script = 'copy_to' if mode == 'put' else 'copy_from'
+
+        self._trace ("copy  strp: %s -> %s (%d stripes)"
+                    % (src, tgt, len(ranges)))
+
+        try :
+            procs = list()
+            for skip, count in ranges :
+
+                repl = dict (info)
+                repl['src']   = src
+                repl['part']  = part
+                repl['bs']    = bs
+                repl['skip']  = skip
+                repl['count'] = 'count=%d' % count if count else ''
+
+                s_cmd = info['scripts']['stripe+ssh'][script] % repl
+                procs.append (supp.PTYProcess (['/bin/sh', '-c', s_cmd],
+                                               cfg=self.cfg))
+
+            # checksum the source while the stripes are in flight
+            if  mode == 'put' : src_md5 = _local_md5 (src)
+            else              : src_md5 = self._remote_md5 (src)
+
+            errors = list()
+            for proc in procs :
+                out = proc.wait ()
+                if  proc.exit_code :
+                    errors.append (out.strip () or 'exit %s' % proc.exit_code)
+
+            if  errors :
+                raise rse.NoSuccess ("file copy failed: %s" % '; '.join (errors))
+
+            self._verify_part (mode, part, size, src_md5)
+            self._commit_part (mode, part, tgt)
+
+        except Exception :
+
+            if  mode == 'put' :
+                self.run_sync (" rm -f '%s'" % part, iomode=IGNORE)
+            elif os.path.exists (part) :
+                os.unlink (part)
+            raise
+
+        return list()
+
+
     # --------------------------------------------------------------------------
     #
     def run_copy_to (self, src, tgt, cp_flags=None) :
@@ -929,6 +1428,13 @@ class PTYShell (object) :
         if cp_flags is None:
             cp_flags = ''
 
+        if  self._use_tar ('put', src, cp_flags) :
+            return self._run_copy_tar ('put', src, tgt)
+
+        size = self._use_stripes ('put', src, cp_flags)
+        if  size :
+            return self._run_copy_striped ('put', src, tgt, size)
+
         with self.pty_shell.rlock :
 
             self._trace ("copy  to  : %s -> %s" % (src, tgt))
@@ -1066,6 +1572,13 @@ class PTYShell (object) :
         need to expand wildcards on the *remote* side :/
         """
 
+        if  self._use_tar ('get', src, cp_flags) :
+            return self._run_copy_tar ('get', src, tgt)
+
+        size = self._use_stripes ('get', src, cp_flags)
+        if  size :
+            return self._run_copy_striped ('get', src, tgt, size)
+
         with self.pty_shell.rlock :
 
             self._trace ("copy  from: %s -> %s" % (src, tgt))
@@ -1170,5 +1683,321 @@ class PTYShell (object) :
             return files
 
 
+    # --------------------------------------------------------------------------
+    #
+    def run_copy_many_to (self, pairs, cp_flags=None, make_parents=False) :
+        """
+        Copy a list of `(src, tgt)` pairs, where `src` is a local path and `tgt`
+        a path on the remote host.  Returns a list with one element per pair,
+        which is `None` if the copy succeeded, or the respective exception
+        otherwise.
+
+        In `sftp` copy mode, all pairs are transferred in a single sftp batch
+        (`sftp -b`) over the shared ssh connection.  If `make_parents` is set,
+        the batch will also create missing parent directories of the targets.
+        Other copy modes fall back to one `run_copy_to()` per pair.
+        """
+
+        return self._run_copy_many ('put', pairs, cp_flags, make_parents)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def run_copy_many_from (self, pairs, cp_flags=None, make_parents=False) :
+        """
+        Like `run_copy_many_to()`, but `src` is a path on the remote host, and
+        `tgt` a local path.
+        """
+
+        return self._run_copy_many ('get', pairs, cp_flags, make_parents)
+
+
+    # --------------------------------------------------------------------------
+    #
+    def _run_copy_many (self, mode, pairs, cp_flags, make_parents) :
+
+        if cp_flags is None:
+            cp_flags = ''
+
+        info    = self.pty_info
+        results = [None] * len(pairs)
+
+        # parent directories of the targets, top-down
+        parents = list()
+        if  make_parents :
+            dirs = set()
+            for _, tgt in pairs :
+                path = os.path.dirname (tgt)
+                while path not in dirs and path not in ['', '/', '.'] :
+                    dirs.add (path)
+                    path = os.path.dirname (path)
+            parents = sorted (dirs, key=lambda x: x.count ('/'))
+
+        if  mode == 'get' :
+            # local targets
+            for path in parents :
+                ru.rec_makedir (path)
+            parents = list()
+
+        # in sftp mode, large trees and files are not batched, but transferred
+        # one by one via tar or in stripes.  `special` maps their indexes to
+        # the file size for stripes, and to `0` for tar.  Remote file sizes are
+        # not checked, to keep the batch cheap.
+        special = dict()
+        if  info['copy_mode'] == 'sftp' :
+            for idx, (src, _) in enumerate (pairs) :
+                if  self._use_tar (mode, src, cp_flags) :
+                    special[idx] = 0
+                elif mode == 'put' :
+                    size = self._use_stripes (mode, src, cp_flags)
+                    if  size :
+                        special[idx] = size
+
+        if  info['copy_mode'] != 'sftp' or special :
+
+            # create parent dirs upfront
+            # keep command lines well below the tty line length limit
+            while parents :
+                chunk = list()
+                while parents and sum ([len(p) + 3 for p in chunk]) < 2048 :
+                    chunk.append (parents.pop (0))
+                self.run_sync (" mkdir -p %s"
+                              % ' '.join (["'%s'" % p for p in chunk]),
+                              iomode=IGNORE)
+
+        if  info['copy_mode'] != 'sftp' :
+
+            # no batch support -- copy one by one
+            for idx, (src, tgt) in enumerate (pairs) :
+                try :
+                    if  mode == 'put' : self.run_copy_to   (src, tgt, cp_flags)
+                    else              : self.run_copy_from (src, tgt, cp_flags)
+                except Exception as e :
+                    results[idx] = ptye.translate_exception (e)
+
+            return results
+
+        for idx, size in special.items () :
+            src, tgt = pairs[idx]
+            try :
+                if  size : self._run_copy_striped (mode, src, tgt, size)
+                else     : self._run_copy_tar     (mode, src, tgt)
+            except Exception as e :
+                results[idx] = ptye.translate_exception (e)
+
+        with self.pty_shell.rlock :
+
+            self._trace ("copy many : %s (%d)" % (mode, len(pairs)))
+
+            # all commands are prefixed with '-', so that sftp continues with
+            # the batch on errors.  `owners` maps batch commands to pairs.
+            batch  = list()
+            owners = list()
+
+            for path in parents :
+                batch.append  ('-mkdir "%s"' % path)
+                owners.append (None)
+
+            for idx, (src, tgt) in enumerate (pairs) :
+
+                if  idx in special :
+                    continue
+
+                batch.append  ('-%s %s "%s" "%s"' % (mode, cp_flags, src, tgt))
+                owners.append (idx)
+
+            if  not [o for o in owners if o is not None] :
+                return results
+
+            fhandle, fname = tempfile.mkstemp (suffix='.batch',
+                                               prefix='rs_pty_copy_')
+            try :
+                os.write (fhandle, str.encode ('\n'.join (batch) + '\n'))
+                os.close (fhandle)
+
+                repl = dict (info)
+                repl['src']      = ''
+                repl['tgt']      = ''
+                repl['cp_flags'] = cp_flags
+                repl['s_flags']  = '%s -b "%s"' % (info['s_flags'], fname)
+
+                script = 'copy_to' if mode == 'put' else 'copy_from'
+                s_cmd  = info['scripts']['sftp'][script] % repl
+
+                cp_proc = supp.PTYProcess (s_cmd, cfg=self.cfg)
+                out     = cp_proc.wait ()
+
+            finally :
+                os.remove (fname)
+
+            errors = _parse_sftp_batch (out, len(batch))
+
+            for cmd_idx, msg in errors.items () :
+
+                idx = owners[cmd_idx]
+                if  idx is None :
+                    # failing mkdir's are expected for existing dirs
+                    continue
+
+                if 'No such file' in msg or 'not found' in msg :
+                    results[idx] = rse.DoesNotExist ("file copy failed: %s"
+                                                     % msg)
+                else :
+                    results[idx] = rse.NoSuccess ("file copy failed: %s" % msg)
+
+            # an sftp failure before the batch ran fails all batched pairs
+            if  cp_proc.exit_code and not errors :
+                for idx in owners :
+                    if  idx is not None :
+                        results[idx] = rse.NoSuccess ("file copy failed: %s"
+                                                      % out)
+
+            info['logger'].debug ("copy many done: %d/%d failed"
+                                 % (len([r for r in results if r]), len(pairs)))
+
+            return results
+
+
+# ------------------------------------------------------------------------------
+#
+def _utf8_missing (data) :
+    """
+    Return the number of bytes missing to complete the UTF-8 character at the
+    end of `data`, or `0` if `data` ends on a character boundary.
+    """
+
+    for i in range (1, min (len (data), _UTF8_MAX) + 1) :
+
+        byte = data[-i]
+
+        if  byte & 0xC0 == 0x80 :
+            # continuation byte - look further back for the lead byte
+            continue
+
+        if    byte & 0xE0 == 0xC0 : need = 2
+        elif  byte & 0xF0 == 0xE0 : need = 3
+        elif  byte & 0xF8 == 0xF0 : need = 4
+        else                      : need = 1
+
+        return max (0, need - i)
+
+    return 0
+
+
+# ------------------------------------------------------------------------------
+#
+def _stripe_ranges (size, n, bs=_STRIPE_BLOCKSIZE) :
+    """
+    Split `size` bytes into at most `n` stripes of whole `bs` byte blocks, and
+    return a list of `(skip, count)` block ranges for `dd`.  The last stripe
+    has `count=None`, i.e. extends to the end of the file.
+    """
+
+    blocks = (size + bs - 1) // bs
+    per    = (blocks + n - 1) // n
+    ret    = list()
+
+    for i in range (n) :
+
+        skip = i * per
+        if  skip >= blocks :
+            break
+
+        if  i < n - 1 and skip + per < blocks : ret.append ((skip, per))
+        else                                  : ret.append ((skip, None))
+
+    return ret
+
+
+# ------------------------------------------------------------------------------
+#
+def _local_md5 (path, length=None) :
+
+    md5 = hashlib.md5 ()
+    with open (path, 'rb') as fin :
+        while length is None or length > 0 :
+            n = _STRIPE_BLOCKSIZE
+            if  length is not None :
+                n       = min (n, length)
+                length -= n
+            chunk = fin.read (n)
+            if  not chunk :
+                break
+            md5.update (chunk)
+
+    return md5.hexdigest ()
+
+
+# ------------------------------------------------------------------------------
+#
+def _parse_resume_stat (out) :
+    """
+    Parse the output of `_RESUME_STAT` into a dict with the resolved `path`,
+    and with `size`, `mtime` and `type` of that path and the `part` size of
+    its part file (`None` if the respective file does not exist).
+    """
+
+    ret = {'path' : None, 'size' : None, 'mtime' : None,
+           'type' : None, 'part' : None}
+
+    for line in out.split ('\n') :
+
+        tag, _, val = line.strip ().partition (' ')
+        val = val.strip ()
+
+        if  tag == 'T' :
+            ret['path'] = val
+
+        elif tag == 'S' and val :
+            elems = val.split (None, 2)
+            if  len(elems) == 3 :
+                ret['size']  = int(elems[0])
+                ret['mtime'] = int(elems[1])
+                ret['type']  = elems[2]
+
+        elif tag == 'P' and val :
+            ret['part'] = int(val)
+
+    return ret
+
+
+# ------------------------------------------------------------------------------
+#
+def _parse_sftp_batch (out, n_cmds) :
+    """
+    sftp echoes each batch command as `sftp> <command>` before running it.  We
+    attribute all other non-informational output lines to the last echoed
+    command, and return a dict mapping the indexes of failed commands to their
+    error messages.
+    """
+
+    errors = dict()
+    idx    = -1
+
+    for line in out.split ('\n') :
+
+        line = line.strip ()
+
+        if  not line :
+            continue
+
+        if  line.startswith ('sftp>') :
+            idx += 1
+            continue
+
+        if  idx < 0 or idx >= n_cmds :
+            # connection chatter, or output after the batch
+            continue
+
+        if  line.startswith (('Uploading', 'Fetching', 'Entering',
+                              'Retrieving')) :
+            continue
+
+        if  idx in errors : errors[idx] += ' ' + line
+        else              : errors[idx]  =       line
+
+    return errors
+
+
 # ------------------------------------------------------------------------------
 
@@ -87,6 +87,38 @@ _SCRIPTS = {
         'copy_from_in' : 'mget %(cp_flags)s "%(src)s" "%(tgt)s"',
         'copy_is_posix': False
     },
+    # recursive copies of large trees are streamed through a tar pipe over the
+    # (shared) ssh connection -- see `PTYShell._use_tar()`.  The pipelines are
+    # run via `/bin/sh -c`, and a non-existing target is created as copy of the
+    # source dir, as `cp -r` would do.
+    'tar+ssh' : {
+        'copy_to'      : 'tar -c%(tar_flags)sf - -C "%(src_dir)s" "%(src_base)s" | '
+                         '%(ssh_env)s "%(ssh_exe)s" %(ssh_args)s -T %(s_flags)s %(host_str)s '
+                         '\'if test -d "%(tgt)s"; then tar -x%(tar_flags)sf - -C "%(tgt)s"; '
+                         'else mkdir -p "%(tgt)s" && tar -x%(tar_flags)sf - -C "%(tgt)s" --strip-components=1; fi\'',
+        'copy_from'    : '%(ssh_env)s "%(ssh_exe)s" %(ssh_args)s -T %(s_flags)s %(host_str)s '
+                         '\'tar -c%(tar_flags)sf - -C "%(src_dir)s" "%(src_base)s"\' | '
+                         '{ if test -d "%(tgt)s"; then tar -x%(tar_flags)sf - -C "%(tgt)s"; '
+                         'else mkdir -p "%(tgt)s" && tar -x%(tar_flags)sf - -C "%(tgt)s" --strip-components=1; fi; }',
+        'copy_to_in'   : '',
+        'copy_from_in' : '',
+        'copy_is_posix': True
+    },
+    # large files are transferred as concurrent byte range stripes, each over
+    # its own channel of the (shared) ssh connection -- see
+    # `PTYShell._use_stripes()`.  Each stripe is written at its offset into
+    # a part file, which is renamed to the target once all stripes completed.
+    'stripe+ssh' : {
+        'copy_to'      : 'dd if="%(src)s" bs=%(bs)d skip=%(skip)d %(count)s 2>/dev/null | '
+                         '%(ssh_env)s "%(ssh_exe)s" %(ssh_args)s -T %(s_flags)s %(host_str)s '
+                         '\'dd of="%(part)s" bs=%(bs)d seek=%(skip)d conv=notrunc 2>/dev/null\'',
+        'copy_from'    : '%(ssh_env)s "%(ssh_exe)s" %(ssh_args)s -T %(s_flags)s %(host_str)s '
+                         '\'dd if="%(src)s" bs=%(bs)d skip=%(skip)d %(count)s 2>/dev/null\' | '
+                         'dd of="%(part)s" bs=%(bs)d seek=%(skip)d conv=notrunc 2>/dev/null',
+        'copy_to_in'   : '',
+        'copy_from_in' : '',
+        'copy_is_posix': True
+    },
     'sh' : {
         'master'       : '%(sh_env)s "%(sh_exe)s"  %(sh_args)s',
         'shell'        : '%(sh_env)s "%(sh_exe)s"  %(sh_args)s',
@@ -495,6 +527,21 @@ class PTYShellFactory (object, metaclass=ru.Singleton) :
             info['ssh_share_mode'] = cfg['ssh_share_mode']
             info['ssh_timeout']    = cfg['ssh_timeout']
 
+            # recursive copies of at least that many files use a tar pipe
+            info['ssh_tar_threshold'] = int(cfg.get('ssh_tar_threshold', 0))
+            info['ssh_tar_compress']  = str(cfg.get('ssh_tar_compress', '')) \
+                                        .lower () in ['true', 'yes', '1']
+
+            # files of at least that many bytes are transferred in stripes
+            info['ssh_stripe_threshold'] = int(cfg.get('ssh_stripe_threshold', 0))
+            info['ssh_stripe_count']     = int(cfg.get('ssh_stripe_count',     1))
+
+            # staging can skip unchanged files and resume partial ones
+            info['ssh_stage_resume']   = str(cfg.get('ssh_stage_resume', '')) \
+                                         .lower () in ['true', 'yes', '1']
+            info['ssh_stage_checksum'] = str(cfg.get('ssh_stage_checksum', '')) \
+                                         .lower () in ['true', 'yes', '1']
+
             logger.info ("ssh copy  mode set to '%s'" % info['ssh_copy_mode' ])
             logger.info ("ssh share mode set to '%s'" % info['ssh_share_mode'])
             logger.info ("ssh timeout    set to '%s'" % info['ssh_timeout'])
@@ -515,6 +562,13 @@ class PTYShellFactory (object, metaclass=ru.Singleton) :
                 info['schema'] = 'local'
 
 
+            # the share mode default depends on the OS flavor, which we only
+            # probe if the user did not explicitly specify the share mode
+            if  info['schema'] in _SCHEMAS_SSH + _SCHEMAS_GSI     and \
+                info['ssh_share_mode'] == 'auto'                  and \
+                'RADICAL_SAGA_PTY_SSH_SHAREMODE' not in os.environ    :
+                info['ssh_share_mode'] = sumisc.get_ssh_share_mode_default ()
+
             # find out what type of shell we have to deal with
             if  info['schema'] in _SCHEMAS_SSH :
                 info['shell_type'] = "ssh"
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for driver pooling, catalog caching and state monitoring of the EC2
+resource adaptor, against libcloud's dummy driver.
+"""
+
+import time
+import collections
+
+import pytest
+
+lcdummy = pytest.importorskip('libcloud.compute.drivers.dummy')
+lctypes = pytest.importorskip('libcloud.compute.types')
+
+import radical.saga as rs
+
+from radical.saga.adaptors.aws import ec2_resource as rsaec2
+
+
+# ------------------------------------------------------------------------------
+#
+class _Driver(lcdummy.DummyNodeDriver):
+    """
+    Dummy driver which counts the API calls it serves.
+    """
+
+    def __init__(self):
+
+        super().__init__(0)
+        self.calls = collections.Counter()
+
+    def list_nodes(self):
+        self.calls['list_nodes'] += 1
+        return super().list_nodes()
+
+    def list_sizes(self, location=None):
+        self.calls['list_sizes'] += 1
+        return super().list_sizes(location)
+
+    def list_images(self, location=None):
+        self.calls['list_images'] += 1
+        return super().list_images(location)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ec2_monitor():
+
+    session = rs.Session()
+    ctx     = rs.Context('ec2')
+    ctx.user_id  = 'user'
+    ctx.user_key = 'secret'
+    session.add_context(ctx)
+
+    # the adaptor is a singleton: reset state of earlier tests, and register
+    # the dummy driver for our credentials
+    driver  = _Driver()
+    adaptor = rsaec2.Adaptor()
+    adaptor.monitor_interval = 0.1
+    adaptor.catalogs.clear()
+    adaptor.drivers[('aws', 'user', 'secret', None)] = driver
+
+    # all managers share the driver and its catalogs
+    mgrs = [rs.resource.Manager('ec2://', session=session) for _ in range(2)]
+    for mgr in mgrs:
+        assert mgr.list_templates() == ['Small', 'Medium', 'Big', 'XXL Big']
+        assert sorted(mgr.list_images()) == ['1', '2', '3']
+
+    rd = rs.resource.ComputeDescription()
+    rd.template = 'Small'
+    rd.image    = '1'
+
+    computes = [mgrs[i % 2].acquire(rd) for i in range(20)]
+
+    assert [cr.state for cr in computes] == [rs.resource.ACTIVE] * 20
+    assert computes[0].access == 'ssh://127.0.0.3/'
+    assert driver.calls == {'list_sizes' : 1, 'list_images': 1}
+
+    # all nodes go away: the monitor picks that up for all resources at once
+    for node in driver.list_nodes():
+        node.state = lctypes.NodeState.TERMINATED
+
+    driver.calls.clear()
+    for cr in computes:
+        cr.wait(rs.resource.EXPIRED, timeout=10)
+
+    assert [cr.state for cr in computes] == [rs.resource.EXPIRED] * 20
+    assert driver.calls['list_nodes'] < 10
+
+    with pytest.raises(rs.IncorrectState):
+        computes[0].wait(rs.resource.ACTIVE, timeout=10)
+
+    # resources in final state are not monitored anymore, and once none are
+    # left, the driver is not polled anymore
+    assert id(driver) not in adaptor._monitored
+
+    driver.calls.clear()
+    time.sleep(0.5)
+    assert driver.calls['list_nodes'] == 0
+    assert adaptor._monitor_thread is None
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_ec2_monitor()
+
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for batch transfers of the Globus Online adaptor, against a stub GO CLI.
+"""
+
+import time
+import threading
+
+from unittest import mock
+
+import radical.saga as rs
+
+from radical.saga.adaptors.globus_online import go_file as rsago
+
+
+# ------------------------------------------------------------------------------
+#
+class _Shell(object):
+    """
+    Stand-in for the GO CLI shell: transfers are accepted as batch input, and
+    complete after a given number of status queries.
+    """
+
+    def __init__(self, polls=2):
+
+        self.pty_shell = mock.Mock(rlock=threading.RLock())
+        self.polls     = polls
+        self.batches   = dict()
+        self.cmds      = list()
+        self.data      = ''
+
+    def run_async(self, cmd):
+        self.cmds.append(cmd)
+
+    def send(self, data):
+        if data != '\x04':
+            self.data += data
+
+    def find_prompt(self):
+
+        # the CLI echoes the command and batch input
+        task_id   = 'task.%d' % len(self.batches)
+        echo      = '%s\n%s' % (self.cmds[-1], self.data)
+        self.batches[task_id] = self.data.split('\n')[:-1]
+        self.data = ''
+
+        return 0, '%sTask ID: %s\n' % (echo, task_id)
+
+    def run_sync(self, cmd):
+
+        self.cmds.append(cmd)
+        out = cmd
+
+        if cmd.startswith('status'):
+            self.polls -= 1
+            if self.polls > 0: out += '\nStatus: ACTIVE'
+            else             : out += '\nStatus: SUCCEEDED'
+
+        return 0, out, ''
+
+
+# ------------------------------------------------------------------------------
+#
+def test_go_batch_transfer():
+
+    adaptor = rsago.Adaptor()
+    adaptor.batch_poll = 0.01
+
+    shell   = _Shell()
+    session = mock.Mock(_id='session.0')
+    active  = {'Credential Status': 'ACTIVE',
+               '_fetched'         : time.time(),
+               '_expires'         : float('inf')}
+
+    adaptor.shells[session._id] = {'shell'     : shell,
+                                   'user'      : 'user',
+                                   'endpoints' : {'user#src': active,
+                                                  'user#tgt': active}}
+
+    tasks = rs.task.Container()
+    apis  = list()  # the cpi instances only keep weak refs to their api
+    for i in range(10):
+
+        api = mock.Mock()
+        cpi = rsago.GOFile(api, adaptor)
+        cpi.session = session
+        cpi.shell   = shell
+        cpi.url     = rs.Url('go://src/')
+        cpi.path    = '/data/file.%d' % i
+        cpi.valid   = True
+
+        apis.append(api)
+        tasks.add(cpi.copy_self_async('go://tgt/data/file.%d' % i, 0,
+                                      ttype=rs.TASK))
+
+    tasks.run()
+
+    # all files go into a single GO task
+    assert list(shell.batches.keys()) == ['task.0']
+    assert len(shell.batches['task.0']) == 10
+    assert shell.batches['task.0'][3] == "'user#src/data/file.3' " \
+                                         "'user#tgt/data/file.3'"
+    assert adaptor.container_get_states(tasks.get_tasks()) \
+        == [rs.RUNNING] * 10
+
+    tasks.wait()
+
+    assert [task.state for task in tasks.get_tasks()] == [rs.DONE] * 10
+    assert len([cmd for cmd in shell.cmds if cmd.startswith('status')]) == 2
+    assert not adaptor.batches
+    assert not adaptor.batch_tasks
+
+
+# ------------------------------------------------------------------------------
+#
+def test_go_batch_task_wait():
+
+    adaptor = rsago.Adaptor()
+    adaptor.batch_poll = 0.01
+
+    shell   = _Shell(polls=3)
+    session = mock.Mock(_id='session.1')
+    active  = {'Credential Status': 'ACTIVE',
+               '_fetched'         : time.time(),
+               '_expires'         : float('inf')}
+
+    adaptor.shells[session._id] = {'shell'     : shell,
+                                   'user'      : 'user',
+                                   'endpoints' : {'user#src': active,
+                                                  'user#tgt': active}}
+
+    tasks = rs.task.Container()
+    apis  = list()
+    for i in range(3):
+
+        api = mock.Mock()
+        cpi = rsago.GOFile(api, adaptor)
+        cpi.session = session
+        cpi.shell   = shell
+        cpi.url     = rs.Url('go://src/')
+        cpi.path    = '/data/file.%d' % i
+        cpi.valid   = True
+
+        apis.append(api)
+        tasks.add(cpi.copy_self_async('go://tgt/data/file.%d' % i, 0,
+                                      ttype=rs.TASK))
+
+    tasks.run()
+
+    # batched tasks can be inspected and waited for individually
+    task = tasks.get_tasks()[0]
+    assert task.get_state() == rs.RUNNING
+
+    task.wait()
+    assert task.state == rs.DONE
+    assert task.get_result() is None
+
+    # the other tasks of the batch completed along with it
+    assert [t.get_state() for t in tasks.get_tasks()] == [rs.DONE] * 3
+    assert len([cmd for cmd in shell.cmds if cmd.startswith('status')]) == 3
+    assert not adaptor.batches
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_go_batch_transfer()
+    test_go_batch_task_wait()
+
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the endpoint and stat caches of the Globus Online adaptor, against
+a stub GO CLI.
+"""
+
+import time
+
+from unittest import mock
+
+import radical.saga as rs
+
+from radical.saga.adaptors.globus_online import go_file as rsago
+
+
+# ------------------------------------------------------------------------------
+#
+class _Shell(object):
+    """
+    Stand-in for the GO CLI shell, serving endpoint details and a small file
+    system tree.
+    """
+
+    def __init__(self):
+
+        self.cmds  = list()
+        self.left  = {'user#src': '00:00:30', 'user#tgt': '3 days 12:00:00'}
+        self.tree  = {'/data'       : ('d', 4096),
+                      '/data/a'     : ('-', 10),
+                      '/data/b'     : ('-', 20),
+                      '/data/sub'   : ('d', 4096)}
+
+    def _ls(self, path):
+
+        line = '%srw-r--r--  user  group  %5d  2021-01-01 12:00:00  %s'
+        mode, size = self.tree[path]
+        return line % (mode, size, path.rsplit('/', 1)[1])
+
+    def run_sync(self, cmd):
+
+        self.cmds.append(cmd)
+        out = cmd
+
+        if cmd.startswith('endpoint-details'):
+            sel = cmd.split()[1]
+            for name in sorted(self.left):
+                if sel in ['-a', name]:
+                    out += '\nLegacy Name          : %s' % name \
+                        +  '\nCredential Status    : ACTIVE' \
+                        +  '\nCredential Subject   : /O=Grid/CN=user' \
+                        +  '\nMyProxy Server       : myproxy.example.org' \
+                        +  '\nCredential Time Left : %s' % self.left[name]
+
+        elif cmd.startswith('endpoint-activate'):
+            self.left[cmd.split()[-1]] = '12:00:00'
+
+        elif cmd.startswith('ls -la'):
+            path = cmd.split("'")[1].split('#', 1)[1][3:]
+            if path in self.tree:
+                out += '\n%s' % self._ls(path)
+            else:
+                out += '\nError: Command failed' \
+                    +  '\nCode: ClientError.NotFound' \
+                    +  '\nMessage: No such file or directory'
+
+        elif cmd.startswith('ls -l'):
+            path = cmd.split("'")[1].split('#', 1)[1][3:].rstrip('/')
+            for key in sorted(self.tree):
+                if key.rsplit('/', 1)[0] == path:
+                    out += '\n%s' % self._ls(key)
+
+        elif cmd.startswith('rm'):
+            path = cmd.split("'")[1].split('#', 1)[1][3:].rstrip('/')
+            self.tree.pop(path, None)
+
+        return 0, out, ''
+
+
+# ------------------------------------------------------------------------------
+#
+def test_go_cache():
+
+    adaptor = rsago.Adaptor()
+    adaptor.stat_ttl = 60.0
+
+    shell   = _Shell()
+    session = mock.Mock(_id='session.0')
+
+    adaptor.shells[session._id] = {'shell': shell, 'user': 'user'}
+    adaptor.get_go_endpoint_list(session, shell, fetch=True)
+
+    api = mock.Mock()
+    cpi = rsago.GODirectory(api, adaptor)
+    cpi.session = session
+    cpi.shell   = shell
+    cpi.url     = rs.Url('go://src/')
+    cpi.path    = '/data'
+    cpi.valid   = True
+
+    def count(prefix):
+        return len([cmd for cmd in shell.cmds if cmd.startswith(prefix)])
+
+    # the credentials of 'src' are about to expire: they get refreshed once,
+    # and cached endpoint details are used afterwards
+    assert cpi.get_path_spec() == 'user#src/data'
+    assert cpi.get_path_spec() == 'user#src/data'
+    assert count('endpoint-activate') == 1
+    assert count('endpoint-details')  == 2
+    assert rsago.go_time_left('3 days 12:00:00') == 302400
+
+    # the listing populates the stat cache
+    assert [str(u) for u in cpi.list(None, 0)] == ['a', 'b', 'sub']
+    assert cpi.is_file('a')
+    assert cpi.get_size('b') == 20
+    assert cpi.is_dir('sub')
+    assert count('ls -la') == 0
+
+    # stat results are cached, too
+    assert cpi.is_dir('/data')
+    assert cpi.is_dir('/data')
+    assert count('ls -la') == 1
+
+    # mutations invalidate the entry and its parents
+    cpi.remove('a', 0)
+    assert not cpi.exists('a')
+    assert cpi.is_dir('/data')
+    assert cpi.get_size('b') == 20
+    assert count('ls -la') == 3
+
+    # entries expire
+    adaptor.stat_ttl = 0.01
+    time.sleep(0.02)
+    assert cpi.get_size('b') == 20
+    assert count('ls -la') == 4
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_go_cache()
+
+
+# ------------------------------------------------------------------------------
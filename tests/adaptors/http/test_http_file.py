@@ -0,0 +1,179 @@
+__author__    = "RADICAL-Cybertools Team"
+__copyright__ = "Copyright 2021, The RADICAL-Cybertools Team"
+__license__   = "MIT"
+
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+import http.server
+
+import radical.saga as rs
+
+
+# ------------------------------------------------------------------------------
+#
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Minimal stand-in for a web server with keep-alive and range support.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def handle(self):
+        self.server.stats['connections'] += 1
+        super().handle()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+
+        path = os.path.join(self.server.root, self.path.lstrip('/'))
+        self.server.stats['requests'].append(self.headers.get('Range'))
+
+        # fail requests by number
+        if len(self.server.stats['requests']) in self.server.fail:
+            self.send_error(500)
+            return
+
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as fin:
+            data = fin.read()
+
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        etag  = '"%d"' % len(data)
+
+        if match and self.headers.get('If-Range', etag) == etag:
+            start = int(match.group(1))
+            end   = min(int(match.group(2)), len(data) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d'
+                                              % (start, end, len(data)))
+            data = data[start:end + 1]
+        else:
+            self.send_response(200)
+
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# ------------------------------------------------------------------------------
+#
+def _start_server(root):
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.root  = root
+    server.fail  = set()
+    server.stats = {'connections' : 0, 'requests' : list()}
+
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    return server, 'http://127.0.0.1:%d' % server.server_address[1]
+
+
+# ------------------------------------------------------------------------------
+#
+def test_http_copy_bulk():
+    """ Test concurrent HTTP downloads over pooled connections """
+
+    src = tempfile.mkdtemp()
+    tgt = tempfile.mkdtemp()
+    server, base = _start_server(src)
+
+    try:
+        for i in range(20):
+            with open('%s/f.%d' % (src, i), 'w') as fout:
+                fout.write('data %d' % i)
+
+        tasks = rs.task.Container()
+        for i in range(20):
+            f = rs.filesystem.File('%s/f.%d' % (base, i))
+            tasks.add(f.copy('file://localhost%s/' % tgt, ttype=rs.TASK))
+        tasks.run()
+        tasks.wait()
+
+        for task in tasks.get_tasks():
+            assert task.state == rs.DONE
+
+        for i in range(20):
+            with open('%s/f.%d' % (tgt, i)) as fin:
+                assert fin.read() == 'data %d' % i
+
+        # connections are reused
+        assert server.stats['connections'] < 20
+
+        f = rs.filesystem.File('%s/does.not.exist' % base)
+        try:
+            f.copy('file://localhost%s/' % tgt)
+            assert False, 'expected DoesNotExist'
+        except rs.DoesNotExist:
+            pass
+        assert 'does.not.exist.rs_part' not in os.listdir(tgt)
+
+    finally:
+        server.shutdown()
+        shutil.rmtree(src)
+        shutil.rmtree(tgt)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_http_copy_chunked():
+    """ Test chunked HTTP downloads, and their resumption """
+
+    src = tempfile.mkdtemp()
+    tgt = tempfile.mkdtemp()
+    server, base = _start_server(src)
+
+    data = os.urandom(1024 * 1024 + 17)
+    with open('%s/big' % src, 'wb') as fout:
+        fout.write(data)
+
+    f       = rs.filesystem.File('%s/big' % base)
+    adaptor = f._adaptor._adaptor
+    old_cs  = adaptor._chunk_size
+
+    try:
+        adaptor._chunk_size = 64 * 1024
+
+        # the first attempt fails for one chunk
+        server.fail.add(3)
+        try:
+            f.copy('file://localhost%s/big' % tgt)
+            assert False, 'expected NoSuccess'
+        except rs.NoSuccess:
+            pass
+
+        assert not os.path.exists('%s/big' % tgt)
+        assert len(server.stats['requests']) == 17
+
+        # the second attempt fetches the first and the missing chunk only
+        server.fail = set()
+        server.stats['requests'] = list()
+        f.copy('file://localhost%s/big' % tgt)
+
+        with open('%s/big' % tgt, 'rb') as fin:
+            assert fin.read() == data
+
+        assert sorted(os.listdir(tgt)) == ['big']
+        assert len(server.stats['requests']) == 2
+
+    finally:
+        adaptor._chunk_size = old_cs
+        server.shutdown()
+        shutil.rmtree(src)
+        shutil.rmtree(tgt)
+
+
+# ------------------------------------------------------------------------------
@@ -0,0 +1,243 @@
+#!/usr/bin/env python
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for concurrent replication, recursive listings and the location cache of
+the iRODS replica adaptor, against stub icommands.
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+from unittest import mock
+
+import radical.saga as rs
+
+from radical.saga.adaptors.irods import irods_replica as rsairods
+
+
+_LISTING = '''/osg/home/user:
+  user              0 res_a                12 2012-11-14.09:55 & a.txt
+  user              1 res_b                12 2012-11-14.09:55 & a.txt
+  C- /osg/home/user/sub
+/osg/home/user/sub:
+  user              0 res_a               100 2012-11-14.09:56 & b c.txt
+  user              1 res_c               100 2012-11-14.09:56   b c.txt
+'''
+
+# replications log their start and end, and take a while
+_STUBS = {
+    'ils'   : '''#!/bin/sh
+echo "ils $@" >> "$IRODS_STUB_LOG"
+cat "$IRODS_STUB_LS"
+''',
+    'irepl' : '''#!/bin/sh
+echo "start $2 $3" >> "$IRODS_STUB_LOG"
+sleep 1
+echo "end $2 $3" >> "$IRODS_STUB_LOG"
+test "$2" = "res_bad" && exit 3
+exit 0
+''',
+}
+
+
+# ------------------------------------------------------------------------------
+#
+def _setup():
+
+    root = tempfile.mkdtemp()
+    os.mkdir('%s/bin' % root)
+
+    for name, script in _STUBS.items():
+        with open('%s/bin/%s' % (root, name), 'w') as fout:
+            fout.write(script)
+        os.chmod('%s/bin/%s' % (root, name), 0o755)
+
+    with open('%s/ls' % root, 'w') as fout:
+        fout.write(_LISTING)
+
+    os.environ['PATH']           = '%s/bin:%s' % (root, os.environ['PATH'])
+    os.environ['IRODS_STUB_LOG'] = '%s/log' % root
+    os.environ['IRODS_STUB_LS']  = '%s/ls'  % root
+
+    # the adaptor is a singleton: reset shells and caches of earlier tests
+    adaptor = rsairods.Adaptor()
+    adaptor.pty_url = rs.Url('fork://localhost/')
+    adaptor.loc_ttl = 60.0
+    adaptor.shells.clear()
+    adaptor.loc_cache.clear()
+    adaptor.loc_dirs.clear()
+
+    return root, adaptor
+
+
+# ------------------------------------------------------------------------------
+#
+def _log(root):
+
+    with open('%s/log' % root) as fin:
+        return [line.split() for line in fin.readlines()]
+
+
+# ------------------------------------------------------------------------------
+#
+def test_irods_replicate():
+
+    path = os.environ['PATH']
+    root, adaptor = _setup()
+
+    try:
+        apis = list()  # the cpi instances only keep weak refs to their api
+        cpis = list()
+        for name in ['f.0', 'f.1']:
+            api = mock.Mock()
+            cpi = rsairods.IRODSFile(api, adaptor)
+            cpi._url = rs.Url('irods://localhost/osg/home/user/%s' % name)
+            apis.append(api)
+            cpis.append(cpi)
+
+        # three resources are replicated to concurrently
+        cpis[0].replicate('irods:///?resource=res_a,res_b,res_c', 0)
+
+        log = _log(root)
+        assert [e[0] for e in log] == ['start'] * 3 + ['end'] * 3
+        assert sorted([e[1] for e in log[:3]]) == ['res_a', 'res_b', 'res_c']
+
+        try:
+            cpis[0].replicate('irods:///?resource=res_a,res_bad', 0)
+            assert False, 'expected NoSuccess'
+        except rs.NoSuccess:
+            pass
+
+        # so are the replications of all tasks in a container
+        os.unlink('%s/log' % root)
+
+        tasks = rs.task.Container()
+        tasks.add(cpis[0].replicate_async('irods:///?resource=res_a,res_b', 0,
+                                          ttype=rs.TASK))
+        tasks.add(cpis[1].replicate_async('irods:///?resource=res_bad', 0,
+                                          ttype=rs.TASK))
+        tasks.run()
+        tasks.wait()
+
+        assert [t.state for t in tasks.get_tasks()] == [rs.DONE, rs.FAILED]
+
+        log = _log(root)
+        assert [e[0] for e in log] == ['start'] * 3 + ['end'] * 3
+        assert len(adaptor.shells) == 3
+
+    finally:
+        os.environ['PATH'] = path
+        shutil.rmtree(root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_irods_list_recursive():
+
+    path = os.environ['PATH']
+    root, adaptor = _setup()
+
+    try:
+        shell   = rs.utils.pty_shell.PTYShell(adaptor.pty_url)
+        entries = list(adaptor.irods_iter_listing('/osg/home/user', shell,
+                                                  recursive=True))
+
+        assert [e.name for e in entries] == ['a.txt', 'sub', 'sub/b c.txt']
+        assert entries[0].locations == ['res_a', 'res_b']
+        assert entries[1].is_directory
+        assert entries[2].locations == ['res_a', 'res_c']
+        assert entries[2].size      == '100'
+
+        assert _log(root) == [['ils', '-lr', '/osg/home/user']]
+
+    finally:
+        os.environ['PATH'] = path
+        shutil.rmtree(root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_irods_location_cache():
+
+    path = os.environ['PATH']
+    root, adaptor = _setup()
+
+    try:
+        api  = mock.Mock()
+        cpis = list()
+        for name in ['a.txt', 'sub']:
+            cpi = rsairods.IRODSFile(api, adaptor)
+            cpi._url = rs.Url('irods://localhost/osg/home/user/%s' % name)
+            cpis.append(cpi)
+
+        def count():
+            return len([e for e in _log(root) if e[0] == 'ils'])
+
+        # the parent directory is listed once, for all its entries
+        assert cpis[0].list_locations() == ['res_a', 'res_b']
+        assert cpis[0].list_locations() == ['res_a', 'res_b']
+        assert cpis[0].get_size_self()  == 12
+        assert cpis[1].list_locations() == []
+        assert count() == 1
+        assert _log(root)[0] == ['ils', '-L', '/osg/home/user']
+
+        # unknown entries of a freshly listed directory do not exist
+        cpi = rsairods.IRODSFile(api, adaptor)
+        cpi._url = rs.Url('irods://localhost/osg/home/user/nope')
+        try:
+            cpi.list_locations()
+            assert False, 'expected DoesNotExist'
+        except rs.DoesNotExist:
+            pass
+        assert count() == 1
+
+        # replication invalidates the cached locations
+        cpis[0].replicate('irods:///?resource=res_c', 0)
+        assert cpis[0].list_locations() == ['res_a', 'res_b']
+        assert count() == 2
+
+        # entries expire
+        adaptor.loc_ttl = 0.01
+        time.sleep(0.02)
+        assert cpis[0].get_size_self() == 12
+        assert count() == 3
+
+    finally:
+        os.environ['PATH'] = path
+        shutil.rmtree(root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_irods_resources():
+
+    adaptor = rsairods.Adaptor()
+
+    assert adaptor.irods_resources(None)                       == []
+    assert adaptor.irods_resources('irods:///')                == []
+    assert adaptor.irods_resources('irods:///?resource=')      == []
+    assert adaptor.irods_resources('irods:///?foo=bar')        == []
+    assert adaptor.irods_resources('irods:///?resource=a,,b')  == ['a', 'b']
+    assert adaptor.irods_resources('irods:///?foo=x&resource=a,b') \
+                                                               == ['a', 'b']
+    assert adaptor.irods_resources('irods:///?resource=a&resource=b') \
+                                                               == ['a', 'b']
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_irods_replicate()
+    test_irods_list_recursive()
+    test_irods_location_cache()
+    test_irods_resources()
+
+
+# ------------------------------------------------------------------------------
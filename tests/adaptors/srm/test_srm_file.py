@@ -0,0 +1,256 @@
+
+__author__    = "RADICAL-Cybertools Team"
+__copyright__ = "Copyright 2021, The RADICAL-Cybertools Team"
+__license__   = "MIT"
+
+
+import os
+import shutil
+import tempfile
+
+from unittest import mock
+
+import radical.saga as rs
+
+
+# ------------------------------------------------------------------------------
+#
+# Stand-ins for the grid and gfal tools.  SURLs map to local paths, sources
+# named `*flaky*` fail once, and all gfal calls are logged.
+#
+_STUBS = {
+    'grid-proxy-info' : '''#!/bin/sh
+echo "timeleft : 11:59:59"
+''',
+
+    'gfal2_version'   : '''#!/bin/sh
+echo "gfal2 stub"
+''',
+
+    'gfal-ls'         : '''#!/bin/sh
+echo "gfal-ls $@" >> "$SRM_STUB_LOG"
+for last; do :; done
+path=${last#*SFN=}
+for f in $(ls "$path"); do
+    if test -d "$path/$f"; then mode=d; size=0
+    else                        mode=-; size=$(wc -c < "$path/$f")
+    fi
+    echo "${mode}rw-r--r-- 1 45 44 $size May 30 15:29 $f"
+done
+''',
+
+    'gfal-copy'       : '''#!/bin/sh
+echo "gfal-copy $@" >> "$SRM_STUB_LOG"
+from=''
+while test $# -gt 0; do
+    case "$1" in
+        --timeout|--transfer-timeout) shift 2 ;;
+        --from-file)                  from="$2"; shift 2 ;;
+        --*)                          shift ;;
+        *)                            break ;;
+    esac
+done
+if test -n "$from"; then srcs=$(cat "$from"); dst="$1"
+else                     srcs="$1";           dst="$2"
+fi
+rc=0
+for src in $srcs; do
+    spath=${src#*SFN=}
+    dpath=${dst#*SFN=}
+    test -n "$from" && dpath="$dpath/$(basename "$spath")"
+    case "$spath" in
+        *flaky*) if ! test -f "$spath.seen"; then
+                     touch "$spath.seen"
+                     echo "Copying $src   [FAILED]  after 0s"
+                     echo "gfal-copy error: 110 (Connection timed out)"
+                     rc=1; continue
+                 fi ;;
+    esac
+    if test -f "$spath"; then
+        mkdir -p "$(dirname "$dpath")"
+        cp "$spath" "$dpath"
+        echo "Copying $src   [DONE]  after 0s"
+    else
+        echo "Copying $src   [FAILED]  after 0s"
+        echo "gfal-copy error: 2 (No such file or directory) - SRM_INVALID_PATH"
+        rc=1
+    fi
+done
+exit $rc
+''',
+}
+
+
+# ------------------------------------------------------------------------------
+#
+def _setup():
+
+    root = tempfile.mkdtemp()
+    os.mkdir('%s/bin' % root)
+    os.mkdir('%s/src' % root)
+
+    for name, script in _STUBS.items():
+        with open('%s/bin/%s' % (root, name), 'w') as fout:
+            fout.write(script)
+        os.chmod('%s/bin/%s' % (root, name), 0o755)
+
+    os.environ['PATH']         = '%s/bin:%s' % (root, os.environ['PATH'])
+    os.environ['SRM_STUB_LOG'] = '%s/log' % root
+
+    return root
+
+
+# ------------------------------------------------------------------------------
+#
+def _log(root, prefix):
+
+    with open('%s/log' % root) as fin:
+        return [line for line in fin.readlines() if line.startswith(prefix)]
+
+
+# ------------------------------------------------------------------------------
+#
+def _surl(path):
+
+    return 'srm://localhost:8443/srm/managerv2?SFN=%s' % path
+
+
+# ------------------------------------------------------------------------------
+#
+def test_srm_copy_bulk():
+    """ Test concurrent and bulk SRM copies, with retries """
+
+    root = _setup()
+    path = os.environ['PATH']
+
+    try:
+        names = ['f.%d' % i for i in range(4)] + ['flaky', 'missing']
+        for name in names[:-1]:
+            with open('%s/src/%s' % (root, name), 'w') as fout:
+                fout.write('data %s' % name)
+
+        session = rs.Session()
+        files   = [rs.filesystem.File(_surl('%s/src/%s' % (root, name)),
+                                      session=session)
+                   for name in names]
+        adaptor = files[0]._adaptor._adaptor
+
+        for bulk in [False, True]:
+
+            adaptor.bulk = bulk
+            tgt = '%s/tgt.%s' % (root, bulk)
+
+            for name in os.listdir('%s/src' % root):
+                if name.endswith('.seen'):
+                    os.unlink('%s/src/%s' % (root, name))
+
+            tasks = rs.task.Container()
+            for f, name in zip(files, names):
+                tasks.add(f.copy(_surl('%s/%s' % (tgt, name)), ttype=rs.TASK))
+            tasks.run()
+            tasks.wait()
+
+            states = [task.state for task in tasks.get_tasks()]
+            assert states == [rs.DONE] * 5 + [rs.FAILED]
+
+            for name in names[:-1]:
+                with open('%s/%s' % (tgt, name)) as fin:
+                    assert fin.read() == 'data %s' % name
+
+            try:
+                tasks.get_tasks()[-1].get_result()
+                assert False, 'expected DoesNotExist'
+            except rs.DoesNotExist:
+                pass
+
+        # without bulk mode, each file got its own transfer (plus one retry for
+        # the flaky one), over a pool of shells
+        assert len(adaptor.shells[session._id]) == 4
+
+        # in bulk mode, all files went into a single transfer, and only the
+        # flaky one got retried (individually)
+        copies = _log(root, 'gfal-copy')
+        assert len(copies) == 7 + 2
+        assert len([c for c in copies if '--from-file' in c]) == 1
+
+    finally:
+        os.environ['PATH'] = path
+        shutil.rmtree(root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_srm_copy_no_shell():
+    """ Test that copies fail if no shell can be opened for them """
+
+    root = _setup()
+    path = os.environ['PATH']
+
+    try:
+        names = ['f.%d' % i for i in range(3)]
+        for name in names:
+            with open('%s/src/%s' % (root, name), 'w') as fout:
+                fout.write('data %s' % name)
+
+        session = rs.Session()
+        files   = [rs.filesystem.File(_surl('%s/src/%s' % (root, name)),
+                                      session=session)
+                   for name in names]
+        adaptor = files[0]._adaptor._adaptor
+        pairs   = [(f.url, rs.Url(_surl('%s/tgt/%s' % (root, name))))
+                   for f, name in zip(files, names)]
+
+        with mock.patch.object(adaptor, 'pool_shell',
+                               side_effect=rs.NoSuccess('no shell')):
+
+            for bulk in [False, True]:
+
+                adaptor.bulk = bulk
+
+                results = adaptor.srm_copy_many(session, pairs, 0)
+                assert len(results) == len(names)
+                assert all(isinstance(r, rs.NoSuccess) for r in results)
+
+                tasks = rs.task.Container()
+                for f, (_, tgt) in zip(files, pairs):
+                    tasks.add(f.copy(tgt, ttype=rs.TASK))
+                tasks.run()
+                tasks.wait()
+
+                states = [task.state for task in tasks.get_tasks()]
+                assert states == [rs.FAILED] * len(names)
+
+        assert not os.path.exists('%s/tgt' % root)
+
+    finally:
+        os.environ['PATH'] = path
+        shutil.rmtree(root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_srm_stat_cache():
+    """ Test that SRM directory listings fill the stat cache """
+
+    root = _setup()
+    path = os.environ['PATH']
+
+    try:
+        with open('%s/src/a' % root, 'w') as fout:
+            fout.write('12345')
+        os.mkdir('%s/src/sub' % root)
+
+        d = rs.filesystem.Directory(_surl('%s/src' % root))
+
+        assert sorted(d.list()) == ['a', 'sub']
+        assert d.is_file('a')
+        assert d.is_dir('sub')
+        assert d.get_size('a') == 5
+        assert len(_log(root, 'gfal-ls')) == 1
+
+    finally:
+        os.environ['PATH'] = path
+        shutil.rmtree(root)
+
+
+# ------------------------------------------------------------------------------
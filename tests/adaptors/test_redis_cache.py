@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the entry cache of the redis advert adaptor.
+"""
+
+import time
+
+import radical.utils as ru
+
+from radical.saga.adaptors.redis import redis_cache as rsarc
+
+
+# ------------------------------------------------------------------------------
+#
+def test_redis_cache():
+
+    cache = rsarc.Cache(logger=ru.Logger('radical.saga'), size=2, ttl=0.2)
+
+    # hits refresh the LRU order, so `b` gets evicted
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert sorted(cache.dict.keys()) == ['a', 'c']
+    try:
+        cache.get('b')
+        assert False, 'expected cache miss'
+    except AttributeError:
+        pass
+
+    cache.invalidate('c')
+    cache.invalidate('x')
+
+    # expired entries are swept on insert
+    time.sleep(0.3)
+    cache.set('d', 4)
+    assert list(cache.dict.keys()) == ['d']
+
+    assert cache.stats() == {'size'  : 1, 'hit'    : 1, 'miss'  : 1,
+                             'evict' : 1, 'expire' : 1, 'inval' : 1}
+
+    # a ttl of `0` disables the cache
+    cache = rsarc.Cache(logger=ru.Logger('radical.saga'), ttl=0)
+    cache.set('a', 1)
+    assert not cache.dict
+
+
+# ------------------------------------------------------------------------------
+#
+def test_redis_cache_notify():
+
+    events = list()
+    cache  = rsarc.Cache(logger=ru.Logger('radical.saga'), size=2, ttl=0.2,
+                         notify=lambda key, cached: events.append((key, cached)))
+
+    # keys are reported once when they enter the cache ...
+    cache.set('a', 1)
+    cache.set('a', 2)
+    cache.set('b', 2)
+    assert events == [('a', True), ('b', True)]
+
+    # ... and when they leave it, by eviction, invalidation or expiry
+    del events[:]
+    cache.set('c', 3)
+    cache.invalidate('b')
+    cache.invalidate('b')
+    assert events == [('a', False), ('c', True), ('b', False)]
+
+    del events[:]
+    time.sleep(0.3)
+    cache.set('d', 4)
+    assert events == [('c', False), ('d', True)]
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_redis_cache()
+    test_redis_cache_notify()
+
+
+# ------------------------------------------------------------------------------
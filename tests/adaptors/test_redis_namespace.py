@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+__author__    = 'RADICAL-Cybertools Team'
+__copyright__ = 'Copyright 2021, The RADICAL-Cybertools Team'
+__license__   = 'MIT'
+
+"""
+Tests for the events and bulk key operations of the redis advert namespace.
+Most of those need a redis server, which is expected on
+`$RADICAL_SAGA_REDIS_URL` (default: `redis://localhost/`) -- they are skipped
+if none is reachable.
+"""
+
+import os
+import uuid
+import threading as mt
+
+import pytest
+
+redis = pytest.importorskip('redis')
+
+import radical.utils as ru
+import radical.saga  as rs
+
+from radical.saga.adaptors.redis import redis_namespace as rsarns
+
+
+# ------------------------------------------------------------------------------
+#
+@pytest.fixture
+def server():
+
+    url = ru.Url(os.environ.get('RADICAL_SAGA_REDIS_URL', 'redis://localhost/'))
+
+    try:
+        redis.Redis(host=url.host or 'localhost',
+                    port=url.port or 6379,
+                    password=url.password,
+                    socket_connect_timeout=1.0).ping()
+    except redis.RedisError as e:
+        pytest.skip('no redis server at %s: %s' % (url, e))
+
+    r = rsarns.redis_ns_server(url)
+    yield r
+    r.monitor.stop()
+
+
+# ------------------------------------------------------------------------------
+#
+def _members(r, index, name):
+
+    return set(ru.as_string(list(r.smembers(index + ':' + name))))
+
+
+# ------------------------------------------------------------------------------
+#
+def test_redis_ns_keys(server):
+
+    r    = server
+    uid  = uuid.uuid4().hex
+    path = '/test_redis_ns_keys/%s' % uid
+
+    keys = ['k1.%s' % uid, 'k2.%s' % uid]
+    vals = ['v1.%s' % uid, 'v2.%s' % uid, 'v3.%s' % uid]
+
+    en = rsarns.redis_ns_entry.open(r, path, rs.advert.CREATE_PARENTS
+                                           | rs.advert.CREATE)
+    try:
+        # new keys are added to the key and value indexes
+        en.set_keys({keys[0]: vals[0], keys[1]: vals[1]})
+
+        assert en.get_keys(keys) == {keys[0]: vals[0], keys[1]: vals[1]}
+        assert path in _members(r, rsarns.KEYS, keys[0])
+        assert path in _members(r, rsarns.KEYS, keys[1])
+        assert path in _members(r, rsarns.VALS, vals[0])
+        assert path in _members(r, rsarns.VALS, vals[1])
+
+        # changed values replace their old value index entries, unchanged
+        # values keep theirs
+        en.set_keys({keys[0]: vals[2], keys[1]: vals[1]})
+
+        assert en.get_keys(keys) == {keys[0]: vals[2], keys[1]: vals[1]}
+        assert path in     _members(r, rsarns.KEYS, keys[0])
+        assert path not in _members(r, rsarns.VALS, vals[0])
+        assert path in     _members(r, rsarns.VALS, vals[1])
+        assert path in     _members(r, rsarns.VALS, vals[2])
+
+        # the entry refetches its data after the update
+        assert ru.as_string(en.get_data())[keys[0]] == vals[2]
+
+        # a cold entry only fetches the requested keys
+        r.cache.invalidate(rsarns.DATA + ':' + path)
+        cold = rsarns.redis_ns_entry(r, path)
+        assert cold.get_keys(keys[:1]) == {keys[0]: vals[2]}
+
+        with pytest.raises(rs.BadParameter):
+            en.get_keys(keys + ['missing.%s' % uid])
+
+    finally:
+        parent = rsarns.redis_ns_parent(path)
+        r.delete(*['%s:%s' % (prefix, path) for prefix in
+                             [rsarns.NODE, rsarns.DATA, rsarns.KIDS]])
+        r.delete(*['%s:%s' % (rsarns.KEYS, key) for key in keys])
+        r.delete(*['%s:%s' % (rsarns.VALS, val) for val in vals])
+        r.srem(rsarns.KIDS + ':' + parent, path)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_redis_ns_event():
+
+    for args in [['k', 'v'], ['k', 'a\x1fb', 'k\x1f', '\\s'],
+                 ['\\', '\x1f\x1f', '', '']]:
+
+        event = rsarns.redis_ns_event(rsarns.ATTRIBUTE, *args)
+
+        # one separator per field, so that keys and values stay paired
+        assert event.count(rsarns.SEP) == len(args)
+        assert rsarns.redis_ns_fields(event.encode()) == \
+                                                   [rsarns.ATTRIBUTE] + args
+
+
+# ------------------------------------------------------------------------------
+#
+class _Obj(object):
+
+    _UP = True
+
+    def __init__(self, count):
+
+        self.attribs = dict()
+        self.count   = count
+        self.done    = mt.Event()
+
+    def set_attribute(self, key, val, flow):
+
+        self.attribs[key] = val
+        if len(self.attribs) == self.count:
+            self.done.set()
+
+
+# ------------------------------------------------------------------------------
+#
+def test_redis_ns_callbacks(server):
+
+    r    = server
+    uid  = uuid.uuid4().hex
+    path = '/test_redis_ns_callbacks/%s' % uid
+    data = {'k1.%s' % uid: 'v\x1f%s' % uid,
+            'k2.%s' % uid: '\\s%s'  % uid}
+
+    en  = rsarns.redis_ns_entry.open(r, path, rs.advert.CREATE_PARENTS
+                                            | rs.advert.CREATE)
+    obj = _Obj(len(data))
+    try:
+        # the subscription is in place once the callback is registered
+        for key in data:
+            en.manage_callback(key, key, lambda *args: True, obj)
+        assert rsarns.redis_ns_channel(path).encode() in r.pub.channels
+
+        en.set_keys(data)
+
+        assert obj.done.wait(10.0)
+        assert obj.attribs == data
+
+        # the last callback removal unsubscribes from the path
+        for key in data:
+            en.manage_callback(key, None, None, obj)
+        assert not r.callbacks.get(path)
+
+    finally:
+        r.delete(*['%s:%s' % (prefix, path) for prefix in
+                             [rsarns.NODE, rsarns.DATA, rsarns.KIDS]])
+        r.delete(*['%s:%s' % (rsarns.KEYS, key) for key in data])
+        r.delete(*['%s:%s' % (rsarns.VALS, val) for val in data.values()])
+        r.srem(rsarns.KIDS + ':' + rsarns.redis_ns_parent(path), path)
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    pytest.main([__file__])
+
+
+# ------------------------------------------------------------------------------
+
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+__author__    = "RADICAL-SAGA Development Team"
+__copyright__ = "Copyright 2024, The SAGA Project"
+__license__   = "MIT"
+
+
+'''
+Measure the time needed to `import radical.saga`, and make sure that the import
+does not spawn any subprocesses (like the former `lsb_release` probe did).
+
+usage: import_time.py [iterations] [max_seconds]
+'''
+
+import sys
+import time
+
+import subprocess as sp
+
+
+# ------------------------------------------------------------------------------
+#
+_CHECK = '''
+import subprocess as sp
+
+spawned = list()
+_popen  = sp.Popen
+
+class _Popen(_popen):
+    def __init__(self, *args, **kwargs):
+        spawned.append(args[0] if args else kwargs.get('args'))
+        super().__init__(*args, **kwargs)
+
+sp.Popen = _Popen
+
+import radical.saga
+
+sp.Popen = _popen
+print(len(spawned))
+for cmd in spawned:
+    print(cmd)
+'''
+
+
+# ------------------------------------------------------------------------------
+#
+def import_time(iterations):
+
+    times = list()
+    for _ in range(iterations):
+
+        start = time.time()
+        sp.check_call([sys.executable, '-c', 'import radical.saga'])
+        times.append(time.time() - start)
+
+    return times
+
+
+# ------------------------------------------------------------------------------
+#
+def import_spawns():
+
+    out = sp.check_output([sys.executable, '-c', _CHECK]).decode()
+    out = out.strip().split('\n')
+
+    return out[1:]
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    iterations  = 10
+    max_seconds = None
+
+    if len(sys.argv) > 1: iterations  = int(sys.argv[1])
+    if len(sys.argv) > 2: max_seconds = float(sys.argv[2])
+
+    import_time(1)  # warm up filesystem caches
+    times = import_time(iterations)
+
+    print('iterations : %d'     % iterations)
+    print('min        : %.3f s' % min(times))
+    print('mean       : %.3f s' % (sum(times) / len(times)))
+    print('max        : %.3f s' % max(times))
+
+    ret    = 0
+    spawns = import_spawns()
+
+    if spawns:
+        print('FAIL: import spawned subprocesses: %s' % spawns)
+        ret = 1
+
+    if max_seconds and min(times) > max_seconds:
+        print('FAIL: import takes longer than %.3f s' % max_seconds)
+        ret = 1
+
+    sys.exit(ret)
+
+
+# ------------------------------------------------------------------------------
+
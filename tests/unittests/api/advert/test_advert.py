@@ -56,11 +56,81 @@ def test_advert_callback():
         assert False, "Unexpected exception: %s" % se
 
 
+# ------------------------------------------------------------------------------
+#
+def test_advert_find():
+
+    try:
+        tc   = config()
+        base = tc.advert_url + '/tmp/test1/find/'
+        d_1  = rs.advert.Directory (base,
+                                    rs.advert.CREATE | rs.advert.CREATE_PARENTS)
+
+        d_2 = rs.advert.Directory (base + 'job.1/task.1/', rs.advert.CREATE |
+                                                     rs.advert.CREATE_PARENTS)
+        d_2.set_attribute ('state', 'RUNNING')
+
+        d_3 = rs.advert.Directory (base + 'job.2/', rs.advert.CREATE)
+        d_3.set_attribute ('state', 'DONE')
+
+        names = [str(kid).rstrip('/').split('/')[-1]
+                 for kid in d_1.list (flags=rs.advert.RECURSIVE)]
+        assert sorted(names) == ['job.1', 'job.2', 'task.1'], names
+
+        found = d_1.find ('*', 'state=RUN*')
+        assert len(found) == 1, found
+        assert found[0].path.rstrip('/').endswith('/job.1/task.1'), found
+
+        assert len(d_1.find ('job.*', 'state'))                  == 1
+        assert len(d_1.find ('*',     'state=*', flags=0))       == 1
+        assert len(d_1.find ('*',     'state=FAILED'))           == 0
+
+    except rs.NotImplemented as ni:
+        assert bool(tc.notimpl_warn_only), "%s " % ni
+        if tc.notimpl_warn_only:
+            print("%s " % ni)
+
+    except rs.SagaException as se:
+        assert False, "Unexpected exception: %s" % se
+
+
+# ------------------------------------------------------------------------------
+#
+def test_advert_bulk_attributes():
+
+    try:
+        tc  = config()
+        e_1 = rs.advert.Entry (tc.advert_url + '/tmp/test1/bulk/entry.1',
+                               rs.advert.CREATE | rs.advert.CREATE_PARENTS)
+
+        attrs = {'key_%d' % i : 'val_%d' % i for i in range(20)}
+        e_1.set_attributes (attrs)
+        e_1.set_attributes ({'key_0' : 'new'})
+
+        assert e_1.get_attribute  ('key_0')            == 'new'
+        assert e_1.get_attributes (['key_1', 'key_2']) == {'key_1' : 'val_1',
+                                                           'key_2' : 'val_2'}
+
+        d_1 = rs.advert.Directory (tc.advert_url + '/tmp/test1/bulk/')
+        assert len(d_1.find ('*', 'key_0=new'))   == 1
+        assert len(d_1.find ('*', 'key_0=val_0')) == 0
+
+    except rs.NotImplemented as ni:
+        assert bool(tc.notimpl_warn_only), "%s " % ni
+        if tc.notimpl_warn_only:
+            print("%s " % ni)
+
+    except rs.SagaException as se:
+        assert False, "Unexpected exception: %s" % se
+
+
 # ------------------------------------------------------------------------------
 #
 if __name__ == '__main__':
 
     test_advert_callback ()
+    test_advert_find ()
+    test_advert_bulk_attributes ()
 
 
 # ------------------------------------------------------------------------------
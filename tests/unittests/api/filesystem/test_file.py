@@ -220,3 +220,207 @@ class TestFile(unittest.TestCase):
             assert False, "Unexpected exception: %s [%s]" % (ex,
                     tc.filesystem_url)
 
+
+    # -------------------------------------------------------------------------
+    #
+    def test_file_size_after_write(self):
+        """ Testing if file sizes are exact, and change with file content.
+        """
+        try:
+            tc = config()
+            filename = deepcopy(rs.Url(tc.filesystem_url))
+            filename.path += "/%s" % self.uniquefilename1
+
+            f = rs.filesystem.File(filename, rs.filesystem.CREATE)
+            d = rs.filesystem.Directory(tc.filesystem_url)
+
+            assert f.size == 0
+            assert d.get_size(self.uniquefilename1) == 0
+            assert d.is_file(self.uniquefilename1)
+
+            f.write('abc')
+            assert f.size == 3
+            assert d.get_size(self.uniquefilename1) == 3
+
+            d.copy(self.uniquefilename1, self.uniquefilename2)
+            assert d.get_size(self.uniquefilename2) == 3
+
+            d.remove(self.uniquefilename2)
+            assert not d.exists(self.uniquefilename2)
+
+        except rs.SagaException as ex:
+            assert False, "Unexpected exception: %s" % ex
+
+    # -------------------------------------------------------------------------
+    #
+    def test_directory_list_entries(self):
+        """ Testing if directory entries are listed with metadata.
+        """
+        try:
+            tc = config()
+            filename = deepcopy(rs.Url(tc.filesystem_url))
+            filename.path += "/%s" % self.uniquefilename1
+
+            f = rs.filesystem.File(filename, rs.filesystem.CREATE)
+            f.write('abc')
+
+            d = rs.filesystem.Directory(tc.filesystem_url)
+            d.make_dir(self.uniquefilename2)
+
+            entries = dict()
+            for entry in d.list_entries('saga-unittests-*-%d' % os.getpid()):
+                entries[str(entry['url'])] = entry
+
+            assert len(entries) == 2
+            assert entries[self.uniquefilename1]['type'] == 'file'
+            assert entries[self.uniquefilename1]['size'] == 3
+            assert entries[self.uniquefilename2]['type'] == 'dir'
+            assert entries[self.uniquefilename2]['target'] is None
+
+            names = [str(u) for u in d.list()]
+            for entry in d.list_entries():
+                assert str(entry['url']) in names
+
+            d.remove(self.uniquefilename2, rs.filesystem.RECURSIVE)
+
+        except rs.SagaException as ex:
+            assert False, "Unexpected exception: %s" % ex
+
+    # -------------------------------------------------------------------------
+    #
+    def test_directory_walk(self):
+        """ Testing if a directory tree can be walked recursively.
+        """
+        try:
+            tc = config()
+            d = rs.filesystem.Directory(tc.filesystem_url)
+            d.make_dir('%s/sub' % self.uniquefilename2,
+                       rs.filesystem.CREATE_PARENTS)
+
+            sub = d.open_dir(self.uniquefilename2)
+            f   = sub.open('sub/data.txt', rs.filesystem.CREATE)
+            f.write('abc')
+
+            entries = dict()
+            for entry in sub.walk():
+                entries[str(entry['url'])] = entry
+
+            assert sorted(entries.keys()) == ['sub', 'sub/data.txt']
+            assert entries['sub']['type'] == 'dir'
+            assert entries['sub/data.txt']['size'] == 3
+
+            assert [str(e['url']) for e in sub.walk('*.txt')] == ['sub/data.txt']
+
+            # the shell must stay usable after an abandoned walk
+            walk = sub.walk()
+            next(walk)
+            walk.close()
+            assert sub.is_dir('sub')
+
+            # directory names are quoted
+            d.make_dir('%s/a $b' % self.uniquefilename2)
+            odd = d.open_dir('%s/a $b' % self.uniquefilename2)
+            odd.open('data.txt', rs.filesystem.CREATE).write('abc')
+            assert [str(e['url']) for e in odd.walk()] == ['data.txt']
+
+            d.remove(self.uniquefilename2, rs.filesystem.RECURSIVE)
+
+        except rs.SagaException as ex:
+            assert False, "Unexpected exception: %s" % ex
+
+    # -------------------------------------------------------------------------
+    #
+    def test_directory_copy_many(self):
+        """ Testing if many files can be copied in one bulk operation.
+        """
+        try:
+            tc = config()
+            d = rs.filesystem.Directory(tc.filesystem_url)
+            f = d.open(self.uniquefilename1, rs.filesystem.CREATE)
+            f.write('abc')
+
+            tgt = '%s/sub' % self.uniquefilename2
+            res = d.copy_many([(self.uniquefilename1, '%s/a' % tgt),
+                               (self.uniquefilename1, '%s/b' % tgt),
+                               ('file.does.not.exist', '%s/c' % tgt)],
+                              rs.filesystem.CREATE_PARENTS)
+
+            assert res[0] is None
+            assert res[1] is None
+            assert isinstance(res[2], rs.DoesNotExist)
+            assert d.get_size('%s/b' % tgt) == 3
+            assert not d.exists('%s/c' % tgt)
+
+            # async copies in a task container are handled as bulk, too
+            tasks = rs.task.Container()
+            for name in ['d', 'e']:
+                tasks.add(d.copy(self.uniquefilename1, '%s/%s' % (tgt, name),
+                                 ttype=rs.TASK))
+            tasks.run()
+            tasks.wait()
+
+            for task in tasks.get_tasks():
+                assert task.state == rs.DONE
+            assert d.exists('%s/e' % tgt)
+
+            d.remove(self.uniquefilename2, rs.filesystem.RECURSIVE)
+
+        except rs.SagaException as ex:
+            assert False, "Unexpected exception: %s" % ex
+
+    # -------------------------------------------------------------------------
+    #
+    def test_file_seek_read_write(self):
+        """ Testing if files can be read and written at an offset.
+        """
+        try:
+            tc = config()
+            filename = deepcopy(rs.Url(tc.filesystem_url))
+            filename.path += "/%s" % self.uniquefilename1
+
+            f = rs.filesystem.File(filename, rs.filesystem.CREATE)
+            assert f.write('0123456789') == 10
+
+            f.seek(4, rs.filesystem.START)
+            f.write('AB')
+            assert f.read(2) == '67'
+            assert f.seek(0, rs.filesystem.CURRENT) == 8
+
+            f.seek(-3, rs.filesystem.END)
+            assert f.read() == '789'
+
+            f.seek(0, rs.filesystem.START)
+            assert f.read(4) == '0123'
+
+            f2 = rs.filesystem.File(filename, rs.filesystem.APPEND)
+            f2.write('xy')
+            assert f2.size == 12
+
+            f.seek(0, rs.filesystem.START)
+            assert f.read() == '0123AB6789xy'
+
+            # writes at offset 0 and mid-file only overwrite the written bytes
+            f.seek(0, rs.filesystem.START)
+            assert f.write('HE') == 2
+            f.seek(6, rs.filesystem.START)
+            f.write('WORLD')
+            f.seek(0, rs.filesystem.START)
+            assert f.read() == 'HE23ABWORLDy'
+
+            # only TRUNCATE discards the previous content
+            f3 = rs.filesystem.File(filename, rs.filesystem.TRUNCATE)
+            f3.write('new')
+            assert f3.size == 3
+
+            # partial reads do not split multibyte characters
+            f3.seek(0, rs.filesystem.START)
+            f3.write('a\u00e9\u20ac\U0001d11eb')
+            f3.seek(0, rs.filesystem.START)
+            assert f3.read(2) == 'a\u00e9'
+            assert f3.read(1) == '\u20ac'
+            assert f3.read(2) == '\U0001d11e'
+            assert f3.seek(0, rs.filesystem.CURRENT) == 10
+            assert f3.read()  == 'b'
+
+        except rs.SagaException as ex:
+            assert False, "Unexpected exception: %s" % ex
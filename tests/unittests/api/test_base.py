@@ -0,0 +1,49 @@
+
+__author__    = "RADICAL-SAGA Development Team"
+__copyright__ = "Copyright 2024, The SAGA Project"
+__license__   = "MIT"
+
+
+import radical.saga      as rs
+import radical.saga.base as sbase
+
+
+# ------------------------------------------------------------------------------
+#
+def test_apitype_cache():
+
+    s1 = rs.Session(default=False)
+    s2 = rs.Session(default=False)
+
+    assert s1._apitype == 'radical.saga.Session'
+    assert s2._apitype == 'radical.saga.Session'
+    assert sbase._apitype_cache[rs.Session] == 'radical.saga.Session'
+
+
+# ------------------------------------------------------------------------------
+#
+def test_generate_id():
+
+    id_1 = sbase._generate_id('radical.saga.test')
+    id_2 = sbase._generate_id('radical.saga.test')
+
+    assert id_1 == 'radical.saga.test.0000'
+    assert id_2 == 'radical.saga.test.0001'
+
+    s1 = rs.Session(default=False)
+    s2 = rs.Session(default=False)
+
+    assert s1._id != s2._id
+    assert s1._id.startswith('radical.saga.Session.')
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_apitype_cache()
+    test_generate_id()
+
+
+# ------------------------------------------------------------------------------
+
@@ -0,0 +1,70 @@
+
+__author__    = "RADICAL-SAGA Development Team"
+__copyright__ = "Copyright 2024, The SAGA Project"
+__license__   = "MIT"
+
+
+import radical.saga as rs
+
+from radical.saga.adaptors.cpi.decorators import SYNC_CALL
+
+
+# ------------------------------------------------------------------------------
+#
+class _CPI(object):
+
+    @SYNC_CALL
+    def plain(self, val):
+        return val
+
+    @SYNC_CALL
+    def metric(self, val, _from_task=None):
+        if _from_task:
+            _from_task._set_metric('val', val)
+        return val
+
+
+# ------------------------------------------------------------------------------
+#
+def test_sync_call_from_task():
+
+    cpi = _CPI()
+
+    assert cpi.plain._from_task  is False
+    assert cpi.metric._from_task is True
+
+    # `_from_task` is stripped for methods which do not expect it
+    assert cpi.plain (1, _from_task=None) == 1
+    assert cpi.metric(2, _from_task=None) == 2
+
+
+# ------------------------------------------------------------------------------
+#
+def test_task_from_task():
+
+    cpi = _CPI()
+
+    t1 = rs.Task(cpi, 'plain', {'_call'  : cpi.plain,
+                                '_args'  : [1],
+                                '_kwargs': {}}, rs.SYNC)
+    t2 = rs.Task(cpi, 'metric', {'_call'  : cpi.metric,
+                                 '_args'  : [2],
+                                 '_kwargs': {}}, rs.SYNC)
+
+    assert t1.state  == rs.DONE
+    assert t1.result == 1
+    assert t2.state  == rs.DONE
+    assert t2.result == 2
+    assert t2.get_attribute('val') == 2
+
+
+# ------------------------------------------------------------------------------
+#
+if __name__ == '__main__':
+
+    test_sync_call_from_task()
+    test_task_from_task()
+
+
+# ------------------------------------------------------------------------------
+
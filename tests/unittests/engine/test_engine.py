@@ -12,9 +12,34 @@ import os
 import sys
 import pprint
 
+import pytest
+
 from   radical.saga.engine.engine import Engine
 
 
+# the engine is a singleton: tests which inject registries or bind caches must
+# not leave those behind for other test modules
+_ENGINE_STATE = ['_registry', '_adaptor_registry', '_lazy_registry',
+                 '_lazy_names', '_adaptor_order']
+
+
+@pytest.fixture(autouse=True)
+def _restore_engine():
+
+    engine = Engine()
+    state  = {attr: getattr(engine, attr) for attr in _ENGINE_STATE}
+    lazy   = engine._cfg.get('lazy_adaptors')
+
+    yield
+
+    for attr, val in state.items():
+        setattr(engine, attr, val)
+
+    engine._cfg['lazy_adaptors'] = lazy
+    engine._bind_cache.clear()
+    engine._bind_failures.clear()
+
+
 def test_singleton():
     """ Test that the object behaves like a singleton
     """
@@ -116,6 +141,124 @@ def test_load_broken_adaptor():
     sys.path = old_sys_path
 
 
+def test_lazy_adaptor():
+    """ Test that an adaptor listed in the manifest is only loaded when needed
+    """
+    # store old sys.path
+    old_sys_path = sys.path
+    path = os.path.split(os.path.abspath(__file__))[0]
+    sys.path.append(path)
+
+    manifest = {'mockadaptor_enabled': {'name'   : 'radical.saga.adaptors.mock',
+                                        'schemas': ['mock'],
+                                        'types'  : ['radical.saga.job.Job']}}
+
+    engine = Engine()
+    lazy   = engine._cfg.get('lazy_adaptors')
+
+    try:
+        engine._cfg['lazy_adaptors'] = 1
+        engine._load_adaptors(["mockadaptor_enabled"], manifest)
+
+        # nothing is loaded, yet
+        assert engine.loaded_adaptors() == {}
+
+        # unrelated lookups do not trigger loading
+        assert engine.find_adaptors('radical.saga.job.Job', 'fork') == []
+        assert engine.loaded_adaptors() == {}
+
+        # the adaptor gets loaded on the first lookup for its type / schema
+        assert engine.find_adaptors('radical.saga.job.Job', 'mock') \
+                == ['radical.saga.adaptors.mock']
+        assert len(engine.loaded_adaptors()['radical.saga.job.Job']['mock']) \
+                == 1
+        assert engine._lazy_registry == {}
+
+    finally:
+        engine._cfg['lazy_adaptors'] = lazy
+
+        # restore sys.path
+        sys.path = old_sys_path
+
+
+def test_adaptor_manifest():
+    """ Test that the adaptor manifest matches the adaptors' own information
+    """
+    import radical.utils as ru
+
+    registry = ru.Config('radical.saga.registry')
+    manifest = registry['adaptor_manifest']
+
+    for module_name in registry['adaptor_registry']:
+
+        assert module_name in manifest, module_name
+
+        try:
+            module = ru.import_module(module_name)
+        except Exception:
+            # missing dependencies - we can't check this adaptor
+            continue
+
+        info  = module._ADAPTOR_INFO
+        entry = manifest[module_name]
+
+        assert entry['name']    == info['name'], module_name
+        assert entry['schemas'] == info['schemas'], module_name
+        assert entry['types']   == [cpi['type'] for cpi in info['cpis']], \
+                                   module_name
+
+
+def test_bind_adaptor_cache():
+    """ Test that adaptors which failed to bind are tried last, and that the
+    last successful adaptor is tried first
+    """
+    calls = list()
+
+    class _API(object):
+        pass
+
+    class _Broken(object):
+        def __init__(self, api, adaptor):
+            calls.append('broken')
+            raise RuntimeError('broken')
+
+    class _Working(object):
+        def __init__(self, api, adaptor):
+            calls.append('working')
+
+    engine = Engine()
+    engine._load_adaptors([])
+    engine._adaptor_registry = {'radical.saga.job.Job': {'mock': [
+        {'cpi_cname'       : '_Broken',
+         'cpi_class'       : _Broken,
+         'adaptor_name'    : 'broken',
+         'adaptor_instance': None},
+        {'cpi_cname'       : '_Working',
+         'cpi_class'       : _Working,
+         'adaptor_name'    : 'working',
+         'adaptor_instance': None}]}}
+
+    api = _API()
+
+    cpi = engine.bind_adaptor(api, 'radical.saga.job.Job', 'mock', None)
+    assert isinstance(cpi, _Working)
+    assert calls == ['broken', 'working']
+
+    # the broken adaptor is not tried again
+    cpi = engine.bind_adaptor(api, 'radical.saga.job.Job', 'mock', None)
+    assert isinstance(cpi, _Working)
+    assert calls == ['broken', 'working', 'working']
+
+    # unless the failure is old enough - but still the last successful
+    # adaptor goes first
+    engine._bind_failures.clear()
+    cpi = engine.bind_adaptor(api, 'radical.saga.job.Job', 'mock', None)
+    assert isinstance(cpi, _Working)
+    assert calls == ['broken', 'working', 'working', 'working']
+
+    engine._load_adaptors([])
+
+
 # ------------------------------------------------------------------------------
 #
 if __name__ == '__main__':
@@ -128,6 +271,9 @@ if __name__ == '__main__':
     test_load_adaptor()
     test_load_adaptor_twice()
     test_load_broken_adaptor()
+    test_lazy_adaptor()
+    test_adaptor_manifest()
+    test_bind_adaptor_cache()
 
 
 # ------------------------------------------------------------------------------
@@ -6,11 +6,26 @@ __author__    = "Andre Merzky"
 __copyright__ = "Copyright 2013, The SAGA Project"
 __license__   = "MIT"
 
+import os
+import shutil
+import hashlib
+import tempfile
+
+from unittest import mock
+
 import radical.utils                as ru
 import radical.saga                 as saga
 import radical.saga.utils.pty_shell as sups
 
 
+# a stand-in for ssh: drop all options and the host name, and run the remote
+# command on the local host
+_SSH_STUB = """#!/bin/sh
+for last; do :; done
+exec /bin/sh -c "$last"
+"""
+
+
 # ------------------------------------------------------------------------------
 #
 def config():
@@ -103,6 +118,407 @@ def test_ptyshell_prompt () :
     assert (not shell.alive ())
 
 
+# ------------------------------------------------------------------------------
+#
+def _ssh_shell (root, **settings) :
+    """
+    Return a local shell which pretends to be an ssh shell, with the ssh
+    transfer scripts running over the ssh stub, and with all optional ssh
+    transfer modes disabled unless given in `settings`.
+    """
+
+    stub = '%s/ssh' % root
+    with open (stub, 'w') as fout :
+        fout.write (_SSH_STUB)
+    os.chmod (stub, 0o755)
+
+    shell = sups.PTYShell (saga.Url ('fork://localhost/'))
+
+    # the shell info is shared with other shells to the same host
+    shell.pty_info = dict (shell.pty_info)
+    shell.pty_info.update ({'shell_type'           : 'ssh',
+                            'ssh_exe'              : stub,
+                            'ssh_env'              : '',
+                            'ssh_args'             : '',
+                            's_flags'              : '',
+                            'host_str'             : 'localhost',
+                            'ssh_tar_threshold'    : 0,
+                            'ssh_tar_compress'     : False,
+                            'ssh_stripe_threshold' : 0,
+                            'ssh_stripe_count'     : 1,
+                            'ssh_stage_resume'     : False,
+                            'ssh_stage_checksum'   : False})
+    shell.pty_info.update (settings)
+
+    return shell
+
+
+# ------------------------------------------------------------------------------
+#
+def _make_tree (path) :
+
+    os.makedirs ('%s/sub' % path)
+    for name in ['a', 'b', 'sub/c', 'sub/d'] :
+        with open ('%s/%s' % (path, name), 'w') as fout :
+            fout.write ('data %s' % name)
+
+
+# ------------------------------------------------------------------------------
+#
+def _list_tree (path) :
+
+    ret = list()
+    for root, _, files in os.walk (path) :
+        for name in files :
+            ret.append (os.path.relpath (os.path.join (root, name), path))
+
+    return sorted (ret)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_tar_threshold () :
+    """ Test when recursive copies use the tar pipe """
+
+    root  = tempfile.mkdtemp ()
+    shell = _ssh_shell (root)
+
+    try :
+        # 5 entries: 'a', 'b', 'sub', 'sub/c', 'sub/d'
+        _make_tree ('%s/tree' % root)
+        src = '%s/tree' % root
+
+        for mode in ['put', 'get'] :
+
+            # disabled by default
+            assert not shell._use_tar (mode, src, '-r')
+
+            shell.pty_info['ssh_tar_threshold'] = 5
+            assert     shell._use_tar (mode, src,       '-r')
+            assert     shell._use_tar (mode, src + '/', '-r')
+            assert not shell._use_tar (mode, src,       '')
+            assert not shell._use_tar (mode, src + '/*', '-r')
+            assert not shell._use_tar (mode, '%s/a' % src, '-r')
+            assert not shell._use_tar (mode, '%s/nope' % root, '-r')
+
+            shell.pty_info['ssh_tar_threshold'] = 6
+            assert not shell._use_tar (mode, src, '-r')
+
+            # only ssh shells use tar
+            shell.pty_info['ssh_tar_threshold'] = 1
+            shell.pty_info['shell_type']        = 'sh'
+            assert not shell._use_tar (mode, src, '-r')
+
+            shell.pty_info['shell_type']        = 'ssh'
+            shell.pty_info['ssh_tar_threshold'] = 0
+
+    finally :
+        shell.finalize (True)
+        shutil.rmtree (root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_tar_copy () :
+    """ Test the target semantics of tar pipe copies """
+
+    root  = tempfile.mkdtemp ()
+    shell = _ssh_shell (root, ssh_tar_threshold=1)
+
+    try :
+        _make_tree ('%s/tree' % root)
+        src   = '%s/tree' % root
+        files = ['a', 'b', 'sub/c', 'sub/d']
+
+        for mode in ['put', 'get'] :
+
+            # like `cp -r`, copying into an existing directory creates the
+            # source directory in it ...
+            tgt = '%s/exists.%s' % (root, mode)
+            os.mkdir (tgt)
+
+            if  mode == 'put' : shell.run_copy_to   (src, tgt, '-r')
+            else              : shell.run_copy_from (src, tgt, '-r')
+
+            assert _list_tree (tgt) == ['tree/%s' % f for f in files]
+
+            # ... while a new target directory becomes the copy
+            tgt = '%s/new.%s/tree' % (root, mode)
+
+            if  mode == 'put' : shell.run_copy_to   (src + '/', tgt, '-r')
+            else              : shell.run_copy_from (src + '/', tgt, '-r')
+
+            assert _list_tree (tgt) == files
+
+            with open ('%s/sub/c' % tgt) as fin :
+                assert fin.read () == 'data sub/c'
+
+        # compression does not change the result
+        shell.pty_info['ssh_tar_compress'] = True
+        tgt = '%s/zipped' % root
+        shell.run_copy_to (src, tgt, '-r')
+        assert _list_tree (tgt) == files
+
+    finally :
+        shell.finalize (True)
+        shutil.rmtree (root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_stripe_ranges () :
+    """ Test the splitting of files into stripes """
+
+    # 10 blocks in 4 stripes of 3 blocks, the last one open-ended
+    assert sups._stripe_ranges (10 * 100,      4, 100) == \
+                                  [(0, 3), (3, 3), (6, 3), (9, None)]
+
+    # partial last block
+    assert sups._stripe_ranges (10 * 100 - 50, 4, 100) == \
+                                  [(0, 3), (3, 3), (6, 3), (9, None)]
+
+    # fewer blocks than stripes
+    assert sups._stripe_ranges (250, 4, 100) == [(0, 1), (1, 1), (2, None)]
+    assert sups._stripe_ranges (100, 4, 100) == [(0, None)]
+
+    # all blocks are covered exactly once
+    for size in [1, 99, 100, 101, 999, 1000, 1001] :
+        for n in [2, 3, 4, 7] :
+            blocks = list()
+            for skip, count in sups._stripe_ranges (size, n, 100) :
+                end = skip + count if count else (size + 99) // 100
+                blocks += list (range (skip, end))
+            assert blocks == list (range ((size + 99) // 100))
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_stripe_copy () :
+    """ Test striped copies, their verification and cleanup """
+
+    root  = tempfile.mkdtemp ()
+    shell = _ssh_shell (root, ssh_stripe_threshold=1024 * 1024,
+                              ssh_stripe_count=3)
+
+    try :
+        # 5 full blocks and a bit
+        data = os.urandom (5 * 1024 * 1024 + 17)
+        src  = '%s/src' % root
+        with open (src, 'wb') as fout :
+            fout.write (data)
+
+        md5 = hashlib.md5 (data).hexdigest ()
+
+        for mode in ['put', 'get'] :
+
+            assert shell._use_stripes (mode, src, '')   == len (data)
+            assert shell._use_stripes (mode, src, '-r') == 0
+
+            # copies into directories keep the source name
+            tgt = '%s/tgt.%s' % (root, mode)
+            os.mkdir (tgt)
+
+            if  mode == 'put' : shell.run_copy_to   (src, tgt)
+            else              : shell.run_copy_from (src, tgt)
+
+            with open ('%s/src' % tgt, 'rb') as fin :
+                assert fin.read () == data
+
+            # part files are gone
+            assert os.listdir (tgt) == ['src']
+
+        # part files are verified by checksum, or by size
+        part = '%s/tgt.put/src' % root
+        for mode in ['put', 'get'] :
+            shell._verify_part (mode, part, len (data), md5)
+            shell._verify_part (mode, part, len (data), None)
+
+            with mock.patch.object (shell, '_remote_md5', return_value=None) :
+                shell._verify_part ('put', part, len (data), md5)
+
+            try :
+                shell._verify_part (mode, part, len (data), 'x' * 32)
+                assert False, 'expected NoSuccess'
+            except saga.NoSuccess as e :
+                assert 'checksum mismatch' in str (e)
+
+            try :
+                shell._verify_part (mode, part, len (data) + 1, None)
+                assert False, 'expected NoSuccess'
+            except saga.NoSuccess as e :
+                assert 'size mismatch' in str (e)
+
+        # failed transfers leave neither a target nor part files behind
+        for mode in ['put', 'get'] :
+
+            tgt = '%s/fail.%s' % (root, mode)
+            os.mkdir (tgt)
+
+            # corrupt the source checksum
+            if  mode == 'put' : patch = mock.patch.object (sups, '_local_md5',
+                                                           return_value='x' * 32)
+            else              : patch = mock.patch.object (shell, '_remote_md5',
+                                                           return_value='x' * 32)
+            with patch :
+                try :
+                    if  mode == 'put' : shell.run_copy_to   (src, tgt)
+                    else              : shell.run_copy_from (src, tgt)
+                    assert False, 'expected NoSuccess'
+                except saga.NoSuccess :
+                    pass
+
+            assert os.listdir (tgt) == []
+
+        # striping is disabled by default, and then does not probe the
+        # remote file size
+        shell.pty_info['ssh_stripe_threshold'] = 0
+        with mock.patch.object (shell, 'run_sync') as run_sync :
+            assert shell._use_stripes ('get', src, '') == 0
+            assert not run_sync.called
+
+    finally :
+        shell.finalize (True)
+        shutil.rmtree (root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_utf8_missing () :
+    """ Test detection of UTF-8 characters split at the end of a range """
+
+    data = 'a\u00e9\u20ac\U0001d11e'.encode ()    # 1, 2, 3 and 4 bytes
+
+    assert [sups._utf8_missing (data[:n]) for n in range (len (data) + 1)] \
+        == [0, 0, 1, 0, 2, 1, 0, 3, 2, 1, 0]
+
+    # invalid data are not extended
+    assert sups._utf8_missing (b'\x80\x80\x80\x80') == 0
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_resume_helpers () :
+    """ Test parsing of the resume stat, and partial md5 checksums """
+
+    out = "T /data/tgt/file\n" \
+          "S 1048576 1500000000 regular file\n" \
+          "P 4096\n"
+    assert sups._parse_resume_stat (out) == {'path'  : '/data/tgt/file',
+                                             'size'  : 1048576,
+                                             'mtime' : 1500000000,
+                                             'type'  : 'regular file',
+                                             'part'  : 4096}
+
+    # missing target and part file
+    out = "T /data/tgt/file\nS \nP \n"
+    assert sups._parse_resume_stat (out) == {'path'  : '/data/tgt/file',
+                                             'size'  : None,
+                                             'mtime' : None,
+                                             'type'  : None,
+                                             'part'  : None}
+
+    root = tempfile.mkdtemp ()
+    try :
+        data = os.urandom (2 * 1024 * 1024 + 3)
+        path = '%s/data' % root
+        with open (path, 'wb') as fout :
+            fout.write (data)
+
+        for n in [None, 0, 1, 1024 * 1024, 1024 * 1024 + 1, len (data),
+                  len (data) + 10] :
+            assert sups._local_md5 (path, n) == \
+                   hashlib.md5 (data[:n]).hexdigest ()
+
+    finally :
+        shutil.rmtree (root)
+
+
+# ------------------------------------------------------------------------------
+#
+def test_ptyshell_resume () :
+    """ Test resumable staging: skips, resumes, and part file handling """
+
+    root  = tempfile.mkdtemp ()
+    shell = _ssh_shell (root, ssh_stage_resume=True)
+    bs    = sups._STRIPE_BLOCKSIZE
+    procs = list()
+    spawn = sups.supp.PTYProcess
+
+    def spy (cmd, *args, **kwargs) :
+        procs.append (cmd[-1])
+        return spawn (cmd, *args, **kwargs)
+
+    try :
+        data  = os.urandom (3 * bs + 5)
+        mtime = 1500000000
+        src   = '%s/file' % root
+        with open (src, 'wb') as fout :
+            fout.write (data)
+        os.utime (src, (mtime, mtime))
+
+        for mode in ['put', 'get'] :
+
+            tgt = '%s/tgt.%s' % (root, mode)
+            os.mkdir (tgt)
+            out = '%s/file' % tgt
+
+            def stage () :
+                del procs[:]
+                with mock.patch.object (sups.supp, 'PTYProcess', spy) :
+                    if  mode == 'put' : shell.stage_to_remote   (src, tgt)
+                    else              : shell.stage_from_remote (src, tgt)
+
+            def check () :
+                with open (out, 'rb') as fin :
+                    assert fin.read () == data
+                assert int (os.path.getmtime (out)) == mtime
+                assert os.listdir (tgt) == ['file']
+
+            # the first transfer copies the data, and sets the mtime
+            stage ()
+            check ()
+            assert len (procs) == 1 and 'skip=0' in procs[0]
+
+            # unchanged targets (same size and mtime) are skipped ...
+            with open (out, 'r+b') as fout :
+                fout.write (b'x' * 10)
+            os.utime (out, (mtime, mtime))
+
+            stage ()
+            assert not procs
+            with open (out, 'rb') as fin :
+                assert fin.read (10) == b'x' * 10
+
+            # ... unless their checksum differs, if that is checked
+            shell.pty_info['ssh_stage_checksum'] = True
+            stage ()
+            check ()
+            assert len (procs) == 1
+            shell.pty_info['ssh_stage_checksum'] = False
+
+            # part files resume from their last full block which matches
+            os.unlink (out)
+            with open (out + '.rs_part', 'wb') as fout :
+                fout.write (data[:2 * bs] + b'garbage')
+
+            stage ()
+            check ()
+            assert len (procs) == 1 and 'skip=2' in procs[0]
+
+            # part files which do not match the source are discarded
+            os.unlink (out)
+            with open (out + '.rs_part', 'wb') as fout :
+                fout.write (b'x' * (2 * bs + 100))
+
+            stage ()
+            check ()
+            assert len (procs) == 1 and 'skip=0' in procs[0]
+
+    finally :
+        shell.finalize (True)
+        shutil.rmtree (root)
+
+
 # ------------------------------------------------------------------------------
 #
 # def test_ptyshell_file_stage () :
@@ -127,6 +543,13 @@ def test_ptyshell_prompt () :
 if __name__ == '__main__':
 
     test_ptyshell_ok()
+    test_ptyshell_tar_threshold()
+    test_ptyshell_tar_copy()
+    test_ptyshell_stripe_ranges()
+    test_ptyshell_stripe_copy()
+    test_ptyshell_utf8_missing()
+    test_ptyshell_resume_helpers()
+    test_ptyshell_resume()
   # test_ptyshell_nok()
   # test_ptyshell_async()
   # test_ptyshell_prompt()